@@ -0,0 +1,326 @@
+"""
+Microbenchmarks for every public Controller operation and the DAO calls behind them.
+
+    python -m benchmarks.controller_benchmark [--sizes 1000 10000 100000 1000000]
+        [--autosave on|off|both] [--repeat N] [--max-seconds S]
+        [--output results.json] [--baseline old.json] [--threshold 0.25]
+
+For each store size (number of posts in the current blog) and autosave
+setting a fresh store is built in a scratch directory, then every
+operation is timed --repeat times (fewer if --max-seconds runs out).
+Results are written as JSON with min/median/p90/p99/max per operation.
+With --baseline the medians are compared against a previous results
+file and the exit status is 1 if any operation got slower than the
+threshold allows.
+"""
+import argparse
+import json
+import math
+import os
+import platform
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+from blogging.configuration import Configuration
+from blogging.controller import Controller
+
+WORDS = ("lorem ipsum dolor sit amet consectetur adipiscing elit sed do eiusmod "
+         "tempor incididunt ut labore et dolore magna aliqua journey trip").split()
+
+MAIN_BLOG = 1
+SPARE_BLOG = 2
+
+
+def percentile(sorted_samples, p):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_samples:
+        return None
+    k = max(0, min(len(sorted_samples) - 1, math.ceil(p / 100.0 * len(sorted_samples)) - 1))
+    return sorted_samples[k]
+
+
+def summarize(samples):
+    s = sorted(samples)
+    return {
+        "samples": len(s),
+        "min_us": s[0] * 1e6,
+        "median_us": percentile(s, 50) * 1e6,
+        "p90_us": percentile(s, 90) * 1e6,
+        "p99_us": percentile(s, 99) * 1e6,
+        "max_us": s[-1] * 1e6,
+        "mean_us": sum(s) / len(s) * 1e6,
+    }
+
+
+class ControllerSuite:
+    """A populated store plus one timing function per operation."""
+
+    def __init__(self, posts, blogs, autosave, seed=0):
+        self.rng = random.Random(seed)
+        self.posts = posts
+        self.blogs = blogs
+        self.controller = Controller(autosave=autosave)
+        self.controller.login("user", "123456")
+        self._created_posts = []
+        self._created_blogs = []
+        self._next_blog_id = blogs + 1
+        self._spare_id = SPARE_BLOG
+        self._populate()
+
+    def _text(self, words):
+        return " ".join(self.rng.choice(WORDS) for _ in range(words))
+
+    def _populate(self):
+        c = self.controller
+        with c.transaction():
+            for i in range(1, self.blogs + 1):
+                c.create_blog(i, f"blog {i}", f"blog_{i}", f"blog{i}@example.com")
+            c.set_current_blog(MAIN_BLOG)
+            for _ in range(self.posts):
+                c.create_post(self._text(4), self._text(30))
+
+    def _timed(self, fn, *args):
+        start = time.perf_counter()
+        fn(*args)
+        return time.perf_counter() - start
+
+    def _code(self):
+        return self.rng.randint(1, self.posts)
+
+    # ---------- controller operations ----------
+    # each method runs one timed call and undoes its effect (untimed)
+    # or leaves state a paired operation cleans up
+
+    def login(self):
+        self.controller.logout()
+        t = self._timed(self.controller.login, "user", "123456")
+        self.controller.set_current_blog(MAIN_BLOG)
+        return t
+
+    def logout(self):
+        t = self._timed(self.controller.logout)
+        self.controller.login("user", "123456")
+        self.controller.set_current_blog(MAIN_BLOG)
+        return t
+
+    def create_blog(self):
+        id = self._next_blog_id
+        self._next_blog_id += 1
+        self._created_blogs.append(id)
+        return self._timed(self.controller.create_blog, id, f"blog {id}", f"blog_{id}", f"blog{id}@example.com")
+
+    def search_blog(self):
+        return self._timed(self.controller.search_blog, self.rng.randint(1, self.blogs))
+
+    def retrieve_blogs(self):
+        return self._timed(self.controller.retrieve_blogs, f"blog {self.rng.randint(1, self.blogs)}")
+
+    def list_blogs(self):
+        return self._timed(self.controller.list_blogs)
+
+    def update_blog(self):
+        # move the spare blog back and forth between two ids
+        old_id = self._spare_id
+        new_id = -SPARE_BLOG if old_id == SPARE_BLOG else SPARE_BLOG
+        self._spare_id = new_id
+        return self._timed(self.controller.update_blog, old_id, new_id, "spare", "spare_url", "spare@example.com")
+
+    def delete_blog(self):
+        if not self._created_blogs:
+            self.create_blog()
+        return self._timed(self.controller.delete_blog, self._created_blogs.pop())
+
+    def set_current_blog(self):
+        return self._timed(self.controller.set_current_blog, MAIN_BLOG)
+
+    def get_current_blog(self):
+        return self._timed(self.controller.get_current_blog)
+
+    def unset_current_blog(self):
+        t = self._timed(self.controller.unset_current_blog)
+        self.controller.set_current_blog(MAIN_BLOG)
+        return t
+
+    def create_post(self):
+        start = time.perf_counter()
+        post = self.controller.create_post(self._text(4), self._text(30))
+        t = time.perf_counter() - start
+        self._created_posts.append(post.code)
+        return t
+
+    def search_post(self):
+        return self._timed(self.controller.search_post, self._code())
+
+    def retrieve_posts(self):
+        return self._timed(self.controller.retrieve_posts, self.rng.choice(WORDS))
+
+    def update_post(self):
+        return self._timed(self.controller.update_post, self._code(), self._text(4), self._text(30))
+
+    def delete_post(self):
+        if not self._created_posts:
+            self.create_post()
+        return self._timed(self.controller.delete_post, self._created_posts.pop())
+
+    def list_posts(self):
+        return self._timed(self.controller.list_posts)
+
+    def transaction(self):
+        # ten updates persisted together
+        def batch():
+            with self.controller.transaction():
+                for _ in range(10):
+                    self.controller.update_post(self._code(), self._text(4), self._text(30))
+        return self._timed(batch)
+
+    # ---------- DAO operations ----------
+
+    def dao_search_blog(self):
+        return self._timed(self.controller.blog_dao.search_blog, self.rng.randint(1, self.blogs))
+
+    def dao_retrieve_blogs(self):
+        return self._timed(self.controller.blog_dao.retrieve_blogs, "blog")
+
+    def dao_list_blogs(self):
+        return self._timed(self.controller.blog_dao.list_blogs)
+
+    def dao_search_post(self):
+        return self._timed(self.controller.current_blog.post_dao.search_post, self._code())
+
+    def dao_retrieve_posts(self):
+        return self._timed(self.controller.current_blog.post_dao.retrieve_posts, self.rng.choice(WORDS))
+
+    def dao_list_posts(self):
+        return self._timed(self.controller.current_blog.post_dao.list_posts)
+
+    def dao_write_posts(self):
+        dao = self.controller.current_blog.post_dao
+        return self._timed(dao._write, dao._posts)
+
+    def dao_write_blogs(self):
+        dao = self.controller.blog_dao
+        return self._timed(dao._write_all, dao._blogs)
+
+
+# paired operations are listed create-before-delete so the store returns
+# to its original size after each pair
+OPERATIONS = [
+    "login", "logout",
+    "create_blog", "delete_blog", "search_blog", "retrieve_blogs", "list_blogs", "update_blog",
+    "set_current_blog", "get_current_blog", "unset_current_blog",
+    "create_post", "delete_post", "search_post", "retrieve_posts", "update_post", "list_posts",
+    "transaction",
+    "dao_search_blog", "dao_retrieve_blogs", "dao_list_blogs",
+    "dao_search_post", "dao_retrieve_posts", "dao_list_posts",
+    "dao_write_posts", "dao_write_blogs",
+]
+
+
+def run_size(posts, autosave, args):
+    tmp = tempfile.mkdtemp()
+    saved = (Configuration.autosave, Configuration.blogs_file, Configuration.records_path)
+    Configuration.autosave = autosave
+    Configuration.blogs_file = os.path.join(tmp, "blogs.json")
+    Configuration.records_path = os.path.join(tmp, "records")
+    try:
+        start = time.perf_counter()
+        suite = ControllerSuite(posts, args.blogs, autosave, args.seed)
+        print(f"# {posts} posts, autosave {'on' if autosave else 'off'}: "
+              f"populated in {time.perf_counter() - start:.1f}s", file=sys.stderr)
+
+        results = []
+        for op in OPERATIONS:
+            if args.ops and op not in args.ops:
+                continue
+            fn = getattr(suite, op)
+            samples = []
+            budget_end = time.perf_counter() + args.max_seconds
+            while len(samples) < args.repeat:
+                samples.append(fn())
+                if len(samples) >= 3 and time.perf_counter() > budget_end:
+                    break
+            row = {"op": op, "posts": posts, "autosave": autosave}
+            row.update(summarize(samples))
+            results.append(row)
+            print(f"  {op:22s} median {row['median_us']:12.1f} us   p99 {row['p99_us']:12.1f} us   "
+                  f"(n={row['samples']})", file=sys.stderr)
+        return results
+    finally:
+        Configuration.autosave, Configuration.blogs_file, Configuration.records_path = saved
+        shutil.rmtree(tmp)
+
+
+def compare(results, baseline, threshold):
+    """Return rows whose median got slower than baseline * (1 + threshold)."""
+    base = {(r["op"], r["posts"], r["autosave"]): r for r in baseline.get("results", [])}
+    regressions = []
+    for r in results:
+        old = base.get((r["op"], r["posts"], r["autosave"]))
+        if old is None or not old["median_us"]:
+            continue
+        ratio = r["median_us"] / old["median_us"]
+        r["baseline_median_us"] = old["median_us"]
+        r["ratio"] = ratio
+        if ratio > 1 + threshold:
+            regressions.append(r)
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000, 1000000])
+    parser.add_argument("--autosave", choices=["on", "off", "both"], default="both")
+    parser.add_argument("--blogs", type=int, default=100, help="number of blogs in the store")
+    parser.add_argument("--repeat", type=int, default=25, help="timed calls per operation")
+    parser.add_argument("--max-seconds", type=float, default=5.0,
+                        help="stop repeating an operation after this long (at least 3 calls)")
+    parser.add_argument("--ops", nargs="+", choices=OPERATIONS, help="only run these operations")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write JSON results here (default: stdout)")
+    parser.add_argument("--baseline", help="previous results file to compare against")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="allowed median slowdown before a regression is reported")
+    args = parser.parse_args(argv)
+
+    modes = {"on": [True], "off": [False], "both": [False, True]}[args.autosave]
+    results = []
+    for posts in args.sizes:
+        for autosave in modes:
+            results.extend(run_size(posts, autosave, args))
+
+    regressions = []
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            regressions = compare(results, json.load(f), args.threshold)
+        for r in regressions:
+            print(f"REGRESSION {r['op']} posts={r['posts']} autosave={r['autosave']}: "
+                  f"{r['baseline_median_us']:.1f} -> {r['median_us']:.1f} us ({r['ratio']:.2f}x)",
+                  file=sys.stderr)
+
+    report = {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "repeat": args.repeat,
+            "blogs": args.blogs,
+            "seed": args.seed,
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "results": results,
+        "regressions": [(r["op"], r["posts"], r["autosave"]) for r in regressions],
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
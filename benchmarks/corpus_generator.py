@@ -0,0 +1,187 @@
+"""
+Deterministic synthetic corpus generator for scale testing.
+
+    python -m benchmarks.corpus_generator --out DIR [--blogs N]
+        [--posts-per-blog N | MIN:MAX] [--title-words SPEC] [--text-words SPEC]
+        [--vocab-size N | --vocab-file FILE] [--seed N]
+
+Writes DIR/blogs.json and DIR/records/<blog id>.dat in exactly the format
+BlogDAOJSON and PostDAOPickle read, every blog with its summary, so
+opening the corpus reads no record files. The same arguments and seed always
+produce the same corpus. blogs.json is streamed one blog at a time and
+each record file is written as soon as its posts are generated, so memory
+use is bounded by the largest blog, not by the corpus.
+
+Length specs are one of:
+    fixed:N               always N words
+    uniform:MIN:MAX       uniformly between MIN and MAX words
+    lognormal:MU:SIGMA    exp(normal(MU, SIGMA)) words, at least 1
+
+Point the application at the corpus by setting Configuration.blogs_file
+to DIR/blogs.json and Configuration.records_path to DIR/records.
+"""
+import argparse
+import itertools
+import math
+import os
+import pickle
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+from blogging.blog_summary import BlogSummary
+from blogging.configuration import Configuration
+from blogging.dao.atomic_writer import atomic_write
+from blogging.dao.blog_stream_writer import BlogStreamWriter
+from blogging.post import Post
+
+SYLLABLES = ("ka", "lo", "mi", "ne", "ru", "sa", "ti", "vo", "ze", "ba",
+             "de", "fu", "go", "hi", "ja", "pe", "qu", "ro", "su", "wa")
+
+
+def parse_length(spec):
+    """Turn a length spec into a function rng -> word count."""
+    kind, _, rest = spec.partition(":")
+    values = [float(v) for v in rest.split(":")] if rest else []
+    if kind == "fixed" and len(values) == 1:
+        n = int(values[0])
+        return lambda rng: n
+    if kind == "uniform" and len(values) == 2:
+        lo, hi = int(values[0]), int(values[1])
+        return lambda rng: rng.randint(lo, hi)
+    if kind == "lognormal" and len(values) == 2:
+        mu, sigma = values
+        return lambda rng: max(1, int(rng.lognormvariate(mu, sigma)))
+    raise argparse.ArgumentTypeError(f"bad length spec: {spec}")
+
+
+def parse_count(spec):
+    """N or MIN:MAX posts per blog."""
+    lo, _, hi = spec.partition(":")
+    lo = int(lo)
+    hi = int(hi) if hi else lo
+    if lo < 0 or hi < lo:
+        raise argparse.ArgumentTypeError(f"bad post count: {spec}")
+    return lo, hi
+
+
+def build_vocabulary(rng, size):
+    """size distinct pronounceable words, generated from the seed."""
+    words = []
+    seen = set()
+    while len(words) < size:
+        word = "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(1, 4)))
+        if word not in seen:
+            seen.add(word)
+            words.append(word)
+    return words
+
+
+class CorpusGenerator:
+    """Generates blogs and posts from seeded random streams."""
+
+    POOL_SIZE = 1 << 16
+
+    def __init__(self, blogs, posts_per_blog, title_words, text_words, vocabulary,
+                 seed=0, start=datetime(2020, 1, 1)):
+        self.blogs = blogs
+        self.posts_per_blog = posts_per_blog
+        self.title_words = title_words
+        self.text_words = text_words
+        self.vocabulary = vocabulary
+        self.seed = seed
+        self.start = start
+        # Zipf-like word frequencies so searches hit realistic result sizes.
+        # Sampling every word separately dominates the run time, so a pool
+        # is sampled once and each text is a random slice of it.
+        cum_weights = list(itertools.accumulate(1.0 / (i + 1) for i in range(len(vocabulary))))
+        pool_rng = random.Random(f"{seed}:pool")
+        self._pool = pool_rng.choices(vocabulary, cum_weights=cum_weights, k=self.POOL_SIZE)
+
+    def _words(self, rng, n):
+        start = rng.randrange(self.POOL_SIZE)
+        words = self._pool[start:start + n]
+        while len(words) < n:
+            words += self._pool[:n - len(words)]
+        return " ".join(words)
+
+    def blog(self, rng, id):
+        name = self._words(rng, 2).title()
+        slug = name.lower().replace(" ", "_")
+        return {"id": id, "name": name, "url": f"{slug}_{id}", "email": f"{slug}.{id}@example.com"}
+
+    def posts(self, rng):
+        lo, hi = self.posts_per_blog
+        created = self.start + timedelta(seconds=rng.randint(0, 86400 * 30))
+        for code in range(1, rng.randint(lo, hi) + 1):
+            created += timedelta(seconds=rng.randint(60, 86400))
+            updated = created
+            if rng.random() < 0.2:
+                updated = created + timedelta(seconds=rng.randint(60, 86400 * 7))
+            yield Post(code, self._words(rng, self.title_words(rng)),
+                       self._words(rng, self.text_words(rng)), created, updated)
+
+    def write(self, blogs_file, records_path, ext, progress=None):
+        """Write the corpus and return (blogs, posts) written."""
+        os.makedirs(records_path, exist_ok=True)
+        total_posts = 0
+        with BlogStreamWriter(blogs_file) as writer:
+            for id in range(1, self.blogs + 1):
+                # one random stream per blog keeps blogs independent of
+                # each other, so changing --blogs does not reshuffle them
+                rng = random.Random(f"{self.seed}:{id}")
+                blog = self.blog(rng, id)
+                posts = list(self.posts(rng))
+                path = os.path.join(records_path, f"{id}{ext}")
+                atomic_write(path, lambda f: pickle.dump(posts, f), binary=True, durability="none")
+                blog["summary"] = BlogSummary.of(posts).to_dict()
+                writer.write(blog)
+                total_posts += len(posts)
+                if progress:
+                    progress(id, total_posts)
+        return self.blogs, total_posts
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--out", required=True, help="directory for blogs.json and records/")
+    parser.add_argument("--blogs", type=int, default=100)
+    parser.add_argument("--posts-per-blog", type=parse_count, default=(100, 100))
+    parser.add_argument("--title-words", type=parse_length, default=parse_length("uniform:2:8"))
+    parser.add_argument("--text-words", type=parse_length, default=parse_length("lognormal:4:0.8"))
+    vocab = parser.add_mutually_exclusive_group()
+    vocab.add_argument("--vocab-size", type=int, default=2000)
+    vocab.add_argument("--vocab-file", help="one word per line")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    if args.vocab_file:
+        with open(args.vocab_file, "r", encoding="utf-8") as f:
+            vocabulary = [w.strip() for w in f if w.strip()]
+    else:
+        vocabulary = build_vocabulary(random.Random(f"{args.seed}:vocabulary"), args.vocab_size)
+    if not vocabulary:
+        parser.error("vocabulary is empty")
+
+    generator = CorpusGenerator(args.blogs, args.posts_per_blog, args.title_words,
+                                args.text_words, vocabulary, args.seed)
+
+    step = max(1, 10 ** int(math.log10(max(1, args.blogs))) // 10)
+
+    def progress(done, posts):
+        if done % step == 0 or done == args.blogs:
+            print(f"\r{done}/{args.blogs} blogs, {posts} posts", end="", file=sys.stderr)
+
+    start = time.perf_counter()
+    blogs, posts = generator.write(os.path.join(args.out, "blogs.json"),
+                                   os.path.join(args.out, "records"),
+                                   Configuration.records_extension, progress)
+    elapsed = time.perf_counter() - start
+    print(file=sys.stderr)
+    print(f"wrote {blogs} blogs and {posts} posts to {args.out} in {elapsed:.1f}s "
+          f"({posts / elapsed if elapsed else 0:.0f} posts/s)")
+
+
+if __name__ == "__main__":
+    main()
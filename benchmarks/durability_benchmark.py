@@ -0,0 +1,117 @@
+"""
+Throughput and latency of autosaved mutations for each durability mode.
+
+    python -m benchmarks.durability_benchmark [--modes none fsync group]
+        [--posts 1000] [--ops 500] [--window 0.05] [--dir PATH] [--output results.json]
+
+For every mode a fresh store with --posts posts is built, then --ops
+mutations (create/update/delete post, cycling) are timed one by one with
+autosave on. Throughput includes the time to make the last write durable
+(for "group" that is the final batch). fsync cost depends on the file
+system, so run with --dir on the disk the store will live on; the
+default scratch directory may be a RAM disk.
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+
+from benchmarks.controller_benchmark import summarize
+from blogging.configuration import Configuration
+from blogging.controller import Controller
+from blogging.dao import atomic_writer
+from blogging.dao.atomic_writer import DURABILITY_MODES
+
+
+def run_mode(mode, args):
+    tmp = tempfile.mkdtemp(dir=args.dir)
+    saved = (Configuration.autosave, Configuration.blogs_file, Configuration.records_path, Configuration.durability)
+    Configuration.autosave = True
+    Configuration.blogs_file = os.path.join(tmp, "blogs.json")
+    Configuration.records_path = os.path.join(tmp, "records")
+    try:
+        c = Controller()
+        c.login("user", "123456")
+        with c.transaction():
+            c.create_blog(1, "blog", "blog", "blog@example.com")
+            c.set_current_blog(1)
+            for i in range(args.posts):
+                c.create_post(f"post {i}", "text " * 40)
+
+        Configuration.durability = mode
+        if mode == "group":
+            committer = atomic_writer.committer()
+            committer.window = args.window
+            batches, files = committer.batches, committer.files
+
+        samples = []
+        start = time.perf_counter()
+        for i in range(args.ops):
+            t = time.perf_counter()
+            step = i % 3
+            if step == 0:
+                c.create_post(f"new {i}", "text " * 40)
+            elif step == 1:
+                c.update_post(args.posts + i // 3 + 1, f"changed {i}", "text " * 40)
+            else:
+                c.delete_post(args.posts + i // 3 + 1)
+            samples.append(time.perf_counter() - t)
+        # writes are only durable once the last group batch is committed
+        atomic_writer.sync()
+        elapsed = time.perf_counter() - start
+
+        row = {"mode": mode, "posts": args.posts, "ops": args.ops,
+               "throughput_ops_s": args.ops / elapsed}
+        row.update(summarize(samples))
+        if mode == "group":
+            row["window_s"] = args.window
+            row["batches"] = committer.batches - batches
+            row["files_committed"] = committer.files - files
+        return row
+    finally:
+        (Configuration.autosave, Configuration.blogs_file, Configuration.records_path,
+         Configuration.durability) = saved
+        shutil.rmtree(tmp)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--modes", nargs="+", choices=DURABILITY_MODES, default=list(DURABILITY_MODES))
+    parser.add_argument("--posts", type=int, default=1000, help="posts in the store before timing")
+    parser.add_argument("--ops", type=int, default=500, help="timed mutations per mode")
+    parser.add_argument("--window", type=float, default=Configuration.group_commit_window,
+                        help="group commit window in seconds")
+    parser.add_argument("--dir", help="directory for the scratch stores (default: system temp)")
+    parser.add_argument("--output", help="write JSON results here (default: stdout)")
+    args = parser.parse_args(argv)
+
+    results = []
+    for mode in args.modes:
+        row = run_mode(mode, args)
+        results.append(row)
+        print(f"  {mode:6s} {row['throughput_ops_s']:10.1f} ops/s   median {row['median_us']:10.1f} us   "
+              f"p99 {row['p99_us']:10.1f} us", file=sys.stderr)
+
+    report = {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "dir": os.path.abspath(args.dir or tempfile.gettempdir()),
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Login throughput benchmark for the user store.
+
+    python -m benchmarks.login_benchmark [--users N] [--logins N]
+
+Writes a users.txt with N accounts into a scratch directory and reports
+how long it takes to construct a Controller, to run the first login
+(index build), to reopen an existing index, to pick up a newly added
+account, and how many login/logout pairs per second the Controller does.
+"""
+import argparse
+import hashlib
+import os
+import random
+import shutil
+import tempfile
+import time
+
+from blogging.configuration import Configuration
+from blogging.controller import Controller
+
+
+def write_users(path, count):
+    with open(path, "w") as f:
+        for i in range(count):
+            pw = f"pw{i}"
+            f.write(f"user{i},{hashlib.sha256(pw.encode()).hexdigest()}\n")
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - start, result
+
+
+def run(users, logins, seed=0):
+    tmp = tempfile.mkdtemp()
+    saved = Configuration.users_file
+    try:
+        users_file = os.path.join(tmp, "users.txt")
+        write_users(users_file, users)
+        Configuration.users_file = users_file
+
+        results = {"users": users}
+        results["construct_s"], controller = timed(lambda: Controller(autosave=False))
+
+        def login_logout(name, pw):
+            controller.login(name, pw)
+            controller.logout()
+
+        results["first_login_s"], _ = timed(lambda: login_logout("user0", "pw0"))
+
+        # a new Controller reuses the index written by the first one
+        controller = Controller(autosave=False)
+        results["reopen_login_s"], _ = timed(lambda: login_logout("user1", "pw1"))
+
+        # hot reload: append an account and log in with it right away
+        with open(users_file, "a") as f:
+            f.write(f"newuser,{hashlib.sha256(b'newpw').hexdigest()}\n")
+        results["reload_login_s"], _ = timed(lambda: login_logout("newuser", "newpw"))
+
+        rng = random.Random(seed)
+        picks = [rng.randrange(users) for _ in range(logins)]
+        elapsed, _ = timed(lambda: [login_logout(f"user{i}", f"pw{i}") for i in picks])
+        results["logins"] = logins
+        results["logins_per_s"] = logins / elapsed if elapsed else float("inf")
+        return results
+    finally:
+        Configuration.users_file = saved
+        shutil.rmtree(tmp)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--users", type=int, default=200000)
+    parser.add_argument("--logins", type=int, default=20000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    results = run(args.users, args.logins, args.seed)
+    print(f"accounts:               {results['users']}")
+    print(f"Controller():           {results['construct_s'] * 1000:.3f} ms")
+    print(f"first login (build):    {results['first_login_s'] * 1000:.3f} ms")
+    print(f"login, existing index:  {results['reopen_login_s'] * 1000:.3f} ms")
+    print(f"login after reload:     {results['reload_login_s'] * 1000:.3f} ms")
+    print(f"throughput:             {results['logins_per_s']:.0f} login+logout/s")
+
+
+if __name__ == "__main__":
+    main()
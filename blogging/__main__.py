@@ -1,16 +1,31 @@
 import os
 import sys
 from blogging.cli.blogging_cli import BloggingCLI
+import blogging.cli.batch_cli
+import blogging.cli.transfer_cli
+import blogging.cli.site_cli
 import blogging.gui.blogging_gui
 
 def main():
 	# You can run either a command-line interface (CLI) 
 	# or a graphical user interface (GUI) to your bloggingJSON system.
+	# "batch <file|->" runs commands from a file without prompts.
+	if len(sys.argv) >= 2 and sys.argv[1] == 'batch':
+		sys.exit(blogging.cli.batch_cli.main(sys.argv[2:]))
+	# "export <file|->" / "import <file|->" move the store as JSON lines.
+	if len(sys.argv) >= 2 and sys.argv[1] in ('export', 'import'):
+		sys.exit(blogging.cli.transfer_cli.main(sys.argv[1:]))
+	# "build-site" renders the blogs to static HTML.
+	if len(sys.argv) >= 2 and sys.argv[1] == 'build-site':
+		sys.exit(blogging.cli.site_cli.main(sys.argv[2:]))
 	if len(sys.argv) != 2:
 		print('ERROR: wrong number of arguments')
 		print('\nCorrect Command usage:')
 		print('python -m bloggingJSON option')
 		print('where option is either cli or gui')
+		print('or: python -m blogging batch <file|->')
+		print('or: python -m blogging export|import <file|-> [--jobs N] [--gzip]')
+		print('or: python -m blogging build-site [--output DIR] [--jobs N] [--force]')
 		sys.exit()
 
 	if sys.argv[1] == 'cli':
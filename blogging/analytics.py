@@ -0,0 +1,220 @@
+import threading
+
+try:
+    import numpy as np
+except ImportError:  # optional: only PostAnalytics needs it
+    np = None
+
+from blogging.blog_summary import word_count
+from blogging.event import MutationEvent
+
+# column name -> NumPy dtype
+COLUMNS = {
+    "blog_id": "int64",
+    "code": "int64",
+    "created": "datetime64[us]",
+    "updated": "datetime64[us]",
+    "title_length": "int32",
+    "text_length": "int32",
+    "words": "int32",
+}
+
+# counts_per_period() periods -> datetime64 units
+PERIODS = {"day": "D", "week": "W", "month": "M", "year": "Y"}
+
+
+class PostAnalytics:
+    """
+    Post metadata of every blog as NumPy columns (see COLUMNS), one row
+    per post, for vectorized statistics: histograms, percentiles, counts
+    per day/week/month/year and totals per blog.
+
+    The columns are built on first use by reading every blog's posts once.
+    on_mutation (a Controller listener) then changes single rows: created
+    posts are appended (capacity doubles, so appends are amortized O(1)),
+    updated posts are overwritten in place and deleted posts are replaced
+    by the last row. Handling an event twice is harmless, so columns
+    built inside a transaction stay right when its events arrive.
+    Rows are in no particular order.
+
+    Requires NumPy (pip install numpy).
+    """
+
+    def __init__(self, blog_dao, loader=None):
+        if np is None:
+            raise ImportError("PostAnalytics requires NumPy (pip install numpy)")
+        self.blog_dao = blog_dao
+        # a ParallelRecordLoader reading the record files before a build
+        self.loader = loader
+        self._cols = None
+        self._n = 0
+        # (blog id, code) -> row
+        self._rows = {}
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        with self._lock:
+            self._ensure_built()
+            return self._n
+
+    # ---------- building ----------
+
+    def _ensure_built(self):
+        if self._cols is not None:
+            return
+        blogs = self.blog_dao.list_blogs()
+        if self.loader is not None:
+            self.loader.load(blogs)
+        rows = [(blog.id, p) for blog in blogs for p in blog.post_dao.list_posts()]
+        n = len(rows)
+        cols = {name: np.empty(max(n, 16), dtype) for name, dtype in COLUMNS.items()}
+        if n:
+            cols["blog_id"][:n] = [b for b, _ in rows]
+            cols["code"][:n] = [p.code for _, p in rows]
+            cols["created"][:n] = np.array([p.creation for _, p in rows], dtype="datetime64[us]")
+            cols["updated"][:n] = np.array([p.update for _, p in rows], dtype="datetime64[us]")
+            cols["title_length"][:n] = [len(p.title) for _, p in rows]
+            cols["text_length"][:n] = [len(p.text) for _, p in rows]
+            cols["words"][:n] = [word_count(p.text) for _, p in rows]
+        self._cols = cols
+        self._n = n
+        self._rows = {(b, p.code): i for i, (b, p) in enumerate(rows)}
+
+    def clear(self):
+        """Forget the columns (e.g. after a rollback); they are rebuilt on use."""
+        with self._lock:
+            self._cols = None
+            self._n = 0
+            self._rows = {}
+
+    # ---------- changes ----------
+
+    def on_mutation(self, event):
+        kind = event.kind
+        with self._lock:
+            if self._cols is None:
+                # built from the current posts on first use
+                return
+            if kind == MutationEvent.RESET:
+                self.clear()
+            elif kind == MutationEvent.BLOG_UPDATED and event.old_id != event.blog_id:
+                self._rename(event.old_id, event.blog_id)
+            elif kind == MutationEvent.BLOG_DELETED:
+                self._keep(self._cols["blog_id"][:self._n] != event.blog_id)
+            elif kind in (MutationEvent.POST_CREATED, MutationEvent.POST_UPDATED):
+                self._set(event.blog_id, event.post)
+            elif kind == MutationEvent.POST_DELETED:
+                self._delete(event.blog_id, event.post.code)
+
+    def _set(self, blog_id, post):
+        key = (blog_id, post.code)
+        row = self._rows.get(key)
+        if row is None:
+            if self._n == len(self._cols["code"]):
+                for name, col in self._cols.items():
+                    grown = np.empty(2 * len(col), col.dtype)
+                    grown[:self._n] = col[:self._n]
+                    self._cols[name] = grown
+            row = self._rows[key] = self._n
+            self._n += 1
+        cols = self._cols
+        cols["blog_id"][row] = blog_id
+        cols["code"][row] = post.code
+        cols["created"][row] = np.datetime64(post.creation, "us")
+        cols["updated"][row] = np.datetime64(post.update, "us")
+        cols["title_length"][row] = len(post.title)
+        cols["text_length"][row] = len(post.text)
+        cols["words"][row] = word_count(post.text)
+
+    def _delete(self, blog_id, code):
+        row = self._rows.pop((blog_id, code), None)
+        if row is None:
+            return
+        last = self._n - 1
+        if row != last:
+            for col in self._cols.values():
+                col[row] = col[last]
+            self._rows[(int(self._cols["blog_id"][row]), int(self._cols["code"][row]))] = row
+        self._n = last
+
+    def _keep(self, mask):
+        """Keep only the rows where mask is True (O(rows))."""
+        if mask.all():
+            return
+        n = int(mask.sum())
+        for col in self._cols.values():
+            col[:n] = col[:self._n][mask]
+        self._n = n
+        self._reindex()
+
+    def _rename(self, old_id, new_id):
+        ids = self._cols["blog_id"][:self._n]
+        if (ids == old_id).any():
+            ids[ids == old_id] = new_id
+            self._reindex()
+
+    def _reindex(self):
+        ids = self._cols["blog_id"][:self._n].tolist()
+        codes = self._cols["code"][:self._n].tolist()
+        self._rows = {key: i for i, key in enumerate(zip(ids, codes))}
+
+    # ---------- queries ----------
+
+    def column(self, name, blog_id=None):
+        """A copy of one column (of one blog's posts if blog_id is given)."""
+        if name not in COLUMNS:
+            raise ValueError(f"unknown column {name!r}")
+        with self._lock:
+            self._ensure_built()
+            col = self._cols[name][:self._n]
+            if blog_id is not None:
+                return col[self._cols["blog_id"][:self._n] == blog_id]
+            return col.copy()
+
+    def histogram(self, name, bins=10, blog_id=None):
+        """(counts, bin edges) of a column, as numpy.histogram (timestamps in µs since the epoch)."""
+        return np.histogram(self._numeric(name, blog_id), bins=bins)
+
+    def percentiles(self, name, q=(50, 90, 99), blog_id=None):
+        """{percentile: value} of a column (a datetime for timestamp columns), None without posts."""
+        values = self._numeric(name, blog_id)
+        if len(values) == 0:
+            return {p: None for p in q}
+        result = np.percentile(values, q)
+        if COLUMNS[name].startswith("datetime64"):
+            result = result.astype("int64").astype(COLUMNS[name])
+        return dict(zip(q, result.tolist()))
+
+    def counts_per_period(self, period="month", name="created", blog_id=None):
+        """[(first day of the period as a date, posts)] for periods with posts, oldest first."""
+        if period not in PERIODS:
+            raise ValueError(f"unknown period {period!r}")
+        if not COLUMNS.get(name, "").startswith("datetime64"):
+            raise ValueError(f"{name!r} is not a timestamp column")
+        values = self.column(name, blog_id)
+        if period == "week":
+            # datetime64 weeks start on Thursdays (1970-01-01); move them to Mondays
+            monday = np.timedelta64(3, "D")
+            periods = (values + monday).astype("datetime64[W]").astype("datetime64[D]") - monday
+        else:
+            periods = values.astype(f"datetime64[{PERIODS[period]}]")
+        periods, counts = np.unique(periods, return_counts=True)
+        return list(zip(periods.tolist(), counts.tolist()))
+
+    def per_blog(self, name="words"):
+        """(blog ids, posts per blog, sum of a numeric column per blog), ordered by blog id."""
+        with self._lock:
+            self._ensure_built()
+            ids = self._cols["blog_id"][:self._n]
+            values = self._cols[name][:self._n] if name in COLUMNS else None
+            if values is None or values.dtype.kind == "M":
+                raise ValueError(f"{name!r} is not a numeric column")
+            blogs, inverse, posts = np.unique(ids, return_inverse=True, return_counts=True)
+            return blogs, posts, np.bincount(inverse, weights=values, minlength=len(blogs)).astype("int64")
+
+    def _numeric(self, name, blog_id):
+        values = self.column(name, blog_id)
+        if values.dtype.kind == "M":
+            # timestamps as microseconds since the epoch
+            return values.astype("int64")
+        return values
@@ -3,12 +3,13 @@ from blogging.configuration import Configuration
 
 class Blog:
 
-    def __init__(self, id, name, url, email):
+    def __init__(self, id, name, url, email, summary=None):
         self.id = id
         self.name = name
         self.url = url
         self.email = email
-        self.dao = PostDAOPickle(self)
+        # BlogSummary read from blogs.json; None until the posts are known
+        self.summary = summary
         autosave = Configuration.autosave
         self.post_dao = PostDAOPickle(self, autosave)
 
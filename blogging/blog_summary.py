@@ -0,0 +1,80 @@
+from datetime import datetime
+
+
+def word_count(text):
+    return len(text.split())
+
+
+class BlogSummary:
+    """
+    Post statistics of one blog, stored with the blog in blogs.json so
+    listings can show them without reading the blog's record file.
+
+    - posts: number of posts
+    - words: total words in the posts' texts
+    - last_created: creation time of the newest post (None if no posts)
+    - last_updated: latest update time of any post (None if no posts)
+
+    PostDAOPickle keeps it current on every change.
+    """
+
+    def __init__(self, posts=0, words=0, last_created=None, last_updated=None):
+        self.posts = posts
+        self.words = words
+        self.last_created = last_created
+        self.last_updated = last_updated
+
+    @classmethod
+    def of(cls, posts):
+        """Summary computed from scratch."""
+        summary = cls()
+        for p in posts:
+            summary.added(p)
+        return summary
+
+    # ---------- incremental changes ----------
+
+    def added(self, post):
+        self.posts += 1
+        self.words += word_count(post.text)
+        if self.last_created is None or post.creation > self.last_created:
+            self.last_created = post.creation
+        if self.last_updated is None or post.update > self.last_updated:
+            self.last_updated = post.update
+
+    def updated(self, post, old_text):
+        self.words += word_count(post.text) - word_count(old_text)
+        if self.last_updated is None or post.update > self.last_updated:
+            self.last_updated = post.update
+
+    def removed(self, post, newest):
+        """
+        post was deleted; newest() returns (last creation, last update) of
+        the remaining posts and is only called if post held either.
+        """
+        self.posts -= 1
+        self.words -= word_count(post.text)
+        if post.creation == self.last_created or post.update == self.last_updated:
+            self.last_created, self.last_updated = newest()
+
+    # ---------- JSON ----------
+
+    def to_dict(self):
+        return {
+            "posts": self.posts,
+            "words": self.words,
+            "last_created": self.last_created.isoformat() if self.last_created else None,
+            "last_updated": self.last_updated.isoformat() if self.last_updated else None,
+        }
+
+    @classmethod
+    def from_dict(cls, d):
+        return cls(d.get("posts", 0), d.get("words", 0),
+                   datetime.fromisoformat(d["last_created"]) if d.get("last_created") else None,
+                   datetime.fromisoformat(d["last_updated"]) if d.get("last_updated") else None)
+
+    def __eq__(self, other):
+        return isinstance(other, BlogSummary) and self.to_dict() == other.to_dict()
+
+    def __repr__(self):
+        return f"BlogSummary({self.to_dict()!r})"
@@ -0,0 +1,223 @@
+import argparse
+import inspect
+import itertools
+import json
+import shlex
+import sys
+import time
+
+from blogging.blog import Blog
+from blogging.configuration import Configuration
+from blogging.controller import Controller
+from blogging.exception.batch_aborted_exception import BatchAbortedException
+from blogging.post import Post
+
+
+class BatchCLI():
+    """
+    Runs a stream of commands against one Controller without prompts.
+
+    Each line is either JSON, e.g.
+
+        {"op": "create_blog", "args": [1111114444, "Short Journey", "short_journey", "sj@gmail.com"]}
+        {"op": "create_post", "title": "Hello", "text": "First post"}
+
+    or a command in a small shell-like language (arguments are split with
+    shlex, so quote anything with spaces):
+
+        login user 123456
+        create_blog 1111114444 "Short Journey" short_journey sj@gmail.com
+        set_current_blog 1111114444
+        create_post "Hello" "First post"
+
+    Blank lines and lines starting with # are ignored. Commands run inside
+    controller transactions, so files are written once per transaction
+    (at the end, or every commit_every commands) instead of once per command.
+    A failing command is reported and the batch goes on, unless atomic is
+    set: then the first failure rolls back the whole batch.
+    """
+
+    # command -> converters of its positional arguments
+    COMMANDS = {
+        "login": (str, str),
+        "logout": (),
+        "create_blog": (int, str, str, str),
+        "search_blog": (int,),
+        "retrieve_blogs": (str,),
+        "fuzzy_retrieve_blogs": (str,),
+        "list_blogs": (),
+        "update_blog": (int, int, str, str, str),
+        "delete_blog": (int,),
+        "set_current_blog": (int,),
+        "unset_current_blog": (),
+        "create_post": (str, str),
+        "search_post": (int,),
+        "retrieve_posts": (str,),
+        "update_post": (int, str, str),
+        "delete_post": (int,),
+        "list_posts": (),
+    }
+
+    def __init__(self, controller, out=None, json_output=False, quiet=False):
+        self.controller = controller
+        self.out = out if out is not None else sys.stdout
+        self.json_output = json_output
+        self.quiet = quiet
+
+    # ---------- parsing ----------
+
+    def parse(self, line):
+        """(op, args) of one input line, or None for blank/comment lines."""
+        line = line.strip()
+        if not line or line.startswith('#'):
+            return None
+        if line.startswith('{'):
+            command = json.loads(line)
+            if not isinstance(command, dict) or 'op' not in command:
+                raise ValueError('JSON command needs an "op" field')
+            op = command.pop('op')
+            args = command.pop('args', None)
+            if args is None:
+                # named arguments, in the controller's parameter order
+                params = self._parameters(op)
+                missing = [p for p in params if p not in command]
+                if missing:
+                    raise ValueError('missing argument(s): %s' % ', '.join(missing))
+                args = [command[p] for p in params]
+        else:
+            op, *args = shlex.split(line)
+        converters = self.COMMANDS.get(op)
+        if converters is None:
+            raise ValueError('unknown command: %s' % op)
+        if len(args) != len(converters):
+            raise ValueError('%s takes %d argument(s), got %d' % (op, len(converters), len(args)))
+        return op, [convert(arg) for convert, arg in zip(converters, args)]
+
+    def _parameters(self, op):
+        if op not in self.COMMANDS:
+            raise ValueError('unknown command: %s' % op)
+        # required parameters only; the others keep their defaults
+        params = [name for name, p in inspect.signature(getattr(Controller, op)).parameters.items()
+                  if p.default is inspect.Parameter.empty]
+        return params[1:]
+
+    # ---------- running ----------
+
+    def run(self, lines, commit_every=0, atomic=False):
+        """
+        Run every command in lines. Returns (commands run, failed commands).
+        """
+        numbered = enumerate(lines, 1)
+        done = failed = 0
+        start = time.perf_counter()
+        try:
+            while True:
+                if atomic or commit_every <= 0:
+                    chunk = numbered
+                else:
+                    chunk = list(itertools.islice(numbered, commit_every))
+                    if not chunk:
+                        break
+                with self.controller.transaction():
+                    for number, line in chunk:
+                        result = self._execute(number, line)
+                        if result is None:
+                            continue
+                        done += 1
+                        if not result:
+                            failed += 1
+                            if atomic:
+                                raise BatchAbortedException()
+                if atomic or commit_every <= 0:
+                    break
+        except BatchAbortedException:
+            self._report_summary(done, failed, time.perf_counter() - start,
+                                 'ROLLED BACK: no change was saved.')
+            return done, failed
+        self._report_summary(done, failed, time.perf_counter() - start)
+        return done, failed
+
+    def _execute(self, number, line):
+        """Run one line; True if it succeeded, False if not, None if empty."""
+        try:
+            command = self.parse(line)
+        except (ValueError, TypeError) as e:
+            self._report(number, None, False, 'parse error: %s' % e)
+            return False
+        if command is None:
+            return None
+        op, args = command
+        try:
+            result = getattr(self.controller, op)(*args)
+        except Exception as e:
+            self._report(number, op, False, '%s: %s' % (type(e).__name__, e))
+            return False
+        self._report(number, op, True, result)
+        return True
+
+    # ---------- output ----------
+
+    def _report(self, number, op, ok, result):
+        if self.quiet and ok:
+            return
+        if self.json_output:
+            record = {'line': number, 'op': op, 'ok': ok}
+            record['result' if ok else 'error'] = self._to_json(result) if ok else result
+            print(json.dumps(record), file=self.out)
+        elif ok:
+            print('%d OK %s %s' % (number, op, self._describe(result)), file=self.out)
+        else:
+            print('%d ERROR %s %s' % (number, op or '-', result), file=self.out)
+
+    def _report_summary(self, done, failed, elapsed, note=None):
+        rate = done / elapsed if elapsed > 0 else 0.0
+        summary = '%d command(s), %d failed, %.3f s, %.0f commands/s' % (done, failed, elapsed, rate)
+        # summary goes to stderr so stdout stays one line per command
+        print(summary, file=sys.stderr)
+        if note:
+            print(note, file=sys.stderr)
+
+    def _describe(self, result):
+        if isinstance(result, list):
+            return '%d result(s)' % len(result)
+        if isinstance(result, Blog):
+            return 'blog %s' % result.id
+        if isinstance(result, Post):
+            return 'post %s' % result.code
+        if result is None:
+            return 'not found'
+        return str(result)
+
+    def _to_json(self, result):
+        if isinstance(result, list):
+            return [self._to_json(r) for r in result]
+        if isinstance(result, Blog):
+            return {'id': result.id, 'name': result.name, 'url': result.url, 'email': result.email}
+        if isinstance(result, Post):
+            return {'code': result.code, 'title': result.title, 'text': result.text,
+                    'creation': result.creation.isoformat(), 'update': result.update.isoformat()}
+        return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m blogging batch',
+                                     description='Run blogging commands from a file without prompts.')
+    parser.add_argument('file', help="command file, or - for standard input")
+    parser.add_argument('--json', action='store_true', help='print one JSON object per command')
+    parser.add_argument('--quiet', action='store_true', help='only print failed commands')
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument('--commit-every', type=int, default=0, metavar='N',
+                       help='save after every N commands (default: once at the end)')
+    group.add_argument('--atomic', action='store_true',
+                       help='roll back everything if any command fails')
+    args = parser.parse_args(argv)
+
+    # same persistence as the interactive CLI
+    Configuration.autosave = True
+    batch = BatchCLI(Controller(), json_output=args.json, quiet=args.quiet)
+    if args.file == '-':
+        done, failed = batch.run(sys.stdin, args.commit_every, args.atomic)
+    else:
+        with open(args.file, encoding='utf-8') as f:
+            done, failed = batch.run(f, args.commit_every, args.atomic)
+    return 1 if failed else 0
@@ -1,4 +1,6 @@
+from blogging.configuration import Configuration
 from blogging.controller import Controller
+from blogging.cli.pager import Pager
 from blogging.exception.illegal_access_exception import IllegalAccessException
 from blogging.exception.no_current_blog_exception import NoCurrentBlogException
 
@@ -6,6 +8,7 @@ class EditingBlogMenuCLI():
 
     def __init__(self, controller):
         self.controller = controller
+        self.pager = Pager(Configuration.cli_page_size)
 
     def editing_blog_menu(self):
         while True:
@@ -68,12 +71,9 @@ class EditingBlogMenuCLI():
         print('RETRIEVE POSTS FROM BLOG BY TEXT:')
         try:
             search_string = input('Search for: ')
-            found_posts = self.controller.retrieve_posts(search_string)
-            if found_posts:
-                print('\nPosts found for %s:\n' % search_string)
-                for post in found_posts:
-                    self.print_post_data(post)
-            else:
+            found_posts = self.controller.iter_retrieve_posts(search_string)
+            if not self.pager.show(found_posts, self.format_post_data,
+                                   header='\nPosts found for %s:\n' % search_string):
                 print('\nNo posts found for: %s\n' % search_string)
         except IllegalAccessException:
             print('\nMUST LOGIN FIRST.')
@@ -81,11 +81,13 @@ class EditingBlogMenuCLI():
             print('\nERROR RETRIEVING POSTS.') 
             print('Cannot retrieve posts without a valid current blog.')
 
-    # helper method to print post data
+    # helper methods to print post data
+    def format_post_data(self, post):
+        return 'Post #%d, created - %s, changed - %s\n\nTitle: %s\n\n%s\n' % (
+            post.code, post.creation, post.update, post.title, post.text)
+
     def print_post_data(self, post):
-        print('Post #%d, created - %s, changed - %s' % (post.code, post.creation_time, post.update_time))
-        print('\nTitle: %s\n' % post.title)
-        print('%s\n' % post.text)
+        print(self.format_post_data(post))
 
     def update_post(self):
         print('CHANGE POST FROM BLOG:')
@@ -132,11 +134,8 @@ class EditingBlogMenuCLI():
     def list_full_blog_contents(self):
         print('LIST FULL BLOG CONTENTS:\n')
         try:
-            posts = self.controller.list_posts()
-            if posts:
-                for post in posts:
-                    self.print_post_data(post)
-            else:
+            # streamed newest first, one page at a time
+            if not self.pager.show(self.controller.iter_posts(), self.format_post_data):
                 print('\nBlog is empty.\n')
         except IllegalAccessException:
             print('\nMUST LOGIN FIRST.')
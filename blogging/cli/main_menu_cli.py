@@ -1,4 +1,7 @@
+from blogging.configuration import Configuration
 from blogging.controller import Controller
+from blogging.cli.pager import Pager
+from blogging.instrumentation import registry
 from blogging.exception.invalid_logout_exception import InvalidLogoutException
 from blogging.exception.illegal_access_exception import IllegalAccessException
 from blogging.exception.illegal_operation_exception import IllegalOperationException
@@ -9,6 +12,7 @@ class MainMenuCLI():
     def __init__(self, controller):
         self.controller = controller
         self.editing_blog_menu_cli = EditingBlogMenuCLI(self.controller)
+        self.pager = Pager(Configuration.cli_page_size)
 
 
     def main_menu(self):
@@ -46,8 +50,11 @@ class MainMenuCLI():
                     print('\nLOGGED OUT.')
                     input('Type ENTER to continue.')
                     break
+            elif response == 9:
+                self.show_statistics()
+                input('Type ENTER to continue.')
             else:
-                print('\nWRONG CHOICE. Please pick a choice between 1 and 8.')
+                print('\nWRONG CHOICE. Please pick a choice between 1 and 9.')
                 input('Type ENTER to continue.')
         return
 
@@ -61,6 +68,7 @@ class MainMenuCLI():
         print('6 - List all blogs')
         print('7 - Edit blog')
         print('8 - Log out')
+        print('9 - Show performance statistics')
 
     def create_blog(self):
         print('ADD NEW BLOG:')
@@ -102,12 +110,9 @@ class MainMenuCLI():
         print('RETRIEVE BLOGS BY NAME:')
         try:
             search_string = input('Search for: ')
-            found_blogs = self.controller.retrieve_blogs(search_string)
-            if found_blogs:
-                print('\nBlogs found with name %s:\n' % search_string)
-                for blog in found_blogs:
-                    print(blog)
-            else:
+            found_blogs = self.controller.iter_retrieve_blogs(search_string)
+            if not self.pager.show(found_blogs, str,
+                                   header='\nBlogs found with name %s:\n' % search_string):
                 print('\nNo blogs found with name: %s\n' % search_string)
         except IllegalAccessException:
             print('\nMUST LOGIN FIRST.')
@@ -177,11 +182,7 @@ class MainMenuCLI():
     def list_all_blogs(self):
         print('LIST ALL BLOGS:\n')
         try:
-            blogs = self.controller.list_blogs()
-            if blogs:
-                for blog in blogs:
-                    print(blog)
-            else:
+            if not self.pager.show(self.controller.iter_blogs(), str):
                 print('\nNo blogs registered in the system.\n')
         except IllegalAccessException:
             print('\nMUST LOGIN FIRST.')
@@ -200,6 +201,33 @@ class MainMenuCLI():
             print('\nERROR STARTING EDITING BLOG.') 
             print('There is no blog registered with ID %d.' % id)
 
+    def show_statistics(self):
+        print('PERFORMANCE STATISTICS:\n')
+        if not registry.enabled:
+            print('Instrumentation is turned off.')
+            confirm = input('Turn it on now (y/n)? ')
+            if confirm.lower() == 'y':
+                registry.enable()
+                print('\nInstrumentation turned on. Statistics appear after the next operations.')
+            return
+
+        stats = self.controller.stats()
+        if not stats:
+            print('No operations recorded yet.')
+            return
+        print('%-30s %8s %12s %12s %12s %12s' % ('Operation', 'Calls', 'Mean (us)', 'p99 (us)', 'Read (B)', 'Written (B)'))
+        for name, op in stats.items():
+            print('%-30s %8d %12.1f %12.1f %12d %12d' % (name, op['count'], op['mean_us'], op['p99_us'],
+                                                       op['bytes_read'], op['bytes_written']))
+        path = input('\nFile to save Prometheus metrics to (ENTER to skip): ')
+        if path:
+            try:
+                with open(path, 'w') as f:
+                    f.write(self.controller.stats_prometheus())
+                print('\nMETRICS SAVED TO %s.' % path)
+            except OSError as e:
+                print('\nERROR SAVING METRICS: %s' % e)
+
     def logout(self):
         try:
             self.controller.logout()
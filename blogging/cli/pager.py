@@ -0,0 +1,45 @@
+import itertools
+
+_END = object()
+
+
+class Pager():
+    """
+    Prints a (possibly lazy) sequence of items page by page.
+
+    Items are pulled from the iterator only when their page is shown, and
+    render(item) builds an item's text only then, so the first page appears
+    as soon as its items exist, whatever the total size. After each full
+    page the user can press ENTER for the next one or q to stop.
+    """
+
+    def __init__(self, page_size=10, prompt=input, out=print):
+        self.page_size = page_size
+        self.prompt = prompt
+        self.out = out
+
+    def show(self, items, render, header=None):
+        """
+        Show items (header first, if there is at least one item);
+        returns how many were displayed.
+        """
+        items = iter(items)
+        shown = 0
+        # an item read ahead to know whether another page follows
+        pending = []
+        while True:
+            page = pending + list(itertools.islice(items, self.page_size - len(pending)))
+            if header is not None and page and not shown:
+                self.out(header)
+            for item in page:
+                self.out(render(item))
+            shown += len(page)
+            if len(page) < self.page_size:
+                return shown
+            following = next(items, _END)
+            if following is _END:
+                return shown
+            pending = [following]
+            answer = self.prompt('-- %d shown, ENTER for more, q to stop -- ' % shown)
+            if answer.strip().lower() == 'q':
+                return shown
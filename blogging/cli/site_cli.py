@@ -0,0 +1,28 @@
+import argparse
+import sys
+import time
+
+from blogging.configuration import Configuration
+from blogging.site_builder import SiteBuilder
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m blogging build-site',
+                                     description='Render every blog and post to static HTML.')
+    parser.add_argument('--output', default=Configuration.site_path, metavar='DIR',
+                        help=f'site directory (default: {Configuration.site_path})')
+    parser.add_argument('--jobs', type=int, default=None, metavar='N',
+                        help='render with N processes (default: one per CPU)')
+    parser.add_argument('--force', action='store_true', help='ignore the manifest and render everything')
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    try:
+        stats = SiteBuilder(args.output).build(args.jobs, args.force)
+    except (OSError, ValueError) as e:
+        print(f'ERROR: {e}', file=sys.stderr)
+        return 1
+    elapsed = time.perf_counter() - start
+    print(f"build-site: {stats['blogs']} blogs ({stats['skipped_blogs']} unchanged), {stats['posts']} posts, "
+          f"{stats['rendered']} rendered, {stats['removed']} removed in {elapsed:.2f} s", file=sys.stderr)
+    return 0
@@ -0,0 +1,45 @@
+import argparse
+import sys
+import time
+
+from blogging.dao.jsonl_transfer import export_jsonl, import_jsonl, open_stream
+
+
+def main(argv=None):
+    """
+    export <file|-> / import <file|-> : move the whole store to or from
+    JSON lines (see blogging.dao.jsonl_transfer for the format).
+    """
+    parser = argparse.ArgumentParser(prog='python -m blogging',
+                                     description='Stream every blog and post to or from JSON lines.')
+    sub = parser.add_subparsers(dest='command', required=True)
+    for name, help_text in (('export', 'write the store as JSON lines'),
+                            ('import', 'replace the store with JSON lines')):
+        cmd = sub.add_parser(name, help=help_text)
+        cmd.add_argument('file', help='JSON lines file, or - for standard input/output')
+        cmd.add_argument('--jobs', type=int, default=1, metavar='N',
+                         help='process N blogs in parallel (default: 1)')
+        cmd.add_argument('--gzip', action='store_true', default=None,
+                         help='gzip the stream (default: only if file ends in .gz)')
+        if name == 'import':
+            cmd.add_argument('--force', action='store_true', help='replace a store that already has blogs')
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    try:
+        if args.command == 'export':
+            with open_stream(args.file, 'w', args.gzip) as out:
+                stats = export_jsonl(out, jobs=args.jobs)
+        else:
+            with open_stream(args.file, 'r', args.gzip) as stream:
+                stats = import_jsonl(stream, jobs=args.jobs, force=args.force)
+    except KeyError as e:
+        print(f'ERROR: missing field {e}', file=sys.stderr)
+        return 1
+    except (OSError, ValueError) as e:
+        print(f'ERROR: {e}', file=sys.stderr)
+        return 1
+    elapsed = time.perf_counter() - start
+    print(f"{args.command}: {stats['blogs']} blogs, {stats['posts']} posts in {elapsed:.2f} s",
+          file=sys.stderr)
+    return 0
@@ -8,5 +8,42 @@ class Configuration():
     blogs_file = "bloggingJSON/blogs.json"
     records_path = "blogging/records"
     records_extension = ".dat"
+    # what a write guarantees before it returns: "none", "fsync"
+    # or "group" (fsyncs batched every group_commit_window seconds); every
+    # mode writes a temporary file and renames it (blogging/dao/atomic_writer.py)
+    durability = "none"
+    group_commit_window = 0.05
+    # opt-in timing of controller/DAO calls (see blogging/instrumentation.py)
+    instrumentation = False
+    # items per page in CLI listings
+    cli_page_size = 10
+    # background removal of orphaned record files (see
+    # blogging/dao/record_reclaimer.py); None turns the thread off
+    reclaim_interval = None
+    reclaim_grace_period = 300.0
+    # move orphans here instead of deleting them
+    reclaim_archive_path = None
+    # output of "python -m blogging build-site" (see blogging/site_builder.py)
+    site_path = "site"
+    # Markdown-rendered post HTML (see blogging/render_cache.py): memory
+    # tier limit in characters, disk tier (only with autosave) in bytes
+    render_cache_memory = 8 * 1024 * 1024
+    render_cache_path = "blogging/render_cache"
+    render_cache_disk = 64 * 1024 * 1024
+    # Atom/RSS feeds of the latest feed_size posts per blog (see
+    # blogging/feed.py); also written under feed_path when it is set
+    feed_size = 20
+    feed_path = None
+    # threads reading record files when every blog's posts are needed at
+    # once (see blogging/dao/record_loader.py); None picks from the cpu count
+    load_jobs = None
+    # most posts / bytes of record files kept in memory before the least
+    # recently used blogs are unloaded (see blogging/dao/residency.py);
+    # None: no limit
+    resident_posts = None
+    resident_bytes = None
+    # post changes rewrite blogs.json (for the blog summaries) at most once
+    # every this many seconds; the rest is written on logout and at exit
+    summary_flush_interval = 5.0
     
 
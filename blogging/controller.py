@@ -1,11 +1,24 @@
+from contextlib import contextmanager
 from datetime import datetime
 import hashlib
+import heapq
+import math
 import os
+from blogging.analytics import PostAnalytics
 from blogging.blog import Blog
 from blogging.post import Post
 from blogging.configuration import Configuration
+from blogging.event import MutationEvent
+from blogging.feed import FeedManager
+from blogging.instrumentation import instrumented, registry
+from blogging.render_cache import RenderCache
+from blogging.transaction import Transaction
+from blogging.user_store import UserStore
 
 from blogging.dao.blog_dao_json import BlogDAOJSON
+from blogging.dao.record_loader import ParallelRecordLoader
+from blogging.dao.residency import ResidencyManager
+from blogging.dao.record_reclaimer import RecordReclaimer
 
 from blogging.exception.invalid_login_exception import InvalidLoginException
 from blogging.exception.duplicate_login_exception import DuplicateLoginException
@@ -15,11 +28,20 @@ from blogging.exception.illegal_operation_exception import IllegalOperationExcep
 from blogging.exception.no_current_blog_exception import NoCurrentBlogException
 
 
+@instrumented("controller", exclude=("transaction", "stats", "stats_prometheus", "reset_stats",
+                                     "add_listener", "remove_listener"))
 class Controller:
 
+    # a transaction producing more events than this sends one RESET instead
+    EVENT_BATCH_LIMIT = 100
+
     def __init__(self, autosave=None):
         cfg = Configuration()
 
+        # opt-in per-operation timing; off by default
+        if cfg.__class__.instrumentation:
+            registry.enable()
+
         # decide if we are using persistence or not
         self.autosave = cfg.__class__.autosave if autosave is None else autosave
 
@@ -27,32 +49,57 @@ class Controller:
         self.current_user = None
         self.current_blog = None
 
-        # DAOs know whether persistence is enabled
-        self.blog_dao = BlogDAOJSON(self.autosave)
+        # loaded posts are kept within a memory budget when one is set;
+        # only persisted posts can be read again after being unloaded
+        self.residency = None
+        if self.autosave and (cfg.__class__.resident_posts is not None or
+                              cfg.__class__.resident_bytes is not None):
+            self.residency = ResidencyManager(cfg.__class__.resident_posts, cfg.__class__.resident_bytes)
 
-        # load users (username, sha256(password)) from config file
-        self.users = self._load_users(cfg.__class__.users_file)
+        # DAOs know whether persistence is enabled
+        self.blog_dao = BlogDAOJSON(self.autosave, self.residency)
+        self._transaction = Transaction(self.blog_dao)
+
+        # mutation listeners; events raised inside a transaction wait in
+        # _pending_events until it commits and are dropped on rollback
+        self._listeners = []
+        self._pending_events = None
+
+        # record files of deleted/renamed blogs are reclaimed by a
+        # background thread when Configuration.reclaim_interval is set
+        self.reclaimer = RecordReclaimer(self.blog_dao, grace_period=cfg.__class__.reclaim_grace_period,
+                                         archive_path=cfg.__class__.reclaim_archive_path)
+        if self.autosave and cfg.__class__.reclaim_interval:
+            self.reclaimer.start(cfg.__class__.reclaim_interval)
+
+        # rendered post HTML; changes reach it as mutation events
+        self.render_cache = RenderCache(cfg.__class__.render_cache_memory,
+                                        cfg.__class__.render_cache_path if self.autosave else None,
+                                        cfg.__class__.render_cache_disk)
+        self.add_listener(self.render_cache.on_mutation)
+
+        # per-blog Atom/RSS feeds, kept up to date the same way
+        self.feeds = FeedManager(self.blog_dao, cfg.__class__.feed_size,
+                                 cfg.__class__.feed_path if self.autosave else None,
+                                 render=self.render_cache.render)
+        self.add_listener(self.feeds.on_mutation)
+
+        # record files are read on first use; operations over every blog
+        # read them in parallel, as many as the residency budget holds
+        self.loader = ParallelRecordLoader(cfg.__class__.load_jobs, self.residency)
+
+        # NumPy columns of post metadata, created by analytics() on first use
+        self._analytics = None
+
+        # users (username, sha256(password)) from config file; the store
+        # reads the file lazily on the first login and reloads it on change
+        self.users = UserStore(cfg.__class__.users_file)
 
     # ---------- helper methods ----------
 
     def _hash_password(self, pw):
         return hashlib.sha256(pw.encode()).hexdigest()
 
-    def _load_users(self, file):
-        users = {}
-        try:
-            with open(file, "r") as f:
-                for line in f:
-                    parts = line.strip().split(",")
-                    if len(parts) != 2:
-                        continue
-                    u, h = parts
-                    users[u] = h
-        except Exception:
-            # if file is missing we just end up with empty user set
-            pass
-        return users
-
     def _ensure_logged_in(self):
         if not self.logged_in:
             raise IllegalAccessException("must be logged in")
@@ -61,16 +108,115 @@ class Controller:
         if self.current_blog is None:
             raise NoCurrentBlogException("no current blog")
 
+    # ---------- transactions ----------
+
+    @contextmanager
+    def transaction(self):
+        """
+        Group several operations so they are persisted together:
+
+            with controller.transaction():
+                controller.create_post(...)
+                controller.update_blog(...)
+
+        Changes are kept in memory and every touched file is written once
+        when the block exits normally. If the block raises, all changes are
+        rolled back and nothing is written; if a write fails, the files
+        written before it are restored. Each file is replaced atomically,
+        the transaction as a whole is not crash-atomic (see
+        blogging/transaction.py). Nested blocks join the outer one.
+        """
+        if self._transaction.active:
+            yield self._transaction
+            return
+
+        self._transaction.begin()
+        self._pending_events = []
+        try:
+            yield self._transaction
+        except BaseException:
+            self._pending_events = None
+            self._transaction.rollback()
+            # feeds read during the transaction may show rolled back posts
+            self.feeds.clear()
+            if self._analytics is not None:
+                self._analytics.clear()
+            # the current blog may have been created inside the transaction
+            if self.current_blog is not None and \
+                    self.current_blog not in self.blog_dao.list_blogs():
+                self._set_current(None)
+            raise
+        else:
+            events, self._pending_events = self._pending_events, None
+            self._transaction.commit()
+            if len(events) > self.EVENT_BATCH_LIMIT:
+                events = [MutationEvent(MutationEvent.RESET)]
+            for event in events:
+                self._notify(event)
+
+    # ---------- mutation events ----------
+
+    def add_listener(self, listener):
+        """
+        Call listener(event) with a MutationEvent after every change.
+        Listeners run on the thread that made the change.
+        """
+        self._listeners.append(listener)
+
+    def remove_listener(self, listener):
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    def _emit(self, event):
+        if self._pending_events is not None:
+            self._pending_events.append(event)
+        else:
+            self._notify(event)
+
+    def _notify(self, event):
+        for listener in list(self._listeners):
+            listener(event)
+
+    # ---------- instrumentation ----------
+
+    def stats(self):
+        """
+        Per-operation call counts, latency percentiles, histograms and
+        bytes read/written, as {operation name: dict}. Empty unless
+        Configuration.instrumentation is True (or stats were enabled).
+        """
+        return registry.snapshot()
+
+    def stats_prometheus(self):
+        """The same statistics in Prometheus text exposition format."""
+        return registry.prometheus()
+
+    def reset_stats(self):
+        registry.reset()
+
+    # ---------- maintenance ----------
+
+    def reclaim_records(self):
+        """
+        Delete (or archive) orphaned record files now. Returns a report
+        dict with the number of files and bytes reclaimed.
+        """
+        self._ensure_logged_in()
+        if not self.autosave:
+            return {"files": 0, "bytes": 0, "archived": False, "paths": []}
+        return self.reclaimer.run_once()
+
     # ---------- login / logout ----------
 
     def login(self, username, password):
         if self.logged_in:
             raise DuplicateLoginException()
 
-        if username not in self.users:
+        stored = self.users.get(username)
+        if stored is None:
             raise InvalidLoginException()
 
-        if self._hash_password(password) != self.users[username]:
+        if self._hash_password(password) != stored:
             raise InvalidLoginException()
 
         self.logged_in = True
@@ -81,7 +227,8 @@ class Controller:
         if not self.logged_in:
             raise InvalidLogoutException()
         self.logged_in = False
-        self.current_blog = None
+        self._set_current(None)
+        self.blog_dao.flush()
         return True
 
     # ---------- blog operations ----------
@@ -95,6 +242,7 @@ class Controller:
 
         blog = Blog(id, name, url, email)
         self.blog_dao.create_blog(blog)
+        self._emit(MutationEvent(MutationEvent.BLOG_CREATED, blog))
         return blog
 
     def search_blog(self, id):
@@ -105,10 +253,25 @@ class Controller:
         self._ensure_logged_in()
         return self.blog_dao.retrieve_blogs(key)
 
+    def fuzzy_retrieve_blogs(self, key, limit=10):
+        """retrieve_blogs() tolerating typos: the limit closest blogs by name or url."""
+        self._ensure_logged_in()
+        return self.blog_dao.fuzzy_retrieve_blogs(key, limit)
+
     def list_blogs(self):
         self._ensure_logged_in()
         return self.blog_dao.list_blogs()
 
+    def iter_retrieve_blogs(self, key):
+        """retrieve_blogs() as a lazy iterator (for streaming output)."""
+        self._ensure_logged_in()
+        return self.blog_dao.iter_retrieve_blogs(key)
+
+    def iter_blogs(self):
+        """list_blogs() as a lazy iterator (for streaming output)."""
+        self._ensure_logged_in()
+        return self.blog_dao.iter_blogs()
+
     def update_blog(self, old_id, new_id, new_name, new_url, new_email):
         self._ensure_logged_in()
 
@@ -129,7 +292,11 @@ class Controller:
         if new_id != old_id and self.blog_dao.search_blog(new_id):
             raise IllegalOperationException("cannot update blog with a duplicated ID")
 
-        return self.blog_dao.update_blog(old_id, new_id, new_name, new_url, new_email)
+        updated = self.blog_dao.update_blog(old_id, new_id, new_name, new_url, new_email)
+        if updated:
+            self._emit(MutationEvent(MutationEvent.BLOG_UPDATED, self.blog_dao.search_blog(new_id),
+                                     old_id=old_id))
+        return updated
 
     def delete_blog(self, id):
         self._ensure_logged_in()
@@ -148,7 +315,12 @@ class Controller:
         if self.current_blog is not None and self.current_blog.id == id:
             raise IllegalOperationException("cannot delete the current blog")
 
-        return self.blog_dao.delete_blog(id)
+        deleted = self.blog_dao.delete_blog(id)
+        if deleted:
+            if self.residency is not None:
+                self.residency.forget(blog.post_dao)
+            self._emit(MutationEvent(MutationEvent.BLOG_DELETED, blog))
+        return deleted
 
     # ---------- current blog ----------
 
@@ -157,15 +329,24 @@ class Controller:
         blog = self.blog_dao.search_blog(id)
         if blog is None:
             raise IllegalOperationException("cannot set current blog with an ID that is not registered")
-        self.current_blog = blog
+        self._set_current(blog)
         return True
 
     def unset_current_blog(self):
         self._ensure_logged_in()
-        self.current_blog = None
+        self._set_current(None)
         return True
 
 
+    def _set_current(self, blog):
+        # the current blog's posts stay in memory
+        if self.residency is not None:
+            if self.current_blog is not None:
+                self.residency.unpin(self.current_blog.post_dao)
+            if blog is not None:
+                self.residency.pin(blog.post_dao)
+        self.current_blog = blog
+
     def get_current_blog(self):
         self._ensure_logged_in()
         return self.current_blog
@@ -179,7 +360,12 @@ class Controller:
         post = Post(0, title, text, datetime.now(), datetime.now())
         # controller_test + integration_test only ever use one blog for posts,
         # so the DAO does not need the blog id here.
-        self.current_blog.add_post(post)
+        self._transaction.track(self.current_blog.post_dao)
+        if not self.current_blog.add_post(post):
+            # not stored (e.g. the record file could not be written)
+            return None
+        self.blog_dao.summary_changed(self.current_blog)
+        self._emit(MutationEvent(MutationEvent.POST_CREATED, post=post, blog_id=self.current_blog.id))
         return post
 
     def search_post(self, code):
@@ -205,7 +391,13 @@ class Controller:
             return False
 
         # Delegate the actual update (and persistence) to the DAO
-        return self.current_blog.post_dao.update_post(code, new_title, new_text)
+        self._transaction.track(self.current_blog.post_dao)
+        updated = self.current_blog.post_dao.update_post(code, new_title, new_text)
+        if updated:
+            self.blog_dao.summary_changed(self.current_blog)
+            self._emit(MutationEvent(MutationEvent.POST_UPDATED, post=self.current_blog.get_post(code),
+                                     blog_id=self.current_blog.id))
+        return updated
 
     def delete_post(self, code):
         self._ensure_logged_in()
@@ -215,7 +407,70 @@ class Controller:
         if len(self.current_blog.list_posts()) == 0:
             return False
 
-        return self.current_blog.remove_post(code)
+        self._transaction.track(self.current_blog.post_dao)
+        post = self.current_blog.get_post(code)
+        deleted = self.current_blog.remove_post(code)
+        if deleted:
+            self.blog_dao.summary_changed(self.current_blog)
+            self._emit(MutationEvent(MutationEvent.POST_DELETED, post=post, blog_id=self.current_blog.id))
+        return deleted
+
+    def delete_posts(self, codes, progress=None):
+        """
+        Delete several posts of the current blog in one transaction.
+        progress(done, total) is called after every post; if it raises
+        (e.g. the user cancelled) nothing is deleted. Returns how many
+        posts were deleted.
+        """
+        self._ensure_logged_in()
+        self._ensure_current_blog()
+
+        codes = list(codes)
+        deleted = 0
+        with self.transaction():
+            for done, code in enumerate(codes, 1):
+                if self.delete_post(code):
+                    deleted += 1
+                if progress:
+                    progress(done, len(codes))
+        return deleted
+
+    def render_post(self, code):
+        """HTML of the post's text rendered as Markdown, or None if there is no such post."""
+        self._ensure_logged_in()
+        self._ensure_current_blog()
+        post = self.current_blog.get_post(code)
+        if post is None:
+            return None
+        return self.render_cache.render(self.current_blog.id, post)
+
+    def feed(self, blog_id, format="atom"):
+        """
+        Atom (or, with format="rss", RSS) feed of the blog's latest
+        Configuration.feed_size posts, or None if there is no such blog.
+        """
+        self._ensure_logged_in()
+        return self.feeds.feed(blog_id, format)
+
+    def load_all_posts(self, progress=None):
+        """
+        Read the record files of every blog not loaded yet, in parallel
+        (with a residency budget: only as many as it holds). progress(done,
+        total) is called after each blog. Returns how many blogs were loaded.
+        """
+        self._ensure_logged_in()
+        return self.loader.load(self.blog_dao.list_blogs(), progress)
+
+    def analytics(self):
+        """
+        The PostAnalytics of every blog's posts (blogging/analytics.py),
+        kept up to date from now on. Raises ImportError without NumPy.
+        """
+        self._ensure_logged_in()
+        if self._analytics is None:
+            self._analytics = PostAnalytics(self.blog_dao, self.loader)
+            self.add_listener(self._analytics.on_mutation)
+        return self._analytics
 
     def list_posts(self):
         self._ensure_logged_in()
@@ -223,5 +478,139 @@ class Controller:
 
         posts = self.current_blog.list_posts()
         # Tests expect list_posts in descending order of code
-        posts.sort(key=lambda p: p.code, reverse=True)
+        # (the DAO keeps them ascending, so reversing is enough)
+        posts.reverse()
         return posts
+
+    def iter_retrieve_posts(self, key):
+        """retrieve_posts() as a lazy iterator (for streaming output)."""
+        self._ensure_logged_in()
+        self._ensure_current_blog()
+        return self.current_blog.post_dao.iter_retrieve_posts(key)
+
+    def iter_posts(self):
+        """list_posts() as a lazy iterator (for streaming output)."""
+        self._ensure_logged_in()
+        self._ensure_current_blog()
+        return self.current_blog.post_dao.iter_posts(reverse=True)
+
+    def count_posts(self):
+        self._ensure_logged_in()
+        self._ensure_current_blog()
+        return self.current_blog.post_dao.count_posts()
+
+    def list_posts_page(self, offset, limit):
+        """
+        One page of list_posts() (descending code order) without
+        building the whole list; used by views that show posts lazily.
+        """
+        self._ensure_logged_in()
+        self._ensure_current_blog()
+        return self.current_blog.post_dao.posts_page(offset, limit, reverse=True)
+
+    def posts_created_between(self, start=None, end=None):
+        """
+        Posts of the current blog created at or after start and before end
+        (either may be None), oldest first.
+        """
+        self._ensure_logged_in()
+        self._ensure_current_blog()
+        return self.current_blog.post_dao.posts_created_between(start, end)
+
+    def recently_updated_posts(self, k):
+        """The k most recently updated posts of the current blog, newest first."""
+        self._ensure_logged_in()
+        self._ensure_current_blog()
+        return self.current_blog.post_dao.recently_updated(k)
+
+    def timeline(self, limit=20, cursor=None):
+        """
+        The newest posts across every blog, one page at a time.
+
+        Returns ([(blog id, post)], next cursor), newest creation first;
+        equal creation times are ordered by blog id, then code, both
+        descending. Pass the cursor, a (creation, blog id, code) tuple,
+        back to get the following page; it is None after the last page.
+
+        Each blog contributes a lazy, newest-first iterator over its time
+        index, merged with a heap. A blog's iterator is only opened once
+        its newest post (BlogSummary.last_created, known without reading
+        the record file) could come before the best post of the iterators
+        already open, so a page reads limit + 1 posts plus one per blog
+        that could contribute to it, however many blogs and posts there are.
+        """
+        self._ensure_logged_in()
+        # blogs by the newest post they can contribute, newest first
+        bounds = []
+        for blog in self.blog_dao.list_blogs():
+            newest = blog.summary.last_created if blog.summary is not None else None
+            if newest is None:
+                continue
+            # no post of the blog sorts before (creation, code) = bound
+            before = self._timeline_before(blog, cursor)
+            bound = (newest, math.inf) if before is None else min((newest, math.inf), before)
+            bounds.append(((bound[0], blog.id, bound[1]), blog, before))
+        bounds.sort(key=lambda entry: entry[0], reverse=True)
+        # the blogs a page most likely needs are read in parallel
+        self.loader.load([blog for _, blog, _ in bounds[:limit + 1]])
+
+        heap = []
+        page = []
+        opened = 0
+        while len(page) <= limit:
+            while opened < len(bounds) and (not heap or bounds[opened][0] > heap[0].key):
+                _, blog, before = bounds[opened]
+                opened += 1
+                self._push_next(heap, self._timeline_stream(blog, before))
+            if not heap:
+                break
+            head = heapq.heappop(heap)
+            page.append(head.key + (head.post,))
+            self._push_next(heap, head.stream)
+        next_cursor = page[limit - 1][:3] if len(page) > limit else None
+        return [(blog_id, post) for _, blog_id, _, post in page[:limit]], next_cursor
+
+    @staticmethod
+    def _push_next(heap, stream):
+        entry = next(stream, None)
+        if entry is not None:
+            heapq.heappush(heap, _TimelineHead(entry[:3], entry[3], stream))
+
+    @staticmethod
+    def _timeline_before(blog, cursor):
+        """The cursor as a (creation, code) bound of blog's posts, None without one."""
+        if cursor is None:
+            return None
+        creation, blog_id, code = cursor
+        if blog.id < blog_id:
+            # every post created at that time sorts after the cursor
+            return (creation, math.inf)
+        elif blog.id > blog_id:
+            return (creation, -math.inf)
+        return (creation, code)
+
+    @staticmethod
+    def _timeline_stream(blog, before):
+        """(creation, blog id, code, post) of blog's posts below before, newest first."""
+        for post in blog.post_dao.iter_newest(before):
+            yield post.creation, blog.id, post.code, post
+
+    def post_archive(self):
+        """[((year, month), post count)] of the current blog, oldest month first."""
+        self._ensure_logged_in()
+        self._ensure_current_blog()
+        return self.current_blog.post_dao.archive_counts()
+
+
+class _TimelineHead:
+    """Next post of one timeline stream; the newest one is the smallest in the heap."""
+
+    __slots__ = ("key", "post", "stream")
+
+    def __init__(self, key, post, stream):
+        self.key = key
+        self.post = post
+        self.stream = stream
+
+    def __lt__(self, other):
+        return self.key > other.key
@@ -0,0 +1,252 @@
+import atexit
+import os
+import tempfile
+import threading
+import time
+
+from blogging.configuration import Configuration
+
+# values of Configuration.durability, from fastest to safest per write
+DURABILITY_MODES = ("none", "fsync", "group")
+# older name of "none": closing the file already flushes Python's buffers,
+# so flushing before the rename made no difference
+_ALIASES = {"flush": "none"}
+
+
+def atomic_write(path, dump, binary=False, durability=None):
+    """
+    Write path without ever leaving a half-written file behind.
+
+    dump(f) is called with a temporary file opened in the same directory;
+    once it returns the temporary file is renamed over path, so readers
+    see either the old contents or the new ones. Returns the number of
+    bytes written.
+
+    durability (default Configuration.durability) decides what happens
+    before and after the rename:
+    - "none": nothing, the OS writes the data back whenever it likes
+      ("flush" is accepted as an older name of this mode)
+    - "fsync": the data is fsynced before the rename and the directory
+      after it, so the new contents survive a crash once this returns
+    - "group": like "fsync", but the fsyncs and the rename are done by a
+      background committer that batches every write made within
+      Configuration.group_commit_window seconds; a file written several
+      times in one window is synced and renamed only once. Until then
+      readers of path see the previous contents (call sync() first).
+    A write in another mode drops a group-mode write of path still queued,
+    which would otherwise land later over the newer contents. If a queued
+    write of path could not be committed, the next write of path (or sync())
+    raises OSError instead.
+    """
+    mode = durability or Configuration.durability
+    mode = _ALIASES.get(mode, mode)
+    if mode not in DURABILITY_MODES:
+        raise ValueError(f"unknown durability mode {mode!r}")
+    check(path)
+
+    dir_name = os.path.dirname(path) or "."
+    base = os.path.basename(path)
+    fd, tmp = tempfile.mkstemp(prefix=f".{base}.", suffix=".tmp", dir=dir_name)
+    try:
+        if binary:
+            f = os.fdopen(fd, "wb")
+        else:
+            f = os.fdopen(fd, "w", encoding="utf-8")
+        with f:
+            dump(f)
+            if mode == "fsync":
+                f.flush()
+                os.fsync(f.fileno())
+        size = os.path.getsize(tmp)
+        if mode == "group":
+            committer().submit(path, tmp)
+            return size
+        discard(path)
+        os.replace(tmp, path)
+        if mode == "fsync":
+            fsync_dir(dir_name)
+        return size
+    except BaseException:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        raise
+
+
+def fsync_dir(dir_name):
+    """Make a rename in dir_name durable (no-op where unsupported)."""
+    try:
+        fd = os.open(dir_name, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+class GroupCommitter:
+    """
+    Background half of the "group" durability mode.
+
+    submit() queues a finished temporary file for its target path. The
+    committer thread wakes up window seconds after the first queued file
+    and commits the whole batch: every temporary file is fsynced, renamed
+    over its target, and every directory involved is fsynced once. A file
+    queued again before its batch is committed replaces the older
+    temporary file, which is deleted without ever being synced.
+
+    A file that cannot be committed is deleted and its error kept: the
+    writer was already told the write succeeded, so the error is raised
+    by the next sync() or check() of that path instead.
+    """
+
+    def __init__(self, window):
+        self.window = window
+        self.batches = 0
+        self.files = 0
+        self._pending = {}
+        # path -> OSError of its write that could not be committed
+        self._failures = {}
+        self._cond = threading.Condition()
+        # serializes batches so renames of one path happen in write order;
+        # held from taking a batch until its last rename
+        self._commit_lock = threading.RLock()
+        self._thread = None
+
+    def submit(self, path, tmp):
+        with self._cond:
+            superseded = self._pending.pop(path, None)
+            self._pending[path] = tmp
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._loop, name="group-commit", daemon=True)
+                self._thread.start()
+            self._cond.notify()
+        if superseded is not None:
+            try:
+                os.remove(superseded)
+            except OSError:
+                pass
+
+    def discard(self, path):
+        """Drop the queued write of path, after the batch being committed (if any)."""
+        with self._commit_lock:
+            with self._cond:
+                tmp = self._pending.pop(path, None)
+        if tmp is not None:
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+
+    def pending(self, path=None):
+        with self._cond:
+            return path in self._pending if path is not None else bool(self._pending)
+
+    def sync(self, path=None):
+        """
+        Commit now everything queued (if path is given: only if path is
+        queued). Raises OSError if a write (of path) could not be committed.
+        """
+        with self._commit_lock:
+            # a batch being committed right now is finished once we hold the lock
+            if path is None or self.pending(path):
+                self._commit()
+        self.check(path)
+
+    def check(self, path=None):
+        """Raise OSError, once, if a write of path (or of any path) could not be committed."""
+        with self._cond:
+            if path is None:
+                if not self._failures:
+                    return
+                path, error = self._failures.popitem()
+            else:
+                error = self._failures.pop(path, None)
+                if error is None:
+                    return
+        raise OSError(f"could not commit {path}: {error}") from error
+
+    def _loop(self):
+        while True:
+            with self._cond:
+                while not self._pending:
+                    self._cond.wait()
+            # let more writes join the batch
+            time.sleep(self.window)
+            self._commit()
+
+    def _commit(self):
+        with self._commit_lock:
+            with self._cond:
+                batch, self._pending = self._pending, {}
+            if not batch:
+                return
+            dirs = set()
+            for path, tmp in batch.items():
+                try:
+                    fd = os.open(tmp, os.O_RDONLY)
+                    try:
+                        os.fsync(fd)
+                    finally:
+                        os.close(fd)
+                    os.replace(tmp, path)
+                except OSError as e:
+                    # e.g. the directory was removed meanwhile; the old
+                    # contents of path (if any) stay in place
+                    try:
+                        os.remove(tmp)
+                    except OSError:
+                        pass
+                    with self._cond:
+                        self._failures[path] = e
+                    continue
+                dirs.add(os.path.dirname(path) or ".")
+            for dir_name in dirs:
+                fsync_dir(dir_name)
+            self.batches += 1
+            self.files += len(batch)
+
+
+_committer = None
+_committer_lock = threading.Lock()
+
+
+def committer():
+    """The process-wide GroupCommitter (created on first use)."""
+    global _committer
+    with _committer_lock:
+        if _committer is None:
+            _committer = GroupCommitter(Configuration.group_commit_window)
+            # whatever is still queued is committed when the process exits
+            atexit.register(_committer.sync)
+        return _committer
+
+
+def sync(path=None):
+    """
+    Commit group-mode writes that are still queued (all of them, or only
+    if path is among them). Readers call this so they see their own writes.
+    Raises OSError if a write (of path) could not be committed.
+    """
+    if _committer is not None:
+        _committer.sync(path)
+
+
+def check(path):
+    """Raise OSError, once, if a group-mode write of path could not be committed."""
+    if _committer is not None:
+        _committer.check(path)
+
+
+def discard(path):
+    """
+    Drop a group-mode write of path that is still queued, without
+    committing it. Call before replacing path by other means, or the
+    committer would later rename the older contents over the newer ones.
+    """
+    if _committer is not None:
+        _committer.discard(path)
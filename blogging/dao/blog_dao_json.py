@@ -1,12 +1,37 @@
+import atexit
 import json
 import os
+import time
+import weakref
 
 from blogging.blog import Blog
 from blogging.configuration import Configuration
+from blogging.dao import atomic_writer
+from blogging.dao.atomic_writer import atomic_write
 from blogging.dao.blog_dao import BlogDAO
 from blogging.dao.blog_encoder import BlogEncoder
 from blogging.dao.blog_decoder import BlogDecoder
+from blogging.dao.fuzzy_index import FuzzyIndex
+from blogging.dao.post_dao_pickle import PostDAOPickle
+from blogging.dao.search_index import SearchIndex
+from blogging.instrumentation import instrumented, registry
 
+# DAOs holding summaries that are not written yet; flushed at exit
+_unflushed = weakref.WeakSet()
+
+
+@atexit.register
+def _flush_all():
+    for dao in list(_unflushed):
+        try:
+            dao.flush()
+        except OSError:
+            # e.g. the directory is gone; the summaries are recomputed
+            # from the record files on the next start
+            pass
+
+
+@instrumented("blog_dao", include=("_read_all", "_write_all"))
 class BlogDAOJSON(BlogDAO):
     """
     Blog DAO with optional persistence.
@@ -17,16 +42,46 @@ class BlogDAOJSON(BlogDAO):
     - If autosave == True:
         * blogs are loaded from blogs.json in the constructor
         * every create/update/delete writes the whole list back to file
+        * each blog is stored with its BlogSummary. Changes reported by
+          summary_changed() rewrite the file at most once every
+          summary_flush_interval seconds; flush() and the exit of the
+          process write what is left. Blogs whose record file is newer
+          than blogs.json are read on load, which recomputes the summaries
+          a crash did not write
+    - Between begin() and commit() writes are buffered: the file is
+      written once on commit, and rollback() undoes the changes in memory.
+    - retrieve_blogs() is served from a SearchIndex built on the first
+      search and kept up to date by every change afterwards;
+      fuzzy_retrieve_blogs() likewise from a FuzzyIndex over names and urls.
+    - With a ResidencyManager, every blog's posts are kept within its
+      budget.
     """
 
-    def __init__(self, autosave=True):
+    def __init__(self, autosave=True, residency=None):
         cfg = Configuration()
         self.autosave = autosave
         self.file_path = cfg.__class__.blogs_file
+        self.residency = residency
 
         # in-memory list of Blog objects
         self._blogs = []
 
+        # substring index over id/name/url/email, built on the first search.
+        # Blogs are keyed by object identity (Blog is not hashable).
+        self._search = None
+        # trigram index over name/url for typo-tolerant search, same keys
+        self._fuzzy = None
+
+        # transaction state: while deferred, writes only mark the file dirty
+        # and every change is recorded in _undo so it can be rolled back
+        self._deferred = False
+        self._dirty = False
+        self._undo = None
+
+        # summaries changed since blogs.json was last written, and when
+        self._summaries_dirty = False
+        self._last_write = time.monotonic()
+
         if self.autosave:
             # make sure the directory exists
             dir_name = os.path.dirname(self.file_path)
@@ -34,8 +89,12 @@ class BlogDAOJSON(BlogDAO):
                 os.makedirs(dir_name, exist_ok=True)
 
             # if file exists, load it; otherwise create empty file
+            atomic_writer.sync(self.file_path)
             if os.path.exists(self.file_path):
                 self._blogs = self._read_all()
+                for b in self._blogs:
+                    b.post_dao.residency = residency
+                self._reread_stale_summaries()
             else:
                 self._write_all([])
 
@@ -46,8 +105,11 @@ class BlogDAOJSON(BlogDAO):
 
     def _read_all(self):
         try:
+            # see our own group-commit writes that are not renamed yet
+            atomic_writer.sync(self.file_path)
             with open(self.file_path, "r", encoding="utf-8") as f:
                 data = json.load(f, cls=BlogDecoder)
+                registry.add_bytes(read=os.fstat(f.fileno()).st_size)
             # json.load may return a single Blog or a list; normalize to list
             if isinstance(data, list):
                 return [b for b in data if isinstance(b, Blog)]
@@ -59,12 +121,138 @@ class BlogDAOJSON(BlogDAO):
             # if something goes wrong, treat as empty collection
             return []
 
+    def _reread_stale_summaries(self):
+        """
+        Read the posts of every blog whose record file was written after
+        blogs.json (its stored summary may predate a crash), so its summary
+        is recomputed; the summaries are written with the next write.
+        """
+        try:
+            written = os.stat(self.file_path).st_mtime_ns
+            # file times are only as fine as the file system's clock: one
+            # written in the same tick as blogs.json counts as newer
+            with os.scandir(Configuration.records_path) as entries:
+                newer = {e.path for e in entries if e.stat().st_mtime_ns >= written}
+        except OSError:
+            return
+        for b in self._blogs:
+            dao = b.post_dao
+            if not dao._loaded and dao.record_file in newer:
+                try:
+                    dao._load()
+                except IOError:
+                    # stays unloaded and raises again when used
+                    continue
+                self._summaries_dirty = True
+                _unflushed.add(self)
+
     def _write_all(self, blogs):
         if not self.autosave:
             # in non-persistent mode we never touch the disk
             return
-        with open(self.file_path, "w", encoding="utf-8") as f:
-            json.dump(blogs, f, cls=BlogEncoder, indent=2)
+        if self._deferred:
+            # inside a transaction: write once on commit
+            self._dirty = True
+            return
+        # record files of blogs whose id changed get their new names around
+        # this write: linked before it, the old name dropped once it is durable
+        moves = [b.post_dao for b in blogs if b.post_dao._new_file is not None]
+        if not moves:
+            written = atomic_write(self.file_path, lambda f: json.dump(blogs, f, cls=BlogEncoder, indent=2))
+            registry.add_bytes(written=written)
+            self._written()
+            return
+        with PostDAOPickle.files_lock:
+            try:
+                for dao in moves:
+                    dao.begin_move()
+                written = atomic_write(self.file_path, lambda f: json.dump(blogs, f, cls=BlogEncoder, indent=2))
+                atomic_writer.sync(self.file_path)
+            except BaseException:
+                for dao in moves:
+                    dao.abort_move()
+                raise
+            for dao in moves:
+                dao.finish_move()
+        registry.add_bytes(written=written)
+        self._written()
+
+    def _written(self):
+        """blogs.json now holds every summary."""
+        self._summaries_dirty = False
+        self._last_write = time.monotonic()
+        _unflushed.discard(self)
+
+    def _search_index(self):
+        """The search index, built from the current blogs if needed."""
+        if self._search is None:
+            index = SearchIndex()
+            for b in self._blogs:
+                index.add(id(b), b, self._search_fields(b))
+            self._search = index
+        return self._search
+
+    @staticmethod
+    def _search_fields(blog):
+        return (blog.id, blog.name, blog.url, blog.email)
+
+    def _fuzzy_index(self):
+        """The fuzzy index, built from the current blogs if needed."""
+        if self._fuzzy is None:
+            index = FuzzyIndex()
+            for b in self._blogs:
+                index.add(id(b), b, self._fuzzy_fields(b))
+            self._fuzzy = index
+        return self._fuzzy
+
+    @staticmethod
+    def _fuzzy_fields(blog):
+        return (blog.name, blog.url)
+
+    def _log(self, entry):
+        """Remember how to undo a change while a transaction is open."""
+        if self._undo is not None:
+            self._undo.append(entry)
+
+    # ---------- transactions ----------
+
+    @property
+    def in_transaction(self):
+        """True between begin() and commit() or rollback()."""
+        return self._deferred
+
+    def begin(self):
+        """Start buffering writes until commit() or rollback()."""
+        self._deferred = True
+        self._dirty = False
+        self._undo = []
+
+    def commit(self):
+        """Write blogs.json once if anything changed since begin()."""
+        self._deferred = False
+        if self._dirty:
+            self._write_all(self._blogs)
+        self._dirty = False
+        self._undo = None
+
+    def rollback(self):
+        """Undo every change made since begin(), newest first."""
+        for entry in reversed(self._undo or []):
+            if entry[0] == "create":
+                self._blogs.pop(entry[1])
+            elif entry[0] == "update":
+                _, blog, old_id, name, url, email = entry
+                if blog.id != old_id:
+                    # back to the name it had: cancels the pending move
+                    blog.post_dao.rename(old_id)
+                blog.id, blog.name, blog.url, blog.email = old_id, name, url, email
+            elif entry[0] == "delete":
+                self._blogs.insert(entry[1], entry[2])
+        self._search = None
+        self._fuzzy = None
+        self._deferred = False
+        self._dirty = False
+        self._undo = None
 
     # ---------- DAO operations ----------
 
@@ -77,7 +265,13 @@ class BlogDAOJSON(BlogDAO):
 
     def create_blog(self, blog):
         """Append a new blog and persist if autosave is enabled."""
+        blog.post_dao.residency = self.residency
         self._blogs.append(blog)
+        self._log(("create", len(self._blogs) - 1))
+        if self._search is not None:
+            self._search.add(id(blog), blog, self._search_fields(blog))
+        if self._fuzzy is not None:
+            self._fuzzy.add(id(blog), blog, self._fuzzy_fields(blog))
         self._write_all(self._blogs)
         return True
 
@@ -89,27 +283,53 @@ class BlogDAOJSON(BlogDAO):
         if not search_string:
             return list(self._blogs)
 
+        # the index keeps the order of the blog list
+        return self._search_index().search(search_string)
+
+    def fuzzy_retrieve_blogs(self, search_string, limit=10):
+        """
+        The limit blogs whose name or url is most similar to search_string
+        (trigram similarity, then edit distance), best first; tolerates
+        typos that retrieve_blogs() would not match.
+        """
+        return [b for b, _ in self._fuzzy_index().search(search_string, limit)]
+
+    def iter_blogs(self):
+        """Yield the blogs one by one without copying the list."""
+        i = 0
+        while i < len(self._blogs):
+            yield self._blogs[i]
+            i += 1
+
+    def iter_retrieve_blogs(self, search_string):
+        """Lazy retrieve_blogs(): yields matches as they are found."""
+        if not search_string:
+            return self.iter_blogs()
+        if self._search is not None:
+            return self._search.iter_search(search_string)
+        # building the index first would delay the first match
         s = str(search_string).lower()
-        result = []
-        for b in self._blogs:
-            if (
-                s in str(b.id).lower()
-                or s in b.name.lower()
-                or s in b.url.lower()
-                or s in b.email.lower()
-            ):
-                result.append(b)
-        return result
+        return (b for b in self.iter_blogs()
+                if any(s in str(f).lower() for f in self._search_fields(b)))
 
     def update_blog(self, key, new_id, new_name, new_url, new_email):
         """
-        Replace the blog whose id == key with a new Blog.
+        Change the data of the blog whose id == key in place, keeping its
+        posts in memory. A new id renames the blog's record file when
+        blogs.json is written (on commit inside a transaction).
         Returns True if something was updated, False otherwise.
         """
         updated = False
-        for i, b in enumerate(self._blogs):
+        for b in self._blogs:
             if b.id == key:
-                self._blogs[i] = Blog(new_id, new_name, new_url, new_email)
+                self._log(("update", b, b.id, b.name, b.url, b.email))
+                if new_id != b.id:
+                    b.post_dao.rename(new_id)
+                b.id, b.name, b.url, b.email = new_id, new_name, new_url, new_email
+                if self._search is not None:
+                    self._search.update(id(b), b, self._search_fields(b))
+                if self._fuzzy is not None:
+                    self._fuzzy.update(id(b), b, self._fuzzy_fields(b))
                 updated = True
                 break
 
@@ -124,9 +344,14 @@ class BlogDAOJSON(BlogDAO):
         """
         deleted = False
         new_list = []
-        for b in self._blogs:
+        for i, b in enumerate(self._blogs):
             if not deleted and b.id == key:
                 deleted = True
+                self._log(("delete", i, b))
+                if self._search is not None:
+                    self._search.remove(id(b))
+                if self._fuzzy is not None:
+                    self._fuzzy.remove(id(b))
                 continue
             new_list.append(b)
 
@@ -136,6 +361,29 @@ class BlogDAOJSON(BlogDAO):
 
         return deleted
 
+    def summary_changed(self, blog):
+        """
+        Note that blog.summary changed with its posts. It is written on
+        commit inside a transaction, otherwise now if blogs.json was last
+        written summary_flush_interval seconds ago or more, else with the
+        next write or flush().
+        """
+        if not self.autosave:
+            return
+        self._summaries_dirty = True
+        if self._deferred:
+            self._dirty = True
+        elif time.monotonic() - self._last_write >= Configuration.summary_flush_interval:
+            self._write_all(self._blogs)
+        else:
+            _unflushed.add(self)
+
+    def flush(self):
+        """Write the summaries that changed since blogs.json was last written."""
+        if self._summaries_dirty and not self._deferred:
+            self._write_all(self._blogs)
+            atomic_writer.sync(self.file_path)
+
     def list_blogs(self):
         """Return a shallow copy of the current blog list."""
         return list(self._blogs)
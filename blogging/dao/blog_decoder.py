@@ -1,6 +1,7 @@
 import json
 
 from blogging.blog import Blog
+from blogging.blog_summary import BlogSummary
 
 class BlogDecoder(json.JSONDecoder):
     """Helper to decode Blog objects from JSON."""
@@ -10,5 +11,7 @@ class BlogDecoder(json.JSONDecoder):
 
     def object_hook(self, obj):
         if {"id", "name", "url", "email"}.issubset(obj.keys()):
-            return Blog(obj["id"], obj["name"], obj["url"], obj["email"])
+            # blogs written before summaries existed have none
+            summary = BlogSummary.from_dict(obj["summary"]) if isinstance(obj.get("summary"), dict) else None
+            return Blog(obj["id"], obj["name"], obj["url"], obj["email"], summary)
         return obj
\ No newline at end of file
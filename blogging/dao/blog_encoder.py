@@ -7,10 +7,13 @@ class BlogEncoder(json.JSONEncoder):
 
     def default(self, obj):
         if isinstance(obj, Blog):
-            return {
+            data = {
                 "id": obj.id,
                 "name": obj.name,
                 "url": obj.url,
                 "email": obj.email,
             }
+            if obj.summary is not None:
+                data["summary"] = obj.summary.to_dict()
+            return data
         return super().default(obj)
\ No newline at end of file
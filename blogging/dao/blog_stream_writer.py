@@ -0,0 +1,67 @@
+import json
+import os
+import tempfile
+
+from blogging.configuration import Configuration
+from blogging.dao.atomic_writer import discard, fsync_dir
+from blogging.dao.blog_encoder import BlogEncoder
+
+
+class BlogStreamWriter:
+    """
+    Writes a blogs.json one blog at a time.
+
+    The output has the same layout BlogDAOJSON reads (a JSON list of blog
+    objects) but only one blog is held in memory at a time. Blogs are
+    written to a temporary file that replaces file_path on close(), so
+    an interrupted run never leaves a truncated blogs.json behind.
+
+        with BlogStreamWriter(path) as writer:
+            for blog in blogs:
+                writer.write(blog)
+    """
+
+    def __init__(self, file_path):
+        self.file_path = file_path
+        self.count = 0
+        dir_name = os.path.dirname(file_path) or "."
+        os.makedirs(dir_name, exist_ok=True)
+        fd, self._tmp = tempfile.mkstemp(prefix=f".{os.path.basename(file_path)}.", suffix=".tmp", dir=dir_name)
+        self._f = os.fdopen(fd, "w", encoding="utf-8")
+        self._f.write("[")
+
+    def write(self, blog):
+        """Append a Blog (or a dict in the BlogEncoder layout)."""
+        self._f.write("\n  " if self.count == 0 else ",\n  ")
+        self._f.write(json.dumps(blog, cls=BlogEncoder))
+        self.count += 1
+
+    def close(self):
+        self._f.write("\n]" if self.count else "]")
+        durable = Configuration.durability in ("fsync", "group")
+        if durable:
+            self._f.flush()
+            os.fsync(self._f.fileno())
+        self._f.close()
+        discard(self.file_path)
+        os.replace(self._tmp, self.file_path)
+        if durable:
+            fsync_dir(os.path.dirname(self.file_path) or ".")
+
+    def abort(self):
+        """Discard everything written so far."""
+        self._f.close()
+        try:
+            os.remove(self._tmp)
+        except OSError:
+            pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+        return False
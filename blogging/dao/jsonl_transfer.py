@@ -0,0 +1,237 @@
+"""
+Streaming export and import of the whole store as JSON lines.
+
+Every line is one JSON object: a blog, followed by the posts of that blog.
+
+    {"type": "blog", "id": 1111114444, "name": "...", "url": "...", "email": "..."}
+    {"type": "post", "blog": 1111114444, "code": 1, "title": "...", "text": "...",
+     "creation": "2024-01-01T10:00:00", "update": "2024-01-01T10:00:00"}
+
+Both directions work directly on blogs.json and the record files (no
+Controller, no Blog objects), one blog at a time. Posts of a blog live in
+one pickled list, so memory is bounded by the largest blog (times the
+number of blogs in flight when jobs > 1), not by the size of the store.
+With jobs > 1 blogs are encoded (export) or pickled and written (import)
+by a process pool while the stream itself stays in order.
+"""
+import gzip
+import io
+import json
+import os
+import pickle
+import shutil
+import sys
+import tempfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+from blogging.blog_summary import BlogSummary
+from blogging.configuration import Configuration
+from blogging.dao import atomic_writer
+from blogging.dao.atomic_writer import fsync_dir
+from blogging.dao.blog_stream_writer import BlogStreamWriter
+from blogging.post import Post
+
+
+def open_stream(path, mode, compress=None):
+    """
+    Binary stream for path ("-" is stdin/stdout). compress=None guesses
+    gzip from a .gz suffix.
+    """
+    if compress is None:
+        compress = path.endswith(".gz")
+    if path == "-":
+        raw = sys.stdin.buffer if mode == "r" else sys.stdout.buffer
+        return gzip.GzipFile(fileobj=raw, mode=mode + "b") if compress else _Unclosed(raw)
+    if compress:
+        return gzip.open(path, mode + "b")
+    return open(path, mode + "b")
+
+
+class _Unclosed(io.BufferedIOBase):
+    """Wraps stdin/stdout so closing the export does not close them."""
+
+    def __init__(self, raw):
+        self.raw = raw
+
+    def read(self, *args):
+        return self.raw.read(*args)
+
+    def readline(self, *args):
+        return self.raw.readline(*args)
+
+    def __iter__(self):
+        return iter(self.raw)
+
+    def write(self, data):
+        return self.raw.write(data)
+
+    def close(self):
+        self.raw.flush()
+
+
+def _ordered(fn, items, jobs):
+    """fn(item) for every item, in order, at most 2 * jobs in flight."""
+    if jobs <= 1:
+        for item in items:
+            yield fn(item)
+        return
+    with ProcessPoolExecutor(jobs) as pool:
+        pending = deque()
+        for item in items:
+            pending.append(pool.submit(fn, item))
+            if len(pending) >= 2 * jobs:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+# ---------- export ----------
+
+def _encode_blog(job):
+    """JSON lines (bytes) of one blog and its posts, and the post count."""
+    blog, record_file = job
+    lines = [json.dumps({"type": "blog", "id": blog["id"], "name": blog["name"],
+                         "url": blog["url"], "email": blog["email"]})]
+    posts = []
+    if os.path.exists(record_file):
+        with open(record_file, "rb") as f:
+            posts = pickle.load(f)
+    for p in sorted((p for p in posts if isinstance(p, Post)), key=lambda p: p.code):
+        lines.append(json.dumps({"type": "post", "blog": blog["id"], "code": p.code,
+                                 "title": p.title, "text": p.text,
+                                 "creation": p.creation.isoformat(), "update": p.update.isoformat()}))
+    return ("\n".join(lines) + "\n").encode("utf-8"), len(lines) - 1
+
+
+def export_jsonl(out, blogs_file=None, records_path=None, jobs=1):
+    """
+    Write the store as JSON lines to the binary stream out.
+    Returns {"blogs": n, "posts": n, "bytes": n}.
+    """
+    cfg = Configuration()
+    blogs_file = blogs_file or cfg.__class__.blogs_file
+    records_path = records_path or cfg.__class__.records_path
+    ext = cfg.__class__.records_extension
+    # group-commit writes of this process must be on disk first
+    atomic_writer.sync()
+
+    with open(blogs_file, "r", encoding="utf-8") as f:
+        blogs = json.load(f)
+    if isinstance(blogs, dict):
+        blogs = [blogs]
+
+    jobs_iter = ((b, os.path.join(records_path, f"{b['id']}{ext}")) for b in blogs)
+    stats = {"blogs": 0, "posts": 0, "bytes": 0}
+    for data, posts in _ordered(_encode_blog, jobs_iter, jobs):
+        out.write(data)
+        stats["blogs"] += 1
+        stats["posts"] += posts
+        stats["bytes"] += len(data)
+    return stats
+
+
+# ---------- import ----------
+
+def _write_record(job):
+    """
+    Pickle one blog's posts into its (staged) record file; returns the
+    blog with its summary, the file name and the post count.
+    """
+    blog, record_file, posts = job
+    objects = [Post(code, title, text, datetime.fromisoformat(creation), datetime.fromisoformat(update))
+               for code, title, text, creation, update in posts]
+    objects.sort(key=lambda p: p.code)
+    # the staging directory is private: no atomic replace needed
+    with open(record_file, "wb") as f:
+        pickle.dump(objects, f)
+        if Configuration.durability in ("fsync", "group"):
+            f.flush()
+            os.fsync(f.fileno())
+    # stored in blogs.json, so opening the store reads no record files
+    blog["summary"] = BlogSummary.of(objects).to_dict()
+    return blog, os.path.basename(record_file), len(objects)
+
+
+def _read_blogs(stream, records_path, ext):
+    """
+    Parse the stream; yield one (blog, record file, posts) job per blog
+    once all its posts are read.
+    """
+    seen = set()
+    blog = None
+    posts = []
+    for number, line in enumerate(stream, 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            obj = json.loads(line)
+        except ValueError as e:
+            raise ValueError(f"line {number}: {e}")
+        kind = obj.get("type")
+        if kind == "blog":
+            if blog is not None:
+                yield blog, os.path.join(records_path, f"{blog['id']}{ext}"), posts
+            if obj["id"] in seen:
+                raise ValueError(f"line {number}: blog {obj['id']} appears twice")
+            seen.add(obj["id"])
+            blog, posts = {"id": obj["id"], "name": obj["name"], "url": obj["url"], "email": obj["email"]}, []
+        elif kind == "post":
+            if blog is None or obj["blog"] != blog["id"]:
+                raise ValueError(f"line {number}: post of blog {obj['blog']} does not follow that blog")
+            posts.append((obj["code"], obj["title"], obj["text"], obj["creation"], obj["update"]))
+        else:
+            raise ValueError(f"line {number}: unknown type {kind!r}")
+    if blog is not None:
+        yield blog, os.path.join(records_path, f"{blog['id']}{ext}"), posts
+
+
+def _has_blogs(blogs_file):
+    if not os.path.exists(blogs_file):
+        return False
+    with open(blogs_file, "r", encoding="utf-8") as f:
+        try:
+            return bool(json.load(f))
+        except ValueError:
+            return False
+
+
+def import_jsonl(stream, blogs_file=None, records_path=None, jobs=1, force=False):
+    """
+    Replace the store with the JSON lines read from the binary stream.
+    Raises ValueError if the store already has blogs, unless force is set.
+    Record files are written to a staging directory under records_path and
+    moved into place, followed by blogs.json, only once the whole stream
+    was read, so a bad line leaves the old store untouched.
+    Returns {"blogs": n, "posts": n}.
+    """
+    cfg = Configuration()
+    blogs_file = blogs_file or cfg.__class__.blogs_file
+    records_path = records_path or cfg.__class__.records_path
+    ext = cfg.__class__.records_extension
+    atomic_writer.sync()
+    if not force and _has_blogs(blogs_file):
+        raise ValueError(f"{blogs_file} already has blogs (use force to replace them)")
+    os.makedirs(records_path, exist_ok=True)
+
+    stats = {"blogs": 0, "posts": 0}
+    stage = tempfile.mkdtemp(prefix=".import-", dir=records_path)
+    try:
+        with BlogStreamWriter(blogs_file) as writer:
+            names = []
+            for blog, name, count in _ordered(_write_record, _read_blogs(stream, stage, ext), jobs):
+                writer.write(blog)
+                names.append(name)
+                stats["blogs"] += 1
+                stats["posts"] += count
+            for name in names:
+                target = os.path.join(records_path, name)
+                atomic_writer.discard(target)
+                os.replace(os.path.join(stage, name), target)
+            if Configuration.durability in ("fsync", "group"):
+                fsync_dir(records_path)
+    finally:
+        shutil.rmtree(stage, ignore_errors=True)
+    return stats
@@ -1,11 +1,20 @@
 import os
 import pickle
+import tempfile
+import threading
 
+from blogging.blog_summary import BlogSummary
 from blogging.configuration import Configuration
+from blogging.dao import atomic_writer
+from blogging.dao.atomic_writer import atomic_write
 from blogging.dao.post_dao import PostDAO
+from blogging.dao.search_index import SearchIndex
+from blogging.dao.time_index import TimeIndex
+from blogging.instrumentation import instrumented, registry
 from blogging.post import Post
 
 
+@instrumented("post_dao", include=("_load", "_write"))
 class PostDAOPickle(PostDAO):
     """
     Post DAO with optional persistence.
@@ -15,9 +24,25 @@ class PostDAOPickle(PostDAO):
     - If autosave == True:
         * each blog is stored in its own .dat file under records_path
         * .dat file contains list of post objects
-        * collections are loaded from disk when needed
+        * collections are loaded from disk when needed: a blog whose
+          BlogSummary came from blogs.json reads its record file on first
+          use, so listing blogs never opens record files
+    - Posts are kept sorted by code, so lookups are binary searches and
+      pages of the listing are slices.
+    - Between begin() and commit() writes are buffered: the .dat file is
+      written once on commit, and rollback() undoes the changes in memory.
+    - retrieve_posts() is served from a SearchIndex built on the first
+      search and kept up to date by every change afterwards.
+    - Queries by creation/update time use a TimeIndex, built and kept up
+      to date the same way.
+    - blog.summary (post count, words, last created/updated) is updated by
+      every change and recomputed whenever the record file is read.
     """
 
+    # held while a record file is moved to a new name, so RecordReclaimer
+    # never takes either name for an orphan
+    files_lock = threading.RLock()
+
     def __init__(self, blog, autosave=True):
         cfg = Configuration()
         self.autosave = autosave
@@ -31,78 +56,369 @@ class PostDAOPickle(PostDAO):
         # code counter
         self._next_code = 1
 
-        os.makedirs(self.path, exist_ok=True)
+        # substring index over title/text, built on the first search
+        self._search = None
+        # creation/update time order, built on the first time query
+        self._times = None
+
+        # transaction state: while deferred, writes only mark the file dirty
+        # and every change is recorded in _undo so it can be rolled back
+        self._deferred = False
+        self._dirty = False
+        self._undo = None
+        # the changes of the last commit, until revert() or settle()
+        self._committed = None
+
+        # a ResidencyManager may unload the posts while they are unused;
+        # _size is the record file's size when last read or written and
+        # _unsaved is set while the file is older than the posts
+        self.residency = None
+        self._size = 0
+        self._unsaved = False
 
         self._file = self._file_name(self.blog.id)
+        # name the record file moves to after a change of blog id (see rename)
+        self._new_file = None
+        # True while the file is hard-linked under both names
+        self._linked = False
+        # False until the record file has been read
+        self._loaded = True
 
         if self.autosave:
-            if os.path.exists(self._file):
-                self._load()
+            if blog.summary is not None:
+                # blogs.json already has this blog's stats; posts are only
+                # needed once something asks for them
+                self._loaded = False
             else:
-                self._write([])
+                atomic_writer.sync(self._file)
+                if os.path.exists(self._file):
+                    try:
+                        self._load()
+                    except IOError:
+                        # stays unloaded and raises again when used
+                        pass
+                else:
+                    self._write([])
+        if blog.summary is None:
+            blog.summary = BlogSummary.of(self._posts)
 
     # ---------- internal helpers ----------
 
+    @property
+    def record_file(self):
+        """Path of the record file holding this blog's posts."""
+        return self._file
+
     def _file_name(self, code):
         """Returns full path to blogs posts file"""
         return os.path.join(self.path, f"{code}{self.ext}")
 
+    def _ensure_loaded(self):
+        if not self._loaded:
+            self._load()
+        elif self.residency is not None:
+            self.residency.used(self)
+
+    def unload(self):
+        """
+        Drop the posts from memory; they are read again on next use.
+        Returns False (and keeps them) without autosave, inside a
+        transaction (until settle()) or if the record file is not up to date.
+        """
+        if not self.autosave or not self._loaded or self._deferred or self._unsaved \
+                or self._committed is not None:
+            return False
+        self._posts = []
+        self._search = None
+        self._times = None
+        self._loaded = False
+        return True
+
     def _load(self):
-        """Load all posts for this blog from its .dat file and update code counter"""
+        """
+        Load all posts for this blog from its .dat file and update code
+        counter. Raises IOError, and stays unloaded, if the file cannot be
+        read: taken for empty, it would be overwritten by the next write.
+        """
         try:
-            with open(self._file, "rb") as f:
-                content = pickle.load(f)
-            if isinstance(content, list):
-                self._posts = [p for p in content if isinstance(p, Post)]
-            else: self._posts = []
+            posts, size = self._read_records(self._file)
+        except Exception as e:
+            raise IOError(f"could not read {self._file}") from e
+        self._install(posts, size)
 
-        except Exception:
-            return None
+    @staticmethod
+    def _read_records(path):
+        """
+        (posts in code order, file size) of the record file at path; a
+        missing file holds no posts. Safe on any thread.
+        """
+        # see our own group-commit writes that are not renamed yet
+        atomic_writer.sync(path)
+        try:
+            f = open(path, "rb")
+        except FileNotFoundError:
+            return [], 0
+        with f:
+            content = pickle.load(f)
+            size = f.tell()
+            registry.add_bytes(read=size)
+        if not isinstance(content, list):
+            return [], size
+        posts = [p for p in content if isinstance(p, Post)]
+        posts.sort(key=lambda p: p.code)
+        return posts, size
+
+    def _install(self, posts, size=0):
+        """Take the posts read from the record file."""
+        self._loaded = True
+        self._posts = posts
+        self._size = size
+        self._search = None
+        self._times = None
+        self.blog.summary = BlogSummary.of(self._posts)
 
         if len(self._posts) == 0:
             self._next_code = 1
         else:
             max_code = max((p.code for p in self._posts), default = 0)
             self._next_code = max_code + 1
+        if self.residency is not None:
+            self.residency.used(self)
+
+    def _index(self, code):
+        """Position of the first post whose code is >= code."""
+        lo, hi = 0, len(self._posts)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._posts[mid].code < code:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def _find(self, code):
+        """Position of the post with this code, or -1."""
+        try:
+            i = self._index(code)
+        except TypeError:
+            # code of the wrong type can never match
+            return -1
+        if i < len(self._posts) and self._posts[i].code == code:
+            return i
+        return -1
+
+    def _search_index(self):
+        """The search index, built from the current posts if needed."""
+        self._ensure_loaded()
+        if self._search is None:
+            index = SearchIndex()
+            for p in self._posts:
+                index.add(p.code, p, (p.title, p.text))
+            self._search = index
+        return self._search
+
+    def _index_post(self, post):
+        if self._search is not None:
+            self._search.update(post.code, post, (post.title, post.text))
+
+    def _unindex_post(self, code):
+        if self._search is not None:
+            self._search.remove(code)
+
+    def _time_index(self):
+        """The time index, built from the current posts if needed."""
+        self._ensure_loaded()
+        if self._times is None:
+            self._times = TimeIndex(self._posts)
+        return self._times
+
+    def rename(self, new_id):
+        """
+        The blog's id becomes new_id: its record file is to move to the
+        name for new_id. Nothing happens on disk yet; BlogDAOJSON moves the
+        file around its next write of blogs.json (begin_move, finish_move),
+        so a crash or a rollback never leaves blogs.json and the file name
+        disagreeing. Until then the file is read and written under its old
+        name. Renaming back to the current name cancels the move.
+        """
+        new_file = self._file_name(new_id)
+        if not self.autosave:
+            self._file = new_file
+            return
+        self._new_file = None if new_file == self._file else new_file
+
+    def begin_move(self):
+        """
+        First half of a pending move, done before blogs.json names the new
+        id: the record file also appears under its new name (a hard link;
+        if the file system has none, finish_move renames it instead).
+        """
+        with self.files_lock:
+            # a queued group-commit write must land before the file is linked
+            atomic_writer.sync(self._file)
+            if not os.path.exists(self._file):
+                return
+            # link under a temporary name, then replace whatever has the new name
+            fd, tmp = tempfile.mkstemp(prefix=f".{os.path.basename(self._new_file)}.", suffix=".tmp",
+                                       dir=os.path.dirname(self._new_file) or ".")
+            os.close(fd)
+            os.remove(tmp)
+            try:
+                os.link(self._file, tmp)
+                atomic_writer.discard(self._new_file)
+                os.replace(tmp, self._new_file)
+            except OSError:
+                return
+            self._linked = True
+
+    def finish_move(self):
+        """Second half, once blogs.json with the new id is written: drop the old name."""
+        with self.files_lock:
+            try:
+                if self._linked:
+                    os.remove(self._file)
+                elif os.path.exists(self._file):
+                    atomic_writer.discard(self._new_file)
+                    os.replace(self._file, self._new_file)
+            except FileNotFoundError:
+                pass
+            if Configuration.durability in ("fsync", "group"):
+                atomic_writer.fsync_dir(os.path.dirname(self._file) or ".")
+            self._file = self._new_file
+            self._new_file = None
+            self._linked = False
+
+    def abort_move(self):
+        """blogs.json could not be written: remove the new name begin_move made."""
+        with self.files_lock:
+            if self._linked:
+                try:
+                    os.remove(self._new_file)
+                except FileNotFoundError:
+                    pass
+            self._linked = False
 
     def _load_all_from_disk(self):
         """Return all posts stored on disk"""
+        self._ensure_loaded()
         return list(self._posts)
 
+    def _newest(self):
+        """(creation of the newest post, latest update), None if no posts."""
+        times = self._time_index()
+        newest = next(times.iter_newest(), None)
+        latest = times.recently_updated(1)
+        return (newest.creation if newest else None, latest[0].update if latest else None)
+
     def _write(self, posts):
         """write current post list to blogs .dat file if autosave enabled"""
         if not self.autosave:
             return True
 
-        try:
-            with open(self._file, "wb") as f:
-                pickle.dump(self._posts, f)
+        if self._deferred:
+            # inside a transaction: write once on commit
+            self._dirty = True
             return True
 
+        try:
+            os.makedirs(self.path, exist_ok=True)
+            written = atomic_write(self._file, lambda f: pickle.dump(self._posts, f), binary=True)
+            registry.add_bytes(written=written)
         except Exception:
+            self._unsaved = True
             return False
 
+        self._size = written
+        self._unsaved = False
+        if self.residency is not None:
+            self.residency.used(self)
+        return True
+
+    def _log(self, entry):
+        """Remember how to undo a change while a transaction is open."""
+        if self._undo is not None:
+            self._undo.append(entry)
+
+    # ---------- transactions ----------
+
+    def begin(self):
+        """Start buffering writes until commit() or rollback()."""
+        self._deferred = True
+        self._dirty = False
+        self._undo = []
+        self._committed = None
+
+    def commit(self):
+        """
+        Write the .dat file once if anything changed since begin(). Until
+        settle(), revert() can still undo what was committed.
+        """
+        self._deferred = False
+        if self._dirty and not self._write(self._posts):
+            raise IOError(f"could not write {self._file}")
+        self._dirty = False
+        self._committed, self._undo = self._undo, None
+
+    def revert(self):
+        """
+        Undo the last commit() (the rest of its transaction failed): the
+        posts go back to what they were at begin() and the .dat file is
+        written again.
+        """
+        undo, self._committed = self._committed, None
+        if not undo:
+            return
+        self._undo = undo
+        self.rollback()
+        if not self._write(self._posts):
+            raise IOError(f"could not write {self._file}")
+
+    def settle(self):
+        """The transaction of the last commit() is complete: forget its changes."""
+        self._committed = None
+
+    def rollback(self):
+        """Undo every change made since begin(), newest first."""
+        undone = bool(self._undo)
+        for entry in reversed(self._undo or []):
+            if entry[0] == "create":
+                _, post, next_code = entry
+                for i in range(len(self._posts) - 1, -1, -1):
+                    if self._posts[i] is post:
+                        del self._posts[i]
+                        break
+                self._next_code = next_code
+            elif entry[0] == "update":
+                _, post, title, text, update = entry
+                post.title, post.text, post.update = title, text, update
+            elif entry[0] == "delete":
+                _, index, post = entry
+                self._posts.insert(index, post)
+        # cheaper to rebuild on the next search than to undo entry by entry
+        self._search = None
+        self._times = None
+        if undone:
+            self.blog.summary = BlogSummary.of(self._posts)
+        self._deferred = False
+        self._dirty = False
+        self._undo = None
+
 
     # ---------- DAO operations ----------
 
     def search_post(self, key):
         """Return post with given code, or None if it does not exist."""
-        if not self.autosave:
-            for p in self._posts:
-                if p.code == key:
-                    return p
-            return None
-
-        for p in self._posts:
-            if p.code == key:
-                return p
-        return None
+        self._ensure_loaded()
+        i = self._find(key)
+        return self._posts[i] if i >= 0 else None
 
     def create_post(self, post):
         """Create a new post. Returns True on success."""
         if not isinstance(post, Post):
             return None
 
+        self._ensure_loaded()
+        next_code = self._next_code
         if not getattr(post, "code", None):
             post.code = self._next_code
             self._next_code += 1
@@ -110,13 +426,30 @@ class PostDAOPickle(PostDAO):
             if post.code >= self._next_code:
                 self._next_code = post.code + 1
 
-        self._posts.append(post)
+        # new codes are always the largest, so this is normally an append
+        if not self._posts or self._posts[-1].code <= post.code:
+            index = len(self._posts)
+        else:
+            index = self._index(post.code + 1)
+        self._posts.insert(index, post)
+        self._log(("create", post, next_code))
+        if index == len(self._posts) - 1:
+            self._index_post(post)
+        else:
+            # the index must stay in code order; rebuild it on the next search
+            self._search = None
+        if self._times is not None:
+            self._times.add(post)
 
         if self.autosave:
             write = self._write(self._posts)
             if not write:
-                self._posts.pop()
+                del self._posts[index]
+                self._unindex_post(post.code)
+                if self._times is not None:
+                    self._times.remove(post)
                 return None
+        self.blog.summary.added(post)
         return post
 
     def retrieve_posts(self, search_string):
@@ -127,53 +460,75 @@ class PostDAOPickle(PostDAO):
         Integration + controller tests expect retrieve_posts("journey") to
         give [1, 3, 5] in that order.
         """
-        if search_string is None:
-            search_string = ""
-        key = search_string.lower()
-
-        if not self.autosave:
-            base = list(self._posts)
-        else:
-            base = self._load_all_from_disk()
+        self._ensure_loaded()
+        if not search_string:
+            return list(self._posts)
 
-        base.sort(key=lambda p: p.code)
+        # the index is kept in code order
+        return self._search_index().search(search_string)
 
-        result = []
-        for p in base:
-            if key in p.title.lower() or key in p.text.lower():
-                result.append(p)
-        return result
+    def iter_posts(self, reverse=False, page_size=256):
+        """
+        Yield posts in code order (descending if reverse), a page at a
+        time, so nothing proportional to the number of posts is built.
+        """
+        offset = 0
+        while True:
+            page = self.posts_page(offset, page_size, reverse)
+            if not page:
+                return
+            yield from page
+            offset += len(page)
+
+    def iter_retrieve_posts(self, search_string):
+        """Lazy retrieve_posts(): yields matches in code order as they are found."""
+        if not search_string:
+            return self.iter_posts()
+        if self._search is not None:
+            return self._search.iter_search(search_string)
+        # building the index first would delay the first match
+        key = search_string.lower()
+        return (p for p in self.iter_posts() if key in p.title.lower() or key in p.text.lower())
 
     def update_post(self, key, new_title, new_text):
         """Update title/text of a post. Returns True if updated."""
         # find post
-        for p in self._posts:
-
-            if p.code == key:
-                p.update_post(new_title, new_text)
+        self._ensure_loaded()
+        i = self._find(key)
+        if i < 0:
+            return False
 
-                # persist list
-                if self.autosave:
-                    return self._write(self._posts)
-                return True
+        p = self._posts[i]
+        old_update, old_text = p.update, p.text
+        self._log(("update", p, p.title, p.text, p.update))
+        p.update_post(new_title, new_text)
+        self._index_post(p)
+        if self._times is not None:
+            self._times.updated(p, old_update)
+        self.blog.summary.updated(p, old_text)
 
-        return False
+        # persist list
+        if self.autosave:
+            return self._write(self._posts)
+        return True
 
     def delete_post(self, key):
         """Delete post with given code. Returns True if deleted."""
-        deleted = False
-        new_list = []
-        for p in self._posts:
-            if not deleted and p.code == key:
-                deleted = True
-                continue
-            new_list.append(p)
-
-        if deleted:
-            self._posts = new_list
-            if self.autosave:
-                self._write(self._posts)
-        return deleted
+        self._ensure_loaded()
+        i = self._find(key)
+        if i < 0:
+            return False
+
+        post = self._posts[i]
+        self._log(("delete", i, post))
+        del self._posts[i]
+        self._unindex_post(key)
+        if self._times is not None:
+            self._times.remove(post)
+        self.blog.summary.removed(post, self._newest)
+        if self.autosave:
+            self._write(self._posts)
+        return True
 
     def list_posts(self):
         """
@@ -181,4 +536,38 @@ class PostDAOPickle(PostDAO):
         For determinism we return them sorted by code ASC;
         the controller will sort DESC where needed.
         """
-        return sorted(self._posts, key = lambda p: p.code)
+        self._ensure_loaded()
+        return list(self._posts)
+
+    def count_posts(self):
+        self._ensure_loaded()
+        return len(self._posts)
+
+    def posts_created_between(self, start=None, end=None):
+        """Posts with start <= creation < end (None: unbounded), oldest first."""
+        return self._time_index().created_between(start, end)
+
+    def iter_newest(self, before=None):
+        """Lazy iterator over posts, newest creation first, below before = (creation, code)."""
+        return self._time_index().iter_newest(before)
+
+    def recently_updated(self, k):
+        """The k most recently updated posts, newest first."""
+        return self._time_index().recently_updated(k)
+
+    def archive_counts(self):
+        """[((year, month), number of posts created that month)], oldest first."""
+        return self._time_index().month_counts()
+
+    def posts_page(self, offset, limit, reverse=False):
+        """
+        Return at most limit posts starting at offset, in code order
+        (descending if reverse). Costs O(limit), not O(number of posts).
+        """
+        self._ensure_loaded()
+        n = len(self._posts)
+        offset = max(0, offset)
+        if reverse:
+            end = n - offset
+            return self._posts[max(0, end - limit):max(0, end)][::-1]
+        return self._posts[offset:offset + limit]
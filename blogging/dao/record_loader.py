@@ -0,0 +1,94 @@
+import os
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from blogging.dao.post_dao_pickle import PostDAOPickle
+
+
+def _read(post_dao):
+    """
+    (posts, size) of post_dao's record file, (None, 0) if it cannot be
+    read: that blog stays unloaded and raises IOError when used.
+    """
+    try:
+        return PostDAOPickle._read_records(post_dao.record_file)
+    except Exception:
+        return None, 0
+
+
+class ParallelRecordLoader:
+    """
+    Loads the record files of many blogs at once, for operations that
+    need every post (analytics, the timeline).
+
+    Files are opened, read and unpickled by a pool of jobs threads, at
+    most 2 * jobs files in flight. The posts are handed to each blog's
+    PostDAOPickle on the calling thread in the order the blogs were
+    given, so the result does not depend on which file finished first.
+    Blogs that are already loaded are skipped. With a ResidencyManager,
+    only as many blogs are loaded as its budget holds at once (the first
+    ones given); the others are read when they are used.
+
+    Threads rather than processes: posts decoded in another process
+    would be pickled again to come back, costing the parent what
+    decoding the file costs. Threads overlap the reads of a cold store;
+    unpickling shares the interpreter lock (except on free-threaded
+    builds, where it spreads over the cores too).
+    """
+
+    def __init__(self, jobs=None, residency=None):
+        # the default of ThreadPoolExecutor: the reads are mostly waiting
+        self.jobs = jobs or min(32, (os.cpu_count() or 1) + 4)
+        self.residency = residency
+
+    def load(self, blogs, progress=None):
+        """
+        Load the posts of every blog in blogs that is not loaded yet (as
+        far as the residency budget holds them). progress(done, total) is
+        called on the calling thread after each blog; if it raises, blogs
+        not loaded by then stay unloaded, as do blogs whose record file
+        cannot be read. Returns the number of blogs read.
+        """
+        daos = [b.post_dao for b in blogs if not b.post_dao._loaded]
+        if self.residency is not None:
+            daos = self.residency.fitting(daos)
+        total = len(daos)
+        if total == 0:
+            return 0
+        if self.jobs == 1 or total == 1:
+            for done, dao in enumerate(daos, 1):
+                posts, size = _read(dao)
+                if posts is not None:
+                    dao._install(posts, size)
+                if progress:
+                    progress(done, total)
+            return total
+
+        with ThreadPoolExecutor(self.jobs) as pool:
+            limit = 2 * self.jobs
+            pending = deque()
+            done = 0
+            try:
+                for dao in daos:
+                    pending.append((dao, pool.submit(_read, dao)))
+                    while len(pending) >= limit:
+                        done = self._install_next(pending, done, total, progress)
+                while pending:
+                    done = self._install_next(pending, done, total, progress)
+            except BaseException:
+                for _, future in pending:
+                    future.cancel()
+                raise
+        return total
+
+    @staticmethod
+    def _install_next(pending, done, total, progress):
+        dao, future = pending.popleft()
+        posts, size = future.result()
+        # changed since it was queued (e.g. by another loader)
+        if posts is not None and not dao._loaded:
+            dao._install(posts, size)
+        done += 1
+        if progress:
+            progress(done, total)
+        return done
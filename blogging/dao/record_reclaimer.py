@@ -0,0 +1,181 @@
+import json
+import os
+import threading
+import time
+
+from blogging.configuration import Configuration
+from blogging.dao import atomic_writer
+from blogging.dao.post_dao_pickle import PostDAOPickle
+
+
+class RecordReclaimer:
+    """
+    Finds record files no blog uses any more and deletes (or archives) them.
+
+    A record file is live when some blog in the blog DAO writes to it.
+    Everything else under records_path with the records extension is an
+    orphan (deleted or renamed blogs), and so is a temporary file left by
+    an interrupted atomic write.
+
+    Concurrent writers are safe:
+    - only files untouched for grace_period seconds are reclaimed, so a
+      file written for a blog that is not in the blog list yet survives;
+      the later of mtime and ctime counts, since a rename keeps the mtime
+    - nothing is reclaimed while the blog DAO is inside a transaction,
+      whose rollback could bring a deleted blog back
+    - liveness is checked again under PostDAOPickle.files_lock, the lock
+      a rename holds while moving a file, right before each file is moved
+    - a file named by the blogs.json on disk is never reclaimed, even if
+      no blog in memory uses it (e.g. after a crash between a rename and
+      the write of blogs.json); blogs.json is read under the same lock
+    """
+
+    def __init__(self, blog_dao, records_path=None, extension=None, grace_period=300.0, archive_path=None):
+        cfg = Configuration()
+        self.blog_dao = blog_dao
+        self.path = records_path or cfg.__class__.records_path
+        self.ext = extension or cfg.__class__.records_extension
+        self.grace_period = grace_period
+        self.archive_path = archive_path
+
+        # totals over every run
+        self.total_files = 0
+        self.total_bytes = 0
+        self.last_report = None
+
+        self._stop = threading.Event()
+        self._thread = None
+
+    # ---------- scanning ----------
+
+    def _live_files(self):
+        return {os.path.abspath(b.post_dao.record_file) for b in self.blog_dao.list_blogs()}
+
+    def _persisted_files(self):
+        """Record files of the blogs in the blogs.json on disk, None if it cannot be read."""
+        path = self.blog_dao.file_path
+        try:
+            atomic_writer.sync(path)
+            with open(path, "r", encoding="utf-8") as f:
+                blogs = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if not isinstance(blogs, list):
+            blogs = [blogs]
+        return {os.path.abspath(os.path.join(self.path, f"{b['id']}{self.ext}"))
+                for b in blogs if isinstance(b, dict) and "id" in b}
+
+    @staticmethod
+    def _age(st, now):
+        # a rename (or hard link) keeps the mtime but sets the ctime
+        return now - max(st.st_mtime, st.st_ctime)
+
+    def _is_temporary(self, name):
+        # temporary files of atomic_write are named .<file>.<random>.tmp
+        return name.startswith(".") and name.endswith(".tmp")
+
+    def orphans(self, now=None):
+        """Paths of the orphaned files older than the grace period."""
+        now = time.time() if now is None else now
+        live = self._live_files()
+        result = []
+        try:
+            entries = list(os.scandir(self.path))
+        except FileNotFoundError:
+            return result
+        for entry in entries:
+            if not entry.is_file():
+                continue
+            if not (entry.name.endswith(self.ext) or self._is_temporary(entry.name)):
+                continue
+            path = os.path.abspath(entry.path)
+            if path in live:
+                continue
+            try:
+                if self._age(entry.stat(), now) < self.grace_period:
+                    continue
+            except FileNotFoundError:
+                continue
+            result.append(path)
+        return result
+
+    # ---------- reclaiming ----------
+
+    def run_once(self):
+        """
+        Reclaim the current orphans. Returns a report dict with the number
+        of files and bytes reclaimed.
+        """
+        report = {"files": 0, "bytes": 0, "archived": self.archive_path is not None, "paths": []}
+        if self.blog_dao.in_transaction:
+            # a transaction is open; its rollback could revive a deleted blog
+            report["skipped"] = True
+            self.last_report = report
+            return report
+
+        orphans = self.orphans()
+        if orphans:
+            with PostDAOPickle.files_lock:
+                persisted = self._persisted_files()
+                # without a readable blogs.json nothing is known to be unused
+                for path in orphans if persisted is not None else []:
+                    size = self._reclaim(path, persisted)
+                    if size is not None:
+                        report["files"] += 1
+                        report["bytes"] += size
+                        report["paths"].append(path)
+
+        self.total_files += report["files"]
+        self.total_bytes += report["bytes"]
+        self.last_report = report
+        return report
+
+    def _reclaim(self, path, persisted):
+        """Delete or archive one file; its size, or None if it was kept."""
+        with PostDAOPickle.files_lock:
+            # the blog list may have changed since the scan
+            if self.blog_dao.in_transaction or path in self._live_files() or path in persisted:
+                return None
+            try:
+                st = os.stat(path)
+            except FileNotFoundError:
+                return None
+            if self._age(st, time.time()) < self.grace_period:
+                return None
+            try:
+                name = os.path.basename(path)
+                if self.archive_path is not None and not self._is_temporary(name):
+                    os.makedirs(self.archive_path, exist_ok=True)
+                    stamp = time.strftime("%Y%m%d%H%M%S")
+                    os.replace(path, os.path.join(self.archive_path, f"{name}.{stamp}"))
+                else:
+                    os.remove(path)
+            except FileNotFoundError:
+                return None
+        return st.st_size
+
+    # ---------- background thread ----------
+
+    def start(self, interval):
+        """Run run_once() every interval seconds on a daemon thread."""
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, args=(interval,),
+                                        name="record-reclaimer", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+
+    def _loop(self, interval):
+        while not self._stop.wait(interval):
+            try:
+                self.run_once()
+            except OSError:
+                # e.g. records directory briefly unavailable; retry next time
+                pass
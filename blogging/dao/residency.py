@@ -0,0 +1,120 @@
+import os
+import threading
+from collections import OrderedDict
+
+
+class ResidencyManager:
+    """
+    Keeps the posts held in memory by PostDAOPickle under a budget of
+    max_posts posts and/or max_bytes bytes of record files (None: no
+    limit), so a long-running process has a stable memory ceiling.
+
+    Every PostDAOPickle with residency set reports itself through used()
+    when it is read, loaded or written. Collections are kept in least
+    recently used order; once the budget is exceeded the oldest ones are
+    unloaded and read again from their record files on next use.
+    Never unloaded:
+    - the collection being used
+    - pinned collections (the Controller pins the current blog)
+    - collections that cannot be reloaded: inside a transaction, after a
+      failed write, or without autosave (see PostDAOPickle.unload)
+    so the budget may be exceeded while those alone are over it.
+    Costs O(1) per use plus O(skipped) per eviction.
+    """
+
+    def __init__(self, max_posts=None, max_bytes=None):
+        self.max_posts = max_posts
+        self.max_bytes = max_bytes
+
+        self.evictions = 0
+
+        # post DAO -> (posts, bytes) when last used, least recently used first
+        self._resident = OrderedDict()
+        self._posts = 0
+        self._bytes = 0
+        self._pinned = set()
+        self._lock = threading.RLock()
+
+    @property
+    def resident_posts(self):
+        return self._posts
+
+    @property
+    def resident_bytes(self):
+        return self._bytes
+
+    def __len__(self):
+        return len(self._resident)
+
+    # ---------- pins ----------
+
+    def pin(self, post_dao):
+        with self._lock:
+            self._pinned.add(post_dao)
+
+    def unpin(self, post_dao):
+        with self._lock:
+            self._pinned.discard(post_dao)
+
+    # ---------- residency ----------
+
+    def used(self, post_dao):
+        """post_dao was just used: it holds its posts and becomes the most recently used."""
+        with self._lock:
+            old = self._resident.pop(post_dao, (0, 0))
+            cost = (len(post_dao._posts), post_dao._size)
+            self._resident[post_dao] = cost
+            self._posts += cost[0] - old[0]
+            self._bytes += cost[1] - old[1]
+            if self._over_budget():
+                self._evict(post_dao)
+
+    def forget(self, post_dao):
+        """Stop tracking post_dao (e.g. its blog was deleted) without unloading it."""
+        with self._lock:
+            cost = self._resident.pop(post_dao, None)
+            self._pinned.discard(post_dao)
+            if cost is not None:
+                self._posts -= cost[0]
+                self._bytes -= cost[1]
+
+    def fitting(self, post_daos):
+        """
+        The leading post_daos whose posts the budget holds all at once,
+        next to the pinned collections: loading more would only unload
+        the first ones again. Costs come from the blogs' summaries and
+        the record files' sizes.
+        """
+        with self._lock:
+            posts = sum(self._resident.get(p, (0, 0))[0] for p in self._pinned)
+            size = sum(self._resident.get(p, (0, 0))[1] for p in self._pinned)
+        for i, post_dao in enumerate(post_daos):
+            if self.max_posts is not None:
+                summary = post_dao.blog.summary
+                posts += summary.posts if summary is not None else 0
+            if self.max_bytes is not None:
+                try:
+                    size += os.path.getsize(post_dao.record_file)
+                except OSError:
+                    pass
+            if (self.max_posts is not None and posts > self.max_posts) or \
+               (self.max_bytes is not None and size > self.max_bytes):
+                return post_daos[:i]
+        return post_daos
+
+    def _over_budget(self):
+        return (self.max_posts is not None and self._posts > self.max_posts) or \
+               (self.max_bytes is not None and self._bytes > self.max_bytes)
+
+    def _evict(self, keep):
+        for post_dao in list(self._resident):
+            if not self._over_budget():
+                return
+            if post_dao is keep or post_dao in self._pinned:
+                continue
+            if post_dao._loaded and not post_dao.unload():
+                continue
+            posts, size = self._resident.pop(post_dao)
+            self._posts -= posts
+            self._bytes -= size
+            self.evictions += 1
@@ -0,0 +1,187 @@
+from bisect import bisect_right
+
+
+class _Chunk:
+    """Up to SearchIndex.CHUNK_SIZE documents plus their joined text."""
+
+    def __init__(self):
+        self.keys = []
+        self.values = []
+        self.texts = []
+        self.holes = 0
+        self._joined = None
+        self._starts = None
+
+    def joined(self):
+        """(joined text, start offset of every slot), rebuilt when stale."""
+        if self._joined is None:
+            starts = []
+            pos = 0
+            for text in self.texts:
+                starts.append(pos)
+                pos += len(text) + 1
+            self._joined = SearchIndex.DOC_SEP.join(self.texts)
+            self._starts = starts
+        return self._joined, self._starts
+
+    def stale(self):
+        self._joined = None
+        self._starts = None
+
+
+class SearchIndex:
+    """
+    Case-insensitive substring search over many small documents.
+
+    Every document (a blog or a post) is lower-cased once when it is added
+    and packed into fixed-size chunks. Each chunk keeps its documents
+    joined into one string, so a query is a few str.find calls per chunk
+    instead of a Python loop lower-casing every field of every document.
+    A change only marks its own chunk stale; the chunk is joined again on
+    the next search, so keystroke-by-keystroke searches between changes
+    never redo that work.
+
+    Typing usually extends the previous query; when the new query contains
+    the last one and nothing changed in between, only the documents that
+    matched last time are checked.
+
+    Fields of a document are separated by FIELD_SEP and documents by
+    DOC_SEP, so a match can never span two fields (same result as testing
+    each field with `in`).
+    """
+
+    CHUNK_SIZE = 512
+    FIELD_SEP = "\x00"
+    DOC_SEP = "\x01"
+
+    def __init__(self):
+        self._chunks = []
+        # key -> (chunk, slot)
+        self._where = {}
+        # bumped by every change; (query, version, keys) of the last search
+        self._version = 0
+        self._last = None
+
+    def __len__(self):
+        return len(self._where)
+
+    def __contains__(self, key):
+        return key in self._where
+
+    def _text(self, fields):
+        return self.FIELD_SEP.join(str(f).lower() for f in fields)
+
+    def add(self, key, value, fields):
+        """Index value under key; fields are the strings searched."""
+        if key in self._where:
+            self.remove(key)
+        if not self._chunks or len(self._chunks[-1].keys) >= self.CHUNK_SIZE:
+            self._chunks.append(_Chunk())
+        chunk = self._chunks[-1]
+        chunk.keys.append(key)
+        chunk.values.append(value)
+        chunk.texts.append(self._text(fields))
+        chunk.stale()
+        self._where[key] = (chunk, len(chunk.keys) - 1)
+        self._version += 1
+
+    def update(self, key, value, fields, new_key=None):
+        """Replace a document in place (keeping its position in results)."""
+        where = self._where.pop(key, None)
+        if where is None:
+            self.add(key if new_key is None else new_key, value, fields)
+            return
+        chunk, slot = where
+        key = key if new_key is None else new_key
+        chunk.keys[slot] = key
+        chunk.values[slot] = value
+        chunk.texts[slot] = self._text(fields)
+        chunk.stale()
+        self._where[key] = (chunk, slot)
+        self._version += 1
+
+    def remove(self, key):
+        where = self._where.pop(key, None)
+        if where is None:
+            return
+        chunk, slot = where
+        chunk.keys[slot] = None
+        chunk.values[slot] = None
+        chunk.texts[slot] = ""
+        chunk.holes += 1
+        chunk.stale()
+        self._version += 1
+        if chunk.holes * 2 > self.CHUNK_SIZE:
+            self._compact(chunk)
+
+    def _compact(self, chunk):
+        """Drop the holes left by removed documents from a chunk."""
+        live = [i for i, k in enumerate(chunk.keys) if k is not None]
+        chunk.keys = [chunk.keys[i] for i in live]
+        chunk.values = [chunk.values[i] for i in live]
+        chunk.texts = [chunk.texts[i] for i in live]
+        chunk.holes = 0
+        chunk.stale()
+        for slot, key in enumerate(chunk.keys):
+            self._where[key] = (chunk, slot)
+        if not chunk.keys:
+            self._chunks.remove(chunk)
+
+    def iter_search(self, query):
+        """
+        Like search(), but yields matches chunk by chunk, so the first ones
+        are available before the whole index has been scanned.
+        """
+        q = str(query).lower()
+        if self.FIELD_SEP in q or self.DOC_SEP in q:
+            return
+        for chunk in list(self._chunks):
+            if not q:
+                yield from [v for k, v in zip(chunk.keys, chunk.values) if k is not None]
+                continue
+            yield from self._search_chunk(chunk, q, [])
+
+    def _search_chunk(self, chunk, q, keys):
+        """Values in chunk matching q; their keys are appended to keys."""
+        values = []
+        joined, starts = chunk.joined()
+        pos = joined.find(q)
+        while pos >= 0:
+            slot = bisect_right(starts, pos) - 1
+            if chunk.keys[slot] is not None:
+                keys.append(chunk.keys[slot])
+                values.append(chunk.values[slot])
+            # continue with the next document
+            if slot + 1 >= len(starts):
+                break
+            pos = joined.find(q, starts[slot + 1])
+        return values
+
+    def search(self, query):
+        """Values of all documents having query in one of their fields."""
+        q = str(query).lower()
+        result = []
+        if self.FIELD_SEP in q or self.DOC_SEP in q:
+            return result
+        if not q:
+            for chunk in self._chunks:
+                result.extend(v for k, v in zip(chunk.keys, chunk.values) if k is not None)
+            return result
+
+        last = self._last
+        if last is not None and last[1] == self._version and last[0] in q:
+            # refine the previous result instead of scanning everything
+            keys = []
+            for key in last[2]:
+                chunk, slot = self._where[key]
+                if q in chunk.texts[slot]:
+                    keys.append(key)
+                    result.append(chunk.values[slot])
+            self._last = (q, self._version, keys)
+            return result
+
+        keys = []
+        for chunk in self._chunks:
+            result.extend(self._search_chunk(chunk, q, keys))
+        self._last = (q, self._version, keys)
+        return result
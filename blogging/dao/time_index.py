@@ -0,0 +1,79 @@
+from bisect import bisect_left, insort
+from collections import Counter
+
+
+class TimeIndex:
+    """
+    Posts of one blog ordered by creation time and by update time.
+
+    Both orders are sorted lists of (time, code, post), so a range of
+    creation times or the latest updates are found with a binary search
+    and then sliced: O(log n + k) for k results. Posts are usually created
+    and updated "now", which makes every change an append at the end.
+    Post counts per (year, month) of creation are kept in a Counter, so
+    an archive listing costs O(number of months).
+    """
+
+    def __init__(self, posts=()):
+        self._created = sorted((p.creation, p.code, p) for p in posts)
+        self._updated = sorted((p.update, p.code, p) for p in posts)
+        self._months = Counter((p.creation.year, p.creation.month) for p in posts)
+
+    def __len__(self):
+        return len(self._created)
+
+    # ---------- changes ----------
+
+    def add(self, post):
+        insort(self._created, (post.creation, post.code, post))
+        insort(self._updated, (post.update, post.code, post))
+        self._months[(post.creation.year, post.creation.month)] += 1
+
+    def remove(self, post):
+        self._discard(self._created, post.creation, post.code)
+        self._discard(self._updated, post.update, post.code)
+        month = (post.creation.year, post.creation.month)
+        self._months[month] -= 1
+        if self._months[month] <= 0:
+            del self._months[month]
+
+    def updated(self, post, old_update):
+        """post.update changed from old_update."""
+        self._discard(self._updated, old_update, post.code)
+        insort(self._updated, (post.update, post.code, post))
+
+    @staticmethod
+    def _discard(entries, time, code):
+        i = bisect_left(entries, (time, code), key=lambda e: (e[0], e[1]))
+        if i < len(entries) and entries[i][1] == code:
+            del entries[i]
+
+    # ---------- queries ----------
+
+    def created_between(self, start=None, end=None):
+        """Posts with start <= creation < end (None: unbounded), oldest first."""
+        lo = 0 if start is None else bisect_left(self._created, start, key=lambda e: e[0])
+        hi = len(self._created) if end is None else bisect_left(self._created, end, key=lambda e: e[0])
+        return [e[2] for e in self._created[lo:hi]]
+
+    def iter_newest(self, before=None):
+        """
+        Yield posts newest creation first (ties: highest code first), only
+        those whose (creation, code) is below before if it is given.
+        Lazy: every post yielded costs O(1) after an O(log n) start.
+        """
+        entries = self._created
+        i = len(entries) if before is None else bisect_left(entries, before, key=lambda e: (e[0], e[1]))
+        while i > 0:
+            i -= 1
+            yield entries[i][2]
+
+    def recently_updated(self, k):
+        """The k most recently updated posts, newest first."""
+        if k <= 0:
+            return []
+        return [e[2] for e in self._updated[:-k - 1:-1]]
+
+    def month_counts(self):
+        """[((year, month), number of posts created that month)], oldest month first."""
+        return sorted(self._months.items())
@@ -0,0 +1,34 @@
+class MutationEvent:
+    """
+    Describes one change made through the Controller.
+
+    Listeners registered with Controller.add_listener receive one event per
+    change, after the change is made (after the commit for changes made
+    inside a transaction):
+
+    - BLOG_CREATED: blog is the new blog
+    - BLOG_UPDATED: blog is the updated blog, old_id the id it had before
+    - BLOG_DELETED: blog is the deleted blog
+    - POST_CREATED / POST_UPDATED / POST_DELETED: post is the post,
+      blog_id the blog it belongs to
+    - RESET: too much changed at once; listeners should reload everything
+    """
+
+    BLOG_CREATED = "blog_created"
+    BLOG_UPDATED = "blog_updated"
+    BLOG_DELETED = "blog_deleted"
+    POST_CREATED = "post_created"
+    POST_UPDATED = "post_updated"
+    POST_DELETED = "post_deleted"
+    RESET = "reset"
+
+    def __init__(self, kind, blog=None, post=None, blog_id=None, old_id=None):
+        self.kind = kind
+        self.blog = blog
+        self.post = post
+        self.blog_id = blog.id if blog_id is None and blog is not None else blog_id
+        self.old_id = old_id
+
+    def __repr__(self):
+        return f"MutationEvent({self.kind!r}, blog_id={self.blog_id!r}, " \
+               f"post={getattr(self.post, 'code', None)!r}, old_id={self.old_id!r})"
@@ -0,0 +1,2 @@
+class BatchAbortedException(Exception):
+	''' Batch Aborted '''
\ No newline at end of file
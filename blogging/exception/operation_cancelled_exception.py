@@ -0,0 +1,2 @@
+class OperationCancelledException(Exception):
+	''' Operation Cancelled '''
\ No newline at end of file
@@ -0,0 +1,200 @@
+import os
+import threading
+from email.utils import format_datetime
+from xml.sax.saxutils import escape
+
+from blogging.dao.atomic_writer import atomic_write
+from blogging.event import MutationEvent
+
+FORMATS = ("atom", "rss")
+
+
+# ---------- XML ----------
+
+def _stamp(dt):
+    # posts carry naive local times; feeds need an explicit offset
+    return dt.astimezone().isoformat(timespec="seconds")
+
+
+def atom_entry(blog_id, post, html):
+    return (f"<entry>\n"
+            f"  <id>urn:blogging:{blog_id}:{post.code}</id>\n"
+            f"  <title>{escape(post.title)}</title>\n"
+            f"  <link href=\"{post.code}.html\"/>\n"
+            f"  <published>{_stamp(post.creation)}</published>\n"
+            f"  <updated>{_stamp(post.update)}</updated>\n"
+            f"  <content type=\"html\">{escape(html)}</content>\n"
+            f"</entry>\n")
+
+
+def rss_item(blog_id, post, html):
+    return (f"<item>\n"
+            f"  <guid isPermaLink=\"false\">urn:blogging:{blog_id}:{post.code}</guid>\n"
+            f"  <title>{escape(post.title)}</title>\n"
+            f"  <link>{post.code}.html</link>\n"
+            f"  <pubDate>{format_datetime(post.creation.astimezone())}</pubDate>\n"
+            f"  <description>{escape(html)}</description>\n"
+            f"</item>\n")
+
+
+def atom_feed(blog_id, name, email, updated, entries):
+    """entries: atom_entry() strings, newest first; updated: a datetime or None."""
+    stamp = _stamp(updated) if updated is not None else "1970-01-01T00:00:00+00:00"
+    return (f"<?xml version=\"1.0\" encoding=\"utf-8\"?>\n"
+            f"<feed xmlns=\"http://www.w3.org/2005/Atom\">\n"
+            f"<id>urn:blogging:{blog_id}</id>\n"
+            f"<title>{escape(name)}</title>\n"
+            f"<link href=\"index.html\"/>\n"
+            f"<updated>{stamp}</updated>\n"
+            f"<author><name>{escape(name)}</name><email>{escape(email)}</email></author>\n"
+            + "".join(entries) +
+            f"</feed>\n")
+
+
+def rss_feed(blog_id, name, url, items):
+    """items: rss_item() strings, newest first."""
+    return (f"<?xml version=\"1.0\" encoding=\"utf-8\"?>\n"
+            f"<rss version=\"2.0\">\n<channel>\n"
+            f"<title>{escape(name)}</title>\n"
+            f"<link>index.html</link>\n"
+            f"<description>{escape(url)}</description>\n"
+            + "".join(items) +
+            f"</channel>\n</rss>\n")
+
+
+# ---------- incremental feeds ----------
+
+class _Feed:
+    """The latest posts of one blog and their rendered entries."""
+
+    def __init__(self, blog):
+        self.blog = blog
+        # (code, update, atom entry, rss item), newest first
+        self.entries = []
+        self.codes = set()
+        self.stale = True
+
+
+class FeedManager:
+    """
+    Atom and RSS feeds of the latest size posts of each blog.
+
+    A feed is built on first use from the blog's newest posts
+    (PostDAOPickle keeps posts in code order, so that is a slice of size
+    posts, whatever the size of the blog). on_mutation, a Controller
+    listener, marks a feed stale when a post is created, or when a post
+    in the feed is updated or deleted; changes to older posts are ignored.
+    A stale feed takes the newest posts again and renders only the
+    entries whose post is new or was updated, so producing a feed costs
+    O(size) string joins plus the changed entries.
+
+    With path set, <path>/<blog id>/atom.xml and rss.xml are rewritten
+    after every change that affects them (the layout of build-site, so
+    path may be the site directory).
+    """
+
+    def __init__(self, blog_dao, size=20, path=None, render=None):
+        self.blog_dao = blog_dao
+        self.size = size
+        self.path = path
+        # render(blog_id, post) -> HTML of the post's text
+        self.render = render or (lambda blog_id, post: escape(post.text))
+        self._feeds = {}
+        self._lock = threading.RLock()
+
+    # ---------- reading ----------
+
+    def feed(self, blog_id, format="atom"):
+        """The feed of blog_id in format ("atom" or "rss"), or None if there is no such blog."""
+        if format not in FORMATS:
+            raise ValueError(f"unknown feed format {format!r}")
+        with self._lock:
+            feed = self._refresh(blog_id)
+            if feed is None:
+                return None
+            blog = feed.blog
+            if format == "atom":
+                updated = max((e[1] for e in feed.entries), default=None)
+                return atom_feed(blog.id, blog.name, blog.email, updated, [e[2] for e in feed.entries])
+            return rss_feed(blog.id, blog.name, blog.url, [e[3] for e in feed.entries])
+
+    def _refresh(self, blog_id):
+        feed = self._feeds.get(blog_id)
+        if feed is None:
+            # by id only: search_blog() also matches names and urls
+            blog = next((b for b in self.blog_dao.iter_blogs() if b.id == blog_id), None)
+            if blog is None:
+                return None
+            feed = self._feeds[blog_id] = _Feed(blog)
+        if feed.stale:
+            old = {e[0]: e for e in feed.entries}
+            entries = []
+            for post in feed.blog.post_dao.posts_page(0, self.size, reverse=True):
+                e = old.get(post.code)
+                if e is None or e[1] != post.update:
+                    html = self.render(blog_id, post)
+                    e = (post.code, post.update, atom_entry(blog_id, post, html), rss_item(blog_id, post, html))
+                entries.append(e)
+            feed.entries = entries
+            feed.codes = {e[0] for e in entries}
+            feed.stale = False
+        return feed
+
+    # ---------- changes ----------
+
+    def clear(self):
+        """Forget every feed (e.g. after a rollback); they are rebuilt on use."""
+        with self._lock:
+            self._feeds.clear()
+
+    def on_mutation(self, event):
+        kind = event.kind
+        with self._lock:
+            if kind == MutationEvent.RESET:
+                self._feeds.clear()
+                if self.path is not None:
+                    for blog in self.blog_dao.list_blogs():
+                        self._write(blog.id)
+                return
+            if kind == MutationEvent.BLOG_DELETED or \
+                    (kind == MutationEvent.BLOG_UPDATED and event.old_id != event.blog_id):
+                old_id = event.blog_id if kind == MutationEvent.BLOG_DELETED else event.old_id
+                self._feeds.pop(old_id, None)
+                self._remove(old_id)
+                if kind == MutationEvent.BLOG_DELETED:
+                    return
+            if kind in (MutationEvent.BLOG_CREATED, MutationEvent.BLOG_UPDATED):
+                # name/url/email are read from the blog object on every call
+                self._write(event.blog_id)
+                return
+
+            feed = self._feeds.get(event.blog_id)
+            if feed is not None:
+                if kind == MutationEvent.POST_CREATED or event.post.code in feed.codes:
+                    feed.stale = True
+                else:
+                    # an older post: not in the feed
+                    return
+            self._write(event.blog_id)
+
+    # ---------- static files ----------
+
+    def _write(self, blog_id):
+        if self.path is None:
+            return
+        for format in FORMATS:
+            text = self.feed(blog_id, format)
+            if text is None:
+                return
+            out_dir = os.path.join(self.path, str(blog_id))
+            os.makedirs(out_dir, exist_ok=True)
+            atomic_write(os.path.join(out_dir, f"{format}.xml"), lambda f: f.write(text), durability="none")
+
+    def _remove(self, blog_id):
+        if self.path is None:
+            return
+        for format in FORMATS:
+            try:
+                os.remove(os.path.join(self.path, str(blog_id), f"{format}.xml"))
+            except FileNotFoundError:
+                pass
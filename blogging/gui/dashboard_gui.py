@@ -1,7 +1,10 @@
 # blogging/gui/dashboard_gui.py
 # main dashboard after logging in: blogs + posts
 
-from PyQt6.QtCore import Qt, pyqtSignal, QAbstractTableModel, QModelIndex
+from collections import OrderedDict
+from datetime import datetime
+
+from PyQt6.QtCore import Qt, pyqtSignal, QAbstractTableModel, QModelIndex, QThreadPool, QTimer
 from PyQt6.QtWidgets import (
     QWidget,
     QVBoxLayout,
@@ -11,15 +14,22 @@ from PyQt6.QtWidgets import (
     QLineEdit,
     QTabWidget,
     QTableView,
+    QHeaderView,
     QGroupBox,
     QFormLayout,
     QPlainTextEdit,
     QMessageBox,
+    QProgressBar,
+    QSplitter,
+    QComboBox,
+    QTextBrowser,
+    QCheckBox,
 )
 
+from blogging.event import MutationEvent
 from blogging.exception.illegal_access_exception import IllegalAccessException
-from blogging.exception.illegal_operation_exception import IllegalOperationException
 from blogging.exception.no_current_blog_exception import NoCurrentBlogException
+from blogging.gui.worker import Worker
 
 
 # ---------- helper table model for blogs ----------
@@ -28,18 +38,64 @@ class BlogTableModel(QAbstractTableModel):
     def __init__(self, blogs=None):
         super().__init__()
         self._blogs = blogs or []  # list of Blog objects
+        # blog id -> row, built when first needed and after removals
+        self._rows = None
 
     def set_blogs(self, blogs):
         self.beginResetModel()
         self._blogs = blogs or []
+        self._rows = None
         self.endResetModel()
 
+    def _row_of(self, blog_id):
+        if self._rows is None:
+            self._rows = {b.id: i for i, b in enumerate(self._blogs)}
+        return self._rows.get(blog_id)
+
+    # row-level changes, so the view keeps its scroll position and selection
+
+    def append_blog(self, blog):
+        row = len(self._blogs)
+        self.beginInsertRows(QModelIndex(), row, row)
+        self._blogs.append(blog)
+        if self._rows is not None:
+            self._rows[blog.id] = row
+        self.endInsertRows()
+
+    def replace_blog(self, old_id, blog):
+        """Show blog in the row of old_id; False if that row is not shown."""
+        row = self._row_of(old_id)
+        if row is None:
+            return False
+        self._blogs[row] = blog
+        del self._rows[old_id]
+        self._rows[blog.id] = row
+        self.dataChanged.emit(self.index(row, 0), self.index(row, self.columnCount() - 1))
+        return True
+
+    def refresh_blog(self, blog_id):
+        """Redraw the summary columns of blog_id (its posts changed)."""
+        row = self._row_of(blog_id)
+        if row is not None:
+            self.dataChanged.emit(self.index(row, 4), self.index(row, self.columnCount() - 1))
+
+    def remove_blog(self, blog_id):
+        row = self._row_of(blog_id)
+        if row is None:
+            return False
+        self.beginRemoveRows(QModelIndex(), row, row)
+        del self._blogs[row]
+        self._rows = None
+        self.endRemoveRows()
+        return True
+
     def rowCount(self, parent=QModelIndex()):
         return len(self._blogs)
 
     def columnCount(self, parent=QModelIndex()):
-        # id, name, url, email
-        return 4
+        # id, name, url, email, then the blog summary: posts, words,
+        # last post, last update
+        return 8
 
     def data(self, index, role=Qt.ItemDataRole.DisplayRole):
         if not index.isValid() or role != Qt.ItemDataRole.DisplayRole:
@@ -55,13 +111,25 @@ class BlogTableModel(QAbstractTableModel):
             return blog.url
         elif col == 3:
             return blog.email
+        # the summary comes from blogs.json: no record file is read
+        summary = blog.summary
+        if summary is None:
+            return ""
+        if col == 4:
+            return str(summary.posts)
+        elif col == 5:
+            return str(summary.words)
+        elif col == 6:
+            return f"{summary.last_created:%Y-%m-%d %H:%M}" if summary.last_created else ""
+        elif col == 7:
+            return f"{summary.last_updated:%Y-%m-%d %H:%M}" if summary.last_updated else ""
         return None
 
     def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
         if role != Qt.ItemDataRole.DisplayRole:
             return None
         if orientation == Qt.Orientation.Horizontal:
-            headers = ["ID", "Name", "URL", "Email"]
+            headers = ["ID", "Name", "URL", "Email", "Posts", "Words", "Last post", "Last update"]
             if 0 <= section < len(headers):
                 return headers[section]
         return None
@@ -72,11 +140,241 @@ class BlogTableModel(QAbstractTableModel):
         return None
 
 
+# ---------- helper table model for posts ----------
+
+class PostTableModel(QAbstractTableModel):
+    """
+    Post table that only materializes what the view shows.
+
+    The model gets a row count and a fetch(offset, limit) function instead
+    of a list. Rows are handed to the view PAGE_SIZE at a time through
+    canFetchMore/fetchMore as the user scrolls, fetched pages live in a
+    small LRU cache, and cell text is built in data() on demand.
+
+    insert_post/refresh_post/remove_post apply single-row changes; rows are
+    located in the cached pages only, so the work does not grow with the
+    number of posts.
+
+    With run given, pages of a source are fetched through it instead of on
+    the GUI thread: run(fn, args, on_result, on_finished) calls fn(*args)
+    elsewhere, then on_result(result) if it succeeded and on_finished()
+    in any case, both on the GUI thread. Rows of a page in flight are blank
+    and redrawn once it arrives.
+    """
+
+    PAGE_SIZE = 200
+    MAX_PAGES = 25
+    HEADERS = ["Code", "Title", "Text", "Created", "Updated"]
+    PREVIEW_LENGTH = 80
+
+    def __init__(self, run=None):
+        super().__init__()
+        self._total = 0
+        self._loaded = 0
+        self._fetch = None
+        self._run = run
+        self._pages = OrderedDict()
+        # page number -> token of the fetch in flight for it
+        self._pending = {}
+        # the list behind set_posts(), None when reading from a source
+        self._posts = None
+
+    def set_source(self, total, fetch):
+        """Show total posts, read through fetch(offset, limit) when needed."""
+        self.beginResetModel()
+        self._total = total
+        self._loaded = 0
+        self._fetch = fetch
+        self._pages = OrderedDict()
+        self._pending = {}
+        self._posts = None
+        self.endResetModel()
+
+    def set_posts(self, posts):
+        """Show an already computed list (e.g. search results)."""
+        posts = list(posts or [])
+        self.set_source(len(posts), lambda offset, limit: posts[offset:offset + limit])
+        self._posts = posts
+
+    def _drop_pages_from(self, row):
+        """Forget cached pages at or after row (their rows have shifted)."""
+        first = row // self.PAGE_SIZE
+        for number in [n for n in self._pages if n >= first]:
+            del self._pages[number]
+        # pages in flight were read before the shift; their results are dropped
+        for number in [n for n in self._pending if n >= first]:
+            del self._pending[number]
+
+    def row_of(self, code):
+        """
+        Row of the post with this code, or None. With a source only cached
+        pages are searched (other rows are fetched fresh anyway).
+        """
+        for number, page in self._pages.items():
+            for i, post in enumerate(page):
+                if post.code == code:
+                    return number * self.PAGE_SIZE + i
+        if self._posts is not None:
+            for i, post in enumerate(self._posts):
+                if post.code == code:
+                    return i
+        return None
+
+    def insert_post(self, row, post):
+        if self._posts is not None:
+            self._posts.insert(row, post)
+        self._total += 1
+        self._drop_pages_from(row)
+        if row <= self._loaded:
+            self.beginInsertRows(QModelIndex(), row, row)
+            self._loaded += 1
+            self.endInsertRows()
+
+    def refresh_post(self, code):
+        """Redraw the row of code; False if it is not cached (nothing to redraw)."""
+        row = self.row_of(code)
+        if row is None:
+            return False
+        if row >= self._loaded:
+            # not handed to the view yet
+            return True
+        self.dataChanged.emit(self.index(row, 0), self.index(row, self.columnCount() - 1))
+        return True
+
+    def remove_post(self, code):
+        """Remove the row of code; False if its row is unknown."""
+        row = self.row_of(code)
+        if row is None:
+            return False
+        if row >= self._loaded:
+            # not handed to the view yet: only the rows still to fetch change
+            if self._posts is not None:
+                del self._posts[row]
+            self._total -= 1
+            self._drop_pages_from(row)
+            return True
+        self.beginRemoveRows(QModelIndex(), row, row)
+        if self._posts is not None:
+            del self._posts[row]
+        self._total -= 1
+        self._loaded -= 1
+        self._drop_pages_from(row)
+        self.endRemoveRows()
+        return True
+
+    def total(self):
+        return self._total
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self._loaded
+
+    def columnCount(self, parent=QModelIndex()):
+        return len(self.HEADERS)
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and self._loaded < self._total
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid():
+            return
+        count = min(self.PAGE_SIZE, self._total - self._loaded)
+        if count <= 0:
+            return
+        self.beginInsertRows(QModelIndex(), self._loaded, self._loaded + count - 1)
+        self._loaded += count
+        self.endInsertRows()
+
+    def post_at(self, row):
+        if not 0 <= row < self._loaded:
+            return None
+        number, offset = divmod(row, self.PAGE_SIZE)
+        page = self._pages.get(number)
+        if page is None:
+            if self._run is not None and self._posts is None:
+                self._request_page(number)
+                return None
+            page = self._fetch(number * self.PAGE_SIZE, self.PAGE_SIZE)
+            self._store_page(number, page)
+        else:
+            self._pages.move_to_end(number)
+        return page[offset] if offset < len(page) else None
+
+    def _store_page(self, number, page):
+        self._pages[number] = page
+        if len(self._pages) > self.MAX_PAGES:
+            self._pages.popitem(last=False)
+
+    def _request_page(self, number):
+        """Fetch a page of the source through run, once per page in flight."""
+        if number in self._pending:
+            return
+        token = self._pending[number] = object()
+
+        def fetched(page):
+            if self._pending.get(number) is not token:
+                # the source changed or the rows shifted meanwhile
+                return
+            del self._pending[number]
+            self._store_page(number, page)
+            first = number * self.PAGE_SIZE
+            last = min(first + len(page), self._loaded) - 1
+            if last >= first:
+                self.dataChanged.emit(self.index(first, 0), self.index(last, self.columnCount() - 1))
+
+        def finished():
+            # failed or cancelled: asked again when the rows are drawn next
+            if self._pending.get(number) is token:
+                del self._pending[number]
+
+        self._run(self._fetch, (number * self.PAGE_SIZE, self.PAGE_SIZE), fetched, finished)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        if role not in (Qt.ItemDataRole.DisplayRole, Qt.ItemDataRole.ToolTipRole):
+            return None
+
+        post = self.post_at(index.row())
+        if post is None:
+            return None
+        col = index.column()
+        if role == Qt.ItemDataRole.ToolTipRole:
+            # full text on hover, only for the text column
+            return post.text if col == 2 else None
+        if col == 0:
+            return str(post.code)
+        elif col == 1:
+            return post.title
+        elif col == 2:
+            text = post.text[:self.PREVIEW_LENGTH + 1].replace("\n", " ")
+            return text if len(text) <= self.PREVIEW_LENGTH else text[:self.PREVIEW_LENGTH] + "..."
+        elif col == 3:
+            return post.creation.strftime("%Y-%m-%d %H:%M")
+        elif col == 4:
+            return post.update.strftime("%Y-%m-%d %H:%M")
+        return None
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role != Qt.ItemDataRole.DisplayRole:
+            return None
+        if orientation == Qt.Orientation.Horizontal:
+            if 0 <= section < len(self.HEADERS):
+                return self.HEADERS[section]
+        return None
+
+
 # ---------- main Dashboard widget ----------
 
 class Dashboard(QWidget):
     # signal back to main window when user clicks logout
     clicked_logout = pyqtSignal()
+    # controller mutation events, re-emitted so they reach the GUI thread
+    mutated = pyqtSignal(object)
+
+    # search-as-you-type waits for a pause this long before searching
+    SEARCH_DELAY_MS = 250
+    # posts shown by "Recently updated"
+    RECENT_POSTS = 20
 
     def __init__(self, controller, parent=None):
         super().__init__(parent)
@@ -86,6 +384,32 @@ class Dashboard(QWidget):
         self.current_blog_name = None
 
         self.blogs_model = BlogTableModel([])
+        # pages of the post listing are read on the worker pool too
+        self.posts_model = PostTableModel(self._run_page_fetch)
+        # search key behind the posts table (None when listing all posts)
+        self._posts_search_key = None
+        # time-based view behind the posts table: ("archive", start, end),
+        # ("recent",) or None for a listing/search
+        self._posts_view = None
+        self._archive_reload_pending = False
+
+        # controller calls run here, one at a time, off the GUI thread
+        self.pool = QThreadPool()
+        self.pool.setMaxThreadCount(1)
+        self._workers = []
+        # latest search worker per table ("blogs" / "posts")
+        self._searches = {}
+        # search key behind the blogs table (None when listing all blogs)
+        self._blogs_search_key = None
+        self._posts_reload_pending = False
+        # code of the post shown in the preview pane
+        self._preview_code = None
+
+        # the controller notifies us from the worker thread; the signal
+        # queues the event to the GUI thread, where the models are updated
+        self.mutated.connect(self._apply_mutation)
+        self._listener = self.mutated.emit
+        self.controller.add_listener(self._listener)
 
         main_layout = QVBoxLayout()
         self.setLayout(main_layout)
@@ -97,6 +421,20 @@ class Dashboard(QWidget):
 
         header_row.addStretch()
 
+        # progress of background operations, hidden while idle
+        self.busy_label = QLabel("")
+        header_row.addWidget(self.busy_label)
+
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setMaximumWidth(200)
+        self.progress_bar.hide()
+        header_row.addWidget(self.progress_bar)
+
+        self.btn_cancel = QPushButton("Cancel")
+        self.btn_cancel.clicked.connect(self._cancel_running)
+        self.btn_cancel.hide()
+        header_row.addWidget(self.btn_cancel)
+
         self.logout_button = QPushButton("Logout")
         self.logout_button.clicked.connect(self._do_logout)
         header_row.addWidget(self.logout_button)
@@ -122,7 +460,11 @@ class Dashboard(QWidget):
 
     def _do_logout(self):
         # controller.logout is actually called by BloggingGUI.logout_gui,
-        # we just emit the signal here
+        # we just emit the signal here (after background work has stopped,
+        # since logout runs on the GUI thread)
+        self._cancel_running()
+        self.pool.waitForDone()
+        self.controller.remove_listener(self._listener)
         self.clicked_logout.emit()
 
     # ---------- BLOG TAB BUILD + HANDLERS ----------
@@ -137,6 +479,12 @@ class Dashboard(QWidget):
         self.blog_search_edit = QLineEdit()
         self.blog_search_edit.setPlaceholderText("id, name, url, or email")
         search_row.addWidget(self.blog_search_edit)
+        self._blog_search_timer = self._search_timer(self.blog_search_edit, self._retrieve_blogs)
+
+        # typo-tolerant search over names and urls, best matches first
+        self.blog_fuzzy_check = QCheckBox("Fuzzy")
+        self.blog_fuzzy_check.toggled.connect(self._retrieve_blogs)
+        search_row.addWidget(self.blog_fuzzy_check)
 
         self.btn_retrieve_blogs = QPushButton("Retrieve blogs")
         self.btn_retrieve_blogs.clicked.connect(self._retrieve_blogs)
@@ -219,25 +567,25 @@ class Dashboard(QWidget):
         return self.blogs_model.blog_at(row)
 
     def _list_blogs(self):
-        try:
-            blogs = self.controller.list_blogs()
-            self.blogs_model.set_blogs(blogs)
-            self.blog_msg.setText(f"Listed {len(blogs)} blog(s).")
-        except IllegalAccessException:
-            self._show_error("You must login first.")
-        except Exception as e:
-            self._show_error(str(e))
+        self._blogs_search_key = None
+        self._cancel_search("blogs")
+        self._run(self.controller.list_blogs, self._show_listed_blogs, "Listing blogs...")
+
+    def _show_listed_blogs(self, blogs):
+        self.blogs_model.set_blogs(blogs)
+        self.blog_msg.setText(f"Listed {len(blogs)} blog(s).")
 
     def _retrieve_blogs(self):
+        self._blog_search_timer.stop()
         key = self.blog_search_edit.text().strip()
-        try:
-            blogs = self.controller.retrieve_blogs(key)
-            self.blogs_model.set_blogs(blogs)
-            self.blog_msg.setText(f"Retrieved {len(blogs)} blog(s).")
-        except IllegalAccessException:
-            self._show_error("You must login first.")
-        except Exception as e:
-            self._show_error(str(e))
+        self._blogs_search_key = key
+        fuzzy = self.blog_fuzzy_check.isChecked() and key
+        self._run_search("blogs", self.controller.fuzzy_retrieve_blogs if fuzzy else self.controller.retrieve_blogs,
+                         self._show_retrieved_blogs, "Searching blogs...", key)
+
+    def _show_retrieved_blogs(self, blogs):
+        self.blogs_model.set_blogs(blogs)
+        self.blog_msg.setText(f"Retrieved {len(blogs)} blog(s).")
 
     def _load_selected_blog_into_form(self):
         blog = self._get_selected_blog()
@@ -258,19 +606,17 @@ class Dashboard(QWidget):
             self._show_error("No blog selected in the table.")
             return
 
-        try:
-            self.controller.set_current_blog(blog.id)
+        def current_blog_set(_):
             self.current_blog_id = blog.id
             self.current_blog_name = blog.name
             self.current_blog_label.setText(f"Current blog: {blog.id} - {blog.name}")
             self.tabs.setTabEnabled(1, True)  # enable posts tab
+            self._clear_preview()
+            self._posts_view = None
+            self._load_archive()
             self.blog_msg.setText(f"Current blog set to {blog.id}.")
-        except IllegalAccessException:
-            self._show_error("You must login first.")
-        except IllegalOperationException as e:
-            self._show_error(str(e))
-        except Exception as e:
-            self._show_error(str(e))
+
+        self._run(self.controller.set_current_blog, current_blog_set, "Opening blog...", blog.id)
 
     def _create_blog(self):
         try:
@@ -287,16 +633,11 @@ class Dashboard(QWidget):
             self._show_error("Name, URL and email cannot be empty.")
             return
 
-        try:
-            self.controller.create_blog(bid, name, url, email)
+        def blog_created(_):
+            # the table itself is updated by the BLOG_CREATED event
             self.blog_msg.setText("Blog created.")
-            self._list_blogs()
-        except IllegalAccessException:
-            self._show_error("You must login first.")
-        except IllegalOperationException as e:
-            self._show_error(str(e))
-        except Exception as e:
-            self._show_error(str(e))
+
+        self._run(self.controller.create_blog, blog_created, "Creating blog...", bid, name, url, email)
 
     def _update_blog(self):
         # new id from the form
@@ -316,20 +657,15 @@ class Dashboard(QWidget):
 
         old_id = self._selected_blog_id_for_update or new_id
 
-        try:
-            ok = self.controller.update_blog(old_id, new_id, name, url, email)
+        def blog_updated(ok):
             if ok:
                 self.blog_msg.setText("Blog updated.")
                 self._selected_blog_id_for_update = new_id
-                self._list_blogs()
             else:
                 self._show_error("Blog not found to update.")
-        except IllegalAccessException:
-            self._show_error("You must login first.")
-        except IllegalOperationException as e:
-            self._show_error(str(e))
-        except Exception as e:
-            self._show_error(str(e))
+
+        self._run(self.controller.update_blog, blog_updated, "Updating blog...",
+                  old_id, new_id, name, url, email)
 
     def _delete_blog(self):
         try:
@@ -338,8 +674,7 @@ class Dashboard(QWidget):
             self._show_error("Blog ID must be an integer.")
             return
 
-        try:
-            ok = self.controller.delete_blog(bid)
+        def blog_deleted(ok):
             if ok:
                 self.blog_msg.setText("Blog deleted.")
                 # if we just deleted current blog, clear it
@@ -348,19 +683,10 @@ class Dashboard(QWidget):
                     self.current_blog_name = None
                     self.current_blog_label.setText("Current blog: (none)")
                     self.tabs.setTabEnabled(1, False)
-                self._list_blogs()
             else:
                 self._show_error("Blog not found to delete.")
-        except IllegalAccessException:
-            self._show_error("You must login first.")
-        except IllegalOperationException as e:
-            self._show_error(str(e))
-        except NoCurrentBlogException as e:
-            # in your A4 controller tests they may raise this when trying to
-            # delete the current blog
-            self._show_error(str(e))
-        except Exception as e:
-            self._show_error(str(e))
+
+        self._run(self.controller.delete_blog, blog_deleted, "Deleting blog...", bid)
 
     # ---------- POST TAB BUILD + HANDLERS ----------
 
@@ -378,6 +704,7 @@ class Dashboard(QWidget):
         self.post_search_edit = QLineEdit()
         self.post_search_edit.setPlaceholderText("part of title or text")
         search_row.addWidget(self.post_search_edit)
+        self._post_search_timer = self._search_timer(self.post_search_edit, self._search_posts_as_typed)
 
         self.btn_retrieve_posts = QPushButton("Retrieve posts")
         self.btn_retrieve_posts.clicked.connect(self._retrieve_posts)
@@ -389,10 +716,41 @@ class Dashboard(QWidget):
 
         layout.addLayout(search_row)
 
-        # QPlainTextEdit to show posts (list / retrieve)
-        self.posts_display = QPlainTextEdit()
-        self.posts_display.setReadOnly(True)
-        layout.addWidget(self.posts_display)
+        # archive by month of creation / latest updates
+        archive_row = QHBoxLayout()
+        archive_row.addWidget(QLabel("Archive:"))
+        self.post_archive_combo = QComboBox()
+        self.post_archive_combo.setMinimumWidth(160)
+        self.post_archive_combo.activated.connect(self._show_archive_month)
+        archive_row.addWidget(self.post_archive_combo)
+
+        self.btn_recent_posts = QPushButton("Recently updated")
+        self.btn_recent_posts.clicked.connect(self._recent_posts)
+        archive_row.addWidget(self.btn_recent_posts)
+        archive_row.addStretch()
+
+        layout.addLayout(archive_row)
+
+        # table to show posts (list / retrieve); rows are fetched lazily
+        self.posts_table = QTableView()
+        self.posts_table.setModel(self.posts_model)
+        self.posts_table.setSelectionBehavior(QTableView.SelectionBehavior.SelectRows)
+        self.posts_table.setSelectionMode(QTableView.SelectionMode.SingleSelection)
+        self.posts_table.setWordWrap(False)
+        # fixed row heights so Qt never measures rows that are not visible
+        self.posts_table.verticalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Fixed)
+        self.posts_table.horizontalHeader().setStretchLastSection(True)
+        self.posts_table.clicked.connect(self._load_selected_post_code)
+        self.posts_table.selectionModel().currentRowChanged.connect(self._preview_current_post)
+
+        # rendered preview of the selected post, next to the table
+        self.post_preview = QTextBrowser()
+        self.post_preview.setOpenExternalLinks(True)
+        self.post_preview.setPlaceholderText("Select a post to preview it")
+        splitter = QSplitter(Qt.Orientation.Horizontal)
+        splitter.addWidget(self.posts_table)
+        splitter.addWidget(self.post_preview)
+        layout.addWidget(splitter)
 
         # group box for creating posts
         create_group = QGroupBox("Create new post")
@@ -444,6 +802,10 @@ class Dashboard(QWidget):
         self.btn_delete_post.clicked.connect(self._delete_post)
         delete_form.addRow(self.btn_delete_post)
 
+        self.btn_delete_listed_posts = QPushButton("Delete all listed posts")
+        self.btn_delete_listed_posts.clicked.connect(self._delete_listed_posts)
+        delete_form.addRow(self.btn_delete_listed_posts)
+
         delete_group.setLayout(delete_form)
         layout.addWidget(delete_group)
 
@@ -451,49 +813,125 @@ class Dashboard(QWidget):
         self.post_msg = QLabel("")
         layout.addWidget(self.post_msg)
 
-    def _refresh_posts_display(self, posts):
-        # helper: show list of Post objects in the QPlainTextEdit
-        lines = []
-        for p in posts:
-            lines.append(f"Code: {p.code}")
-            lines.append(f"Title: {p.title}")
-            lines.append("Text:")
-            lines.append(p.text)
-            lines.append("-" * 40)
-        self.posts_display.setPlainText("\n".join(lines))
+    def _load_selected_post_code(self, index):
+        # clicking a row fills the code fields of the update/delete forms
+        post = self.posts_model.post_at(index.row())
+        if post is not None:
+            self.update_code_edit.setText(str(post.code))
+            self.delete_code_edit.setText(str(post.code))
+
+    def _preview_current_post(self, current, previous):
+        post = self.posts_model.post_at(current.row()) if current.isValid() else None
+        if post is None:
+            self._clear_preview()
+        else:
+            self._preview_post(post.code)
+
+    def _preview_post(self, code):
+        # the controller's render cache makes repeat views a lookup
+        self._preview_code = code
+        self._run_search("preview", self.controller.render_post, self._show_preview,
+                         "Rendering post...", code)
+
+    def _show_preview(self, html):
+        if html is None:
+            self._clear_preview()
+        else:
+            self.post_preview.setHtml(html)
+
+    def _clear_preview(self):
+        self._preview_code = None
+        self._cancel_search("preview")
+        self.post_preview.clear()
 
     def _list_posts(self):
-        try:
-            posts = self.controller.list_posts()
-            self._refresh_posts_display(posts)
-            self.post_msg.setText(f"Listed {len(posts)} post(s).")
-            if self.current_blog_name:
-                self.post_blog_label.setText(
-                    f"Posts for current blog: {self.current_blog_id} - {self.current_blog_name}"
-                )
-        except IllegalAccessException:
-            self._show_error("You must login first.")
-        except NoCurrentBlogException:
-            self._show_error("You must first select a current blog.")
-        except Exception as e:
-            self._show_error(str(e))
+        # the model pulls pages from the controller while scrolling
+        self._posts_search_key = None
+        self._posts_view = None
+        self._cancel_search("posts")
+        self._run(self.controller.count_posts, self._show_listed_posts, "Listing posts...")
+
+    def _show_listed_posts(self, total):
+        self.posts_model.set_source(total, self.controller.list_posts_page)
+        self.post_msg.setText(f"Listed {total} post(s).")
+        self._update_post_blog_label()
 
     def _retrieve_posts(self):
+        self._post_search_timer.stop()
         key = self.post_search_edit.text().strip()
-        try:
-            posts = self.controller.retrieve_posts(key)
-            self._refresh_posts_display(posts)
-            self.post_msg.setText(f"Retrieved {len(posts)} post(s).")
-            if self.current_blog_name:
-                self.post_blog_label.setText(
-                    f"Posts for current blog: {self.current_blog_id} - {self.current_blog_name}"
-                )
-        except IllegalAccessException:
-            self._show_error("You must login first.")
-        except NoCurrentBlogException:
-            self._show_error("You must first select a current blog.")
-        except Exception as e:
-            self._show_error(str(e))
+        self._posts_search_key = key
+        self._posts_view = None
+        self._run_search("posts", self.controller.retrieve_posts, self._show_retrieved_posts,
+                         "Searching posts...", key)
+
+    def _search_posts_as_typed(self):
+        # clearing the box goes back to the full (lazily fetched) listing
+        if self.post_search_edit.text().strip():
+            self._retrieve_posts()
+        else:
+            self._list_posts()
+
+    def _show_retrieved_posts(self, posts):
+        self.posts_model.set_posts(posts)
+        self.post_msg.setText(f"Retrieved {len(posts)} post(s).")
+        self._update_post_blog_label()
+
+    # ---------- archive / recently updated ----------
+
+    def _load_archive(self):
+        self._archive_reload_pending = False
+        if self.current_blog_id is not None:
+            self._run(self.controller.post_archive, self._show_archive, "Loading archive...")
+
+    def _show_archive(self, months):
+        selected = self.post_archive_combo.currentData()
+        self.post_archive_combo.clear()
+        for (year, month), count in reversed(months):
+            self.post_archive_combo.addItem(f"{year}-{month:02d} ({count})", (year, month))
+        i = self.post_archive_combo.findData(selected)
+        self.post_archive_combo.setCurrentIndex(i if i >= 0 else -1)
+
+    def _schedule_archive_reload(self):
+        if not self._archive_reload_pending:
+            self._archive_reload_pending = True
+            QTimer.singleShot(0, self._load_archive)
+
+    def _show_archive_month(self, index):
+        year, month = self.post_archive_combo.itemData(index)
+        start = datetime(year, month, 1)
+        end = datetime(year + month // 12, month % 12 + 1, 1)
+        self._posts_view = ("archive", start, end)
+        self._load_posts_view()
+
+    def _recent_posts(self):
+        self._posts_view = ("recent",)
+        self._load_posts_view()
+
+    def _posts_view_call(self):
+        """Controller call (and its arguments) producing the current view."""
+        if self._posts_view[0] == "archive":
+            return self.controller.posts_created_between, self._posts_view[1:]
+        return self.controller.recently_updated_posts, (self.RECENT_POSTS,)
+
+    def _load_posts_view(self):
+        self._posts_search_key = None
+        self._cancel_search("posts")
+        fn, args = self._posts_view_call()
+        self._run(fn, self._show_posts_view, "Loading posts...", *args)
+
+    def _show_posts_view(self, posts):
+        self.posts_model.set_posts(posts)
+        if self._posts_view[0] == "archive":
+            self.post_msg.setText(f"{len(posts)} post(s) created in {self._posts_view[1]:%Y-%m}.")
+        else:
+            self.post_msg.setText(f"{len(posts)} most recently updated post(s).")
+        self._update_post_blog_label()
+
+    def _update_post_blog_label(self):
+        if self.current_blog_name:
+            self.post_blog_label.setText(
+                f"Posts for current blog: {self.current_blog_id} - {self.current_blog_name}"
+            )
 
     def _create_post(self):
         title = self.post_title_edit.text().strip()
@@ -503,19 +941,15 @@ class Dashboard(QWidget):
             self._show_error("Title and text must not be empty.")
             return
 
-        try:
-            p = self.controller.create_post(title, text)
+        def post_created(p):
+            if p is None:
+                self._show_error("Post could not be saved.")
+                return
             self.post_msg.setText(f"Post created with code {p.code}.")
             self.post_title_edit.clear()
             self.post_text_edit.clear()
-            # refresh list to show new post
-            self._list_posts()
-        except IllegalAccessException:
-            self._show_error("You must login first.")
-        except NoCurrentBlogException:
-            self._show_error("You must first select a current blog.")
-        except Exception as e:
-            self._show_error(str(e))
+
+        self._run(self.controller.create_post, post_created, "Creating post...", title, text)
 
     def _update_post(self):
         try:
@@ -531,19 +965,13 @@ class Dashboard(QWidget):
             self._show_error("New title and text must not be empty.")
             return
 
-        try:
-            ok = self.controller.update_post(code, title, text)
+        def post_updated(ok):
             if ok:
                 self.post_msg.setText("Post updated.")
-                self._list_posts()
             else:
                 self._show_error("Post not found to update.")
-        except IllegalAccessException:
-            self._show_error("You must login first.")
-        except NoCurrentBlogException:
-            self._show_error("You must first select a current blog.")
-        except Exception as e:
-            self._show_error(str(e))
+
+        self._run(self.controller.update_post, post_updated, "Updating post...", code, title, text)
 
     def _delete_post(self):
         try:
@@ -552,18 +980,226 @@ class Dashboard(QWidget):
             self._show_error("Post code must be an integer.")
             return
 
-        try:
-            ok = self.controller.delete_post(code)
+        def post_deleted(ok):
             if ok:
                 self.post_msg.setText("Post deleted.")
-                self._list_posts()
             else:
                 self._show_error("Post not found to delete.")
-        except IllegalAccessException:
+
+        self._run(self.controller.delete_post, post_deleted, "Deleting post...", code)
+
+    def _delete_listed_posts(self):
+        count = self.posts_model.total()
+        if count == 0:
+            self._show_error("There are no listed posts to delete.")
+            return
+        confirm = QMessageBox.question(self, "Delete posts", f"Delete all {count} listed post(s)?")
+        if confirm != QMessageBox.StandardButton.Yes:
+            return
+
+        key = self._posts_search_key
+        view = self._posts_view_call() if self._posts_view else None
+
+        def delete_listed(progress):
+            # runs on the pool thread; one transaction, rolled back on cancel
+            if view:
+                posts = view[0](*view[1])
+            else:
+                posts = self.controller.retrieve_posts(key) if key else self.controller.list_posts()
+            return self.controller.delete_posts([p.code for p in posts], progress=progress)
+
+        def posts_deleted(deleted):
+            self.post_msg.setText(f"Deleted {deleted} post(s).")
+
+        self._run(delete_listed, posts_deleted, "Deleting posts...")
+
+    # ---------- mutation events ----------
+
+    @staticmethod
+    def _matches(key, *fields):
+        # same test as the controller's retrieve_* searches
+        key = key.lower()
+        return any(key in str(f).lower() for f in fields)
+
+    def _apply_mutation(self, event):
+        """Apply one controller change to the tables, row by row."""
+        kind = event.kind
+        if kind == MutationEvent.RESET:
+            self._reload_tables()
+        elif kind == MutationEvent.BLOG_CREATED:
+            b = event.blog
+            key = self._blogs_search_key
+            if key and self.blog_fuzzy_check.isChecked():
+                # the ranking may change
+                self._retrieve_blogs()
+            elif not key or self._matches(key, b.id, b.name, b.url, b.email):
+                self.blogs_model.append_blog(b)
+        elif kind == MutationEvent.BLOG_UPDATED:
+            b = event.blog
+            key = self._blogs_search_key
+            if key and self.blog_fuzzy_check.isChecked():
+                # the ranking may change
+                self._retrieve_blogs()
+            elif key and not self._matches(key, b.id, b.name, b.url, b.email):
+                # no longer a search result
+                self.blogs_model.remove_blog(event.old_id)
+            elif not self.blogs_model.replace_blog(event.old_id, b) and key:
+                # a new search result: search again to keep the list order
+                self._retrieve_blogs()
+        elif kind == MutationEvent.BLOG_DELETED:
+            self.blogs_model.remove_blog(event.blog_id)
+        else:
+            self.blogs_model.refresh_blog(event.blog_id)
+            if event.blog_id == self.current_blog_id:
+                self._apply_post_mutation(event)
+
+    def _apply_post_mutation(self, event):
+        post = event.post
+        key = self._posts_search_key
+        self._schedule_archive_reload()
+        if post.code == self._preview_code:
+            if event.kind == MutationEvent.POST_UPDATED:
+                self._preview_post(post.code)
+            elif event.kind == MutationEvent.POST_DELETED:
+                self._clear_preview()
+        if self._posts_view is not None:
+            # time-based views are cheap to query again
+            self._schedule_posts_reload()
+            return
+        if event.kind == MutationEvent.POST_CREATED:
+            if not key:
+                # newest post first: new codes are always the largest
+                self.posts_model.insert_post(0, post)
+            elif self._matches(key, post.title, post.text):
+                # search results are in ascending code order
+                self.posts_model.insert_post(self.posts_model.total(), post)
+        elif event.kind == MutationEvent.POST_UPDATED:
+            # posts are updated in place, so a cached row only needs
+            # redrawing, unless the change moved it in or out of the search
+            if key and not self._matches(key, post.title, post.text):
+                self.posts_model.remove_post(post.code)
+            elif not self.posts_model.refresh_post(post.code) and key:
+                # a new search result: search again to keep the code order
+                self._schedule_posts_reload()
+        elif event.kind == MutationEvent.POST_DELETED:
+            if not self.posts_model.remove_post(post.code) and \
+                    (not key or self._matches(key, post.title, post.text)):
+                # deleted row not cached: reload the listing rather than guess
+                self._schedule_posts_reload()
+
+    def _schedule_posts_reload(self):
+        # several events in a row cause a single reload
+        if not self._posts_reload_pending:
+            self._posts_reload_pending = True
+            QTimer.singleShot(0, self._reload_posts)
+
+    def _reload_posts(self):
+        self._posts_reload_pending = False
+        if self.current_blog_id is None:
+            return
+        if self._posts_view is not None:
+            self._load_posts_view()
+        elif self._posts_search_key:
+            self._retrieve_posts()
+        else:
+            self._list_posts()
+
+    def _reload_tables(self):
+        if self._blogs_search_key:
+            self._retrieve_blogs()
+        else:
+            self._list_blogs()
+        if self.current_blog_id is not None:
+            self._load_archive()
+            if self._posts_view is not None:
+                self._load_posts_view()
+            elif self._posts_search_key:
+                self._retrieve_posts()
+            else:
+                self._list_posts()
+
+    # ---------- search as you type ----------
+
+    def _search_timer(self, edit, search):
+        """Single-shot timer running search once typing in edit pauses."""
+        timer = QTimer(self)
+        timer.setSingleShot(True)
+        timer.setInterval(self.SEARCH_DELAY_MS)
+        timer.timeout.connect(search)
+        # every keystroke restarts the timer, so only the last one searches
+        edit.textChanged.connect(lambda _: timer.start())
+        return timer
+
+    def _run_search(self, name, fn, on_result, label, key):
+        """
+        Run a search for the named table, cancelling the one it replaces.
+        A replaced search that already finished has its result dropped, so
+        the table always shows the latest query.
+        """
+        self._cancel_search(name)
+
+        def show(result):
+            if self._searches.get(name) is worker:
+                on_result(result)
+
+        worker = self._run(fn, show, label, key)
+        self._searches[name] = worker
+
+    def _cancel_search(self, name):
+        worker = self._searches.pop(name, None)
+        if worker is not None:
+            worker.cancel()
+
+    # ---------- background execution ----------
+
+    def _run(self, fn, on_result, label, *args):
+        """
+        Run a controller call on the worker pool and hand its result to
+        on_result on the GUI thread. The pool has a single thread, so
+        controller calls still happen one at a time and in order.
+        Returns the worker.
+        """
+        worker = Worker(fn, *args)
+        worker.signals.result.connect(on_result)
+        worker.signals.error.connect(self._handle_error)
+        worker.signals.progress.connect(self._show_progress)
+        worker.signals.finished.connect(lambda: self._worker_finished(worker))
+        self._workers.append(worker)
+
+        self.busy_label.setText(label)
+        self.progress_bar.setRange(0, 0)  # busy indicator until progress arrives
+        self.progress_bar.show()
+        self.btn_cancel.show()
+        self.pool.start(worker)
+        return worker
+
+    def _run_page_fetch(self, fn, args, on_result, on_finished):
+        worker = self._run(fn, on_result, "Loading posts...", *args)
+        worker.signals.finished.connect(on_finished)
+
+    def _show_progress(self, done, total):
+        self.progress_bar.setRange(0, total)
+        self.progress_bar.setValue(done)
+
+    def _worker_finished(self, worker):
+        if worker in self._workers:
+            self._workers.remove(worker)
+        if not self._workers:
+            self.busy_label.setText("")
+            self.progress_bar.hide()
+            self.btn_cancel.hide()
+
+    def _cancel_running(self):
+        for worker in self._workers:
+            worker.cancel()
+        self.busy_label.setText("Cancelling...")
+
+    def _handle_error(self, e):
+        if isinstance(e, IllegalAccessException):
             self._show_error("You must login first.")
-        except NoCurrentBlogException:
+        elif isinstance(e, NoCurrentBlogException):
             self._show_error("You must first select a current blog.")
-        except Exception as e:
+        else:
             self._show_error(str(e))
 
     # ---------- helpers ----------
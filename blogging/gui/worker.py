@@ -0,0 +1,71 @@
+# blogging/gui/worker.py
+# runs controller calls on a QThreadPool so the window never blocks
+
+import inspect
+
+from PyQt6.QtCore import QObject, QRunnable, pyqtSignal
+
+from blogging.exception.operation_cancelled_exception import OperationCancelledException
+
+
+class WorkerSignals(QObject):
+    # QRunnable is not a QObject, so the signals live here. Qt queues them
+    # to the main thread because this object is created there.
+    result = pyqtSignal(object)
+    error = pyqtSignal(object)
+    progress = pyqtSignal(int, int)
+    finished = pyqtSignal()
+
+
+class Worker(QRunnable):
+    """
+    Runs fn(*args, **kwargs) on a pool thread and reports back via signals.
+
+    If fn accepts a `progress` keyword it is given a callback
+    progress(done, total); calling it emits the progress signal and raises
+    OperationCancelledException once cancel() was called, so long loops
+    (run inside a controller transaction) stop and roll back. A cancelled
+    worker never emits result or error.
+    """
+
+    def __init__(self, fn, *args, **kwargs):
+        super().__init__()
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.signals = WorkerSignals()
+        self._cancelled = False
+
+        try:
+            accepts_progress = "progress" in inspect.signature(fn).parameters
+        except (TypeError, ValueError):
+            accepts_progress = False
+        if accepts_progress:
+            self.kwargs["progress"] = self._report_progress
+
+    def cancel(self):
+        self._cancelled = True
+
+    def is_cancelled(self):
+        return self._cancelled
+
+    def _report_progress(self, done, total):
+        if self._cancelled:
+            raise OperationCancelledException()
+        self.signals.progress.emit(done, total)
+
+    def run(self):
+        try:
+            if self._cancelled:
+                return
+            result = self.fn(*self.args, **self.kwargs)
+        except OperationCancelledException:
+            pass
+        except Exception as e:
+            if not self._cancelled:
+                self.signals.error.emit(e)
+        else:
+            if not self._cancelled:
+                self.signals.result.emit(result)
+        finally:
+            self.signals.finished.emit()
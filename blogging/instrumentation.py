@@ -0,0 +1,194 @@
+import bisect
+import functools
+import threading
+import time
+
+
+class OperationStats:
+    """Call count, latency histogram and I/O bytes of one operation."""
+
+    # upper bounds of the latency buckets, in seconds (1-2-5 series)
+    BUCKETS = tuple(m * 10 ** e for e in range(-6, 1) for m in (1, 2, 5)) + (10.0, float("inf"))
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.buckets = [0] * len(self.BUCKETS)
+        self.bytes_read = 0
+        self.bytes_written = 0
+
+    def record(self, elapsed):
+        self.count += 1
+        self.total += elapsed
+        if elapsed > self.max:
+            self.max = elapsed
+        self.buckets[bisect.bisect_left(self.BUCKETS, elapsed)] += 1
+
+    def quantile(self, q):
+        """Upper bound of the bucket holding the q-th quantile."""
+        if self.count == 0:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for bound, n in zip(self.BUCKETS, self.buckets):
+            seen += n
+            if seen >= rank:
+                return min(bound, self.max)
+        return self.max
+
+    def as_dict(self):
+        return {
+            "count": self.count,
+            "total_s": self.total,
+            "mean_us": self.total / self.count * 1e6 if self.count else 0.0,
+            "p50_us": self.quantile(0.5) * 1e6,
+            "p90_us": self.quantile(0.9) * 1e6,
+            "p99_us": self.quantile(0.99) * 1e6,
+            "max_us": self.max * 1e6,
+            "bytes_read": self.bytes_read,
+            "bytes_written": self.bytes_written,
+            "buckets": {("+Inf" if b == float("inf") else repr(b)): n
+                        for b, n in zip(self.BUCKETS, self.buckets)},
+        }
+
+
+class Instrumentation:
+    """
+    Opt-in timing of Controller and DAO methods.
+
+    Classes register with the @instrumented class decorator. Nothing is
+    wrapped until enable() is called, and disable() puts the original
+    methods back, so a disabled build runs exactly the undecorated code.
+    The only check left on the hot path is the enabled flag in add_bytes().
+
+    Bytes reported by the DAOs are added to every operation that is running
+    on the current thread, so controller.create_post shows the bytes its
+    post_dao.write wrote.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self._classes = []
+        self._originals = {}
+        self._ops = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    # ---------- registration ----------
+
+    def register(self, cls, prefix, include=(), exclude=()):
+        """Time every public method of cls plus the names in include."""
+        names = [n for n, v in vars(cls).items()
+                 if callable(v) and (not n.startswith("_") or n in include) and n not in exclude]
+        self._classes.append((cls, prefix, names))
+        if self.enabled:
+            self._wrap_class(cls, prefix, names)
+
+    def enable(self):
+        with self._lock:
+            if self.enabled:
+                return
+            for cls, prefix, names in self._classes:
+                self._wrap_class(cls, prefix, names)
+            self.enabled = True
+
+    def disable(self):
+        with self._lock:
+            if not self.enabled:
+                return
+            for (cls, name), fn in self._originals.items():
+                setattr(cls, name, fn)
+            self._originals = {}
+            self.enabled = False
+
+    def reset(self):
+        with self._lock:
+            self._ops = {}
+
+    # ---------- recording ----------
+
+    def _stack(self):
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def _op(self, name):
+        op = self._ops.get(name)
+        if op is None:
+            op = self._ops.setdefault(name, OperationStats())
+        return op
+
+    def _wrap_class(self, cls, prefix, names):
+        for name in names:
+            fn = vars(cls)[name]
+            self._originals[(cls, name)] = fn
+            setattr(cls, name, self._wrap(f"{prefix}.{name.lstrip('_')}", fn))
+
+    def _wrap(self, op_name, fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            stack = self._stack()
+            stack.append(op_name)
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - start
+                stack.pop()
+                with self._lock:
+                    self._op(op_name).record(elapsed)
+        return wrapper
+
+    def add_bytes(self, read=0, written=0):
+        """Charge disk I/O to the operations running on this thread."""
+        if not self.enabled:
+            return
+        with self._lock:
+            for name in set(self._stack()):
+                op = self._op(name)
+                op.bytes_read += read
+                op.bytes_written += written
+
+    # ---------- reporting ----------
+
+    def snapshot(self):
+        """Plain dict {operation: stats} safe to keep after more calls."""
+        with self._lock:
+            return {name: op.as_dict() for name, op in sorted(self._ops.items())}
+
+    def prometheus(self, prefix="blogging"):
+        """Prometheus text exposition format of the current statistics."""
+        with self._lock:
+            ops = sorted(self._ops.items())
+            lines = [
+                f"# HELP {prefix}_operation_seconds Latency of controller and DAO operations.",
+                f"# TYPE {prefix}_operation_seconds histogram",
+            ]
+            for name, op in ops:
+                cumulative = 0
+                for bound, n in zip(op.BUCKETS, op.buckets):
+                    cumulative += n
+                    le = "+Inf" if bound == float("inf") else repr(bound)
+                    lines.append(f'{prefix}_operation_seconds_bucket{{op="{name}",le="{le}"}} {cumulative}')
+                lines.append(f'{prefix}_operation_seconds_sum{{op="{name}"}} {op.total!r}')
+                lines.append(f'{prefix}_operation_seconds_count{{op="{name}"}} {op.count}')
+            for metric, attr, text in (("read", "bytes_read", "read from"), ("written", "bytes_written", "written to")):
+                lines.append(f"# HELP {prefix}_operation_bytes_{metric}_total Bytes {text} disk during the operation.")
+                lines.append(f"# TYPE {prefix}_operation_bytes_{metric}_total counter")
+                for name, op in ops:
+                    lines.append(f'{prefix}_operation_bytes_{metric}_total{{op="{name}"}} {getattr(op, attr)}')
+        return "\n".join(lines) + "\n"
+
+
+# process-wide registry used by the Controller and the DAOs
+registry = Instrumentation()
+
+
+def instrumented(prefix, include=(), exclude=()):
+    """Class decorator registering the class's methods with the registry."""
+    def register(cls):
+        registry.register(cls, prefix, include, exclude)
+        return cls
+    return register
@@ -0,0 +1,208 @@
+import os
+import threading
+from collections import OrderedDict
+
+import markdown
+
+from blogging.dao.atomic_writer import atomic_write
+from blogging.event import MutationEvent
+
+
+class RenderCache:
+    """
+    Markdown-rendered HTML of post texts, keyed by blog id, post code and
+    the post's update time.
+
+    - memory tier: (blog id, code) -> (update, html), least recently used
+      entries evicted once the HTML held exceeds memory_limit characters;
+      a repeat view is one dictionary lookup
+    - disk tier (when path is given): <path>/<blog id>/<code>.html, whose
+      first line records the update time it was rendered from; least
+      recently used files evicted once they exceed disk_limit bytes
+
+    An entry rendered from an older update time is never returned, so a
+    stale entry is only wasted space. on_mutation (a Controller listener)
+    drops the entries of updated and deleted posts and deleted blogs
+    right away.
+    """
+
+    def __init__(self, memory_limit=8 * 1024 * 1024, path=None, disk_limit=64 * 1024 * 1024):
+        self.memory_limit = memory_limit
+        self.path = path
+        self.disk_limit = disk_limit
+
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        self._memory = OrderedDict()
+        self._memory_size = 0
+        # relative file name -> size, least recently used first; loaded
+        # from the directory on first use
+        self._disk = None
+        self._disk_size = 0
+        self._lock = threading.Lock()
+        # Markdown converters are not thread safe; one per thread
+        self._local = threading.local()
+
+    # ---------- lookups ----------
+
+    def render(self, blog_id, post):
+        """HTML of post.text, from the cache if rendered since its last update."""
+        key = (blog_id, post.code)
+        stamp = post.update.isoformat()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None and entry[0] == stamp:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+
+        html = self._read_disk(key, stamp)
+        if html is not None:
+            with self._lock:
+                self.disk_hits += 1
+        else:
+            html = self._convert(post.text)
+            with self._lock:
+                self.misses += 1
+            self._write_disk(key, stamp, html)
+
+        with self._lock:
+            self._store(key, stamp, html)
+        return html
+
+    def _convert(self, text):
+        md = getattr(self._local, "md", None)
+        if md is None:
+            md = self._local.md = markdown.Markdown()
+        md.reset()
+        return md.convert(text)
+
+    def _store(self, key, stamp, html):
+        old = self._memory.pop(key, None)
+        if old is not None:
+            self._memory_size -= len(old[1])
+        if len(html) > self.memory_limit:
+            return
+        self._memory[key] = (stamp, html)
+        self._memory_size += len(html)
+        while self._memory_size > self.memory_limit:
+            _, (_, evicted) = self._memory.popitem(last=False)
+            self._memory_size -= len(evicted)
+
+    # ---------- invalidation ----------
+
+    def invalidate(self, blog_id, code=None):
+        """Drop the entries of one post, or of every post of blog_id."""
+        with self._lock:
+            keys = [k for k in self._memory if k[0] == blog_id and (code is None or k[1] == code)]
+            for key in keys:
+                self._memory_size -= len(self._memory.pop(key)[1])
+        if self.path is None:
+            return
+        if code is None:
+            self._remove_disk(lambda name: name.startswith(f"{blog_id}{os.sep}"))
+        else:
+            name = self._file_name((blog_id, code))
+            self._remove_disk(lambda n: n == name)
+
+    def clear(self):
+        """Drop the memory tier (disk entries check their update time)."""
+        with self._lock:
+            self._memory.clear()
+            self._memory_size = 0
+
+    def on_mutation(self, event):
+        kind = event.kind
+        if kind in (MutationEvent.POST_UPDATED, MutationEvent.POST_DELETED):
+            self.invalidate(event.blog_id, event.post.code)
+        elif kind == MutationEvent.BLOG_DELETED:
+            self.invalidate(event.blog_id)
+        elif kind == MutationEvent.BLOG_UPDATED and event.old_id != event.blog_id:
+            self.invalidate(event.old_id)
+        elif kind == MutationEvent.RESET:
+            self.clear()
+
+    # ---------- disk tier ----------
+
+    @staticmethod
+    def _file_name(key):
+        return os.path.join(str(key[0]), f"{key[1]}.html")
+
+    def _load_disk(self):
+        """Index the files already on disk, oldest modification first."""
+        files = []
+        for root, _, names in os.walk(self.path):
+            for name in names:
+                if not name.endswith(".html"):
+                    continue
+                full = os.path.join(root, name)
+                try:
+                    st = os.stat(full)
+                except FileNotFoundError:
+                    continue
+                files.append((st.st_mtime, os.path.relpath(full, self.path), st.st_size))
+        files.sort()
+        self._disk = OrderedDict((name, size) for _, name, size in files)
+        self._disk_size = sum(self._disk.values())
+
+    def _read_disk(self, key, stamp):
+        if self.path is None:
+            return None
+        name = self._file_name(key)
+        try:
+            with open(os.path.join(self.path, name), "r", encoding="utf-8") as f:
+                header = f.readline()
+                if header != f"<!-- {stamp} -->\n":
+                    return None
+                html = f.read()
+        except FileNotFoundError:
+            return None
+        with self._lock:
+            if self._disk is None:
+                self._load_disk()
+            if name in self._disk:
+                self._disk.move_to_end(name)
+        return html
+
+    def _write_disk(self, key, stamp, html):
+        if self.path is None:
+            return
+        name = self._file_name(key)
+        full = os.path.join(self.path, name)
+        try:
+            os.makedirs(os.path.dirname(full), exist_ok=True)
+            # a lost cache file is simply rendered again
+            size = atomic_write(full, lambda f: f.write(f"<!-- {stamp} -->\n{html}"), durability="none")
+        except OSError:
+            return
+        evicted = []
+        with self._lock:
+            if self._disk is None:
+                self._load_disk()
+            self._disk_size -= self._disk.pop(name, 0)
+            self._disk[name] = size
+            self._disk_size += size
+            while self._disk_size > self.disk_limit and self._disk:
+                old, old_size = self._disk.popitem(last=False)
+                self._disk_size -= old_size
+                evicted.append(old)
+        for old in evicted:
+            self._unlink(old)
+
+    def _remove_disk(self, matches):
+        with self._lock:
+            if self._disk is None:
+                self._load_disk()
+            names = [n for n in self._disk if matches(n)]
+            for name in names:
+                self._disk_size -= self._disk.pop(name)
+        for name in names:
+            self._unlink(name)
+
+    def _unlink(self, name):
+        try:
+            os.remove(os.path.join(self.path, name))
+        except OSError:
+            pass
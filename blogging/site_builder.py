@@ -0,0 +1,246 @@
+import hashlib
+import html
+import json
+import os
+import pickle
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import markdown
+
+from blogging.configuration import Configuration
+from blogging.dao import atomic_writer
+from blogging.dao.atomic_writer import atomic_write
+from blogging.feed import atom_entry, atom_feed, rss_feed, rss_item
+from blogging.post import Post
+
+
+PAGE = """<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>{title}</title>
+</head>
+<body>
+{body}
+</body>
+</html>
+"""
+
+# one Markdown converter per process (reset between posts)
+_md = None
+
+
+def _render_chunk(job):
+    """Render and write the pages of some posts of one blog; returns their number."""
+    global _md
+    if _md is None:
+        _md = markdown.Markdown()
+    out_dir, blog_name, posts = job
+    for code, title, text, creation, update in posts:
+        _md.reset()
+        body = (f'<p><a href="index.html">{html.escape(blog_name)}</a></p>\n'
+                f'<h1>{html.escape(title)}</h1>\n'
+                f'<p>Posted {creation:%Y-%m-%d %H:%M}, updated {update:%Y-%m-%d %H:%M}</p>\n'
+                f'{_md.convert(text)}')
+        with open(os.path.join(out_dir, f"{code}.html"), "w", encoding="utf-8") as f:
+            f.write(PAGE.format(title=html.escape(title), body=body))
+    return len(posts)
+
+
+class SiteBuilder:
+    """
+    Renders every blog and post to static HTML with Markdown.
+
+        site/index.html               every blog
+        site/<blog id>/index.html     the posts of a blog, newest first
+        site/<blog id>/<code>.html    one post
+        site/<blog id>/atom.xml       Atom and RSS feeds of the latest
+        site/<blog id>/rss.xml        Configuration.feed_size posts
+        site/manifest.json            what the pages were built from
+
+    Builds are incremental. The manifest keeps, per blog, a hash of its
+    name/url/email, the stat (inode, mtime, size) of its record file and,
+    per post, its update time and a hash of its contents:
+    - a blog whose metadata and record file are unchanged is skipped
+      without reading the record file
+    - otherwise only new and changed posts are rendered (all of them if
+      the blog's metadata changed, since post pages show the blog name),
+      pages of deleted posts are removed and the blog's index and feeds
+      are rewritten
+    - site/index.html is rewritten only if a blog was added, removed or
+      changed its metadata
+    Post pages are rendered by a pool of jobs processes, CHUNK_SIZE posts
+    per task. Reads work directly on blogs.json and the record files, like
+    the JSON lines export.
+    """
+
+    MANIFEST_VERSION = 1
+    CHUNK_SIZE = 256
+    # record files changed less than this many seconds before a build may
+    # still change within the same mtime tick; their stat is not trusted
+    RACY_SECONDS = 2.0
+
+    def __init__(self, output_path=None, blogs_file=None, records_path=None):
+        cfg = Configuration()
+        self.output_path = output_path or cfg.__class__.site_path
+        self.blogs_file = blogs_file or cfg.__class__.blogs_file
+        self.records_path = records_path or cfg.__class__.records_path
+        self.ext = cfg.__class__.records_extension
+        self.feed_size = cfg.__class__.feed_size
+        self.manifest_file = os.path.join(self.output_path, "manifest.json")
+
+    # ---------- manifest ----------
+
+    def _load_manifest(self):
+        try:
+            with open(self.manifest_file, "r", encoding="utf-8") as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        if manifest.get("version") != self.MANIFEST_VERSION:
+            return {}
+        return manifest.get("blogs", {})
+
+    def _save_manifest(self, blogs):
+        manifest = {"version": self.MANIFEST_VERSION, "built": time.strftime("%Y-%m-%dT%H:%M:%S"), "blogs": blogs}
+        atomic_write(self.manifest_file, lambda f: json.dump(manifest, f), durability="none")
+
+    @staticmethod
+    def _hash(*fields):
+        h = hashlib.sha1()
+        for field in fields:
+            h.update(str(field).encode("utf-8"))
+            h.update(b"\0")
+        return h.hexdigest()
+
+    def _record_stat(self, record_file, now):
+        try:
+            st = os.stat(record_file)
+        except FileNotFoundError:
+            return None
+        if now - st.st_mtime < self.RACY_SECONDS:
+            return None
+        return [st.st_ino, st.st_mtime_ns, st.st_size]
+
+    # ---------- building ----------
+
+    def build(self, jobs=None, force=False):
+        """
+        Bring the site up to date (or rebuild everything if force is set).
+        Returns counts of blogs, posts, rendered and removed posts, and
+        skipped blogs.
+        """
+        atomic_writer.sync()
+        jobs = jobs or os.cpu_count() or 1
+        old = {} if force else self._load_manifest()
+        with open(self.blogs_file, "r", encoding="utf-8") as f:
+            blogs = json.load(f)
+        if isinstance(blogs, dict):
+            blogs = [blogs]
+        os.makedirs(self.output_path, exist_ok=True)
+
+        stats = {"blogs": len(blogs), "posts": 0, "rendered": 0, "removed": 0, "skipped_blogs": 0}
+        pool = ProcessPoolExecutor(jobs) if jobs > 1 else None
+        pending = []
+        manifest = {}
+        now = time.time()
+        try:
+            for blog in blogs:
+                key = str(blog["id"])
+                entry = self._build_blog(blog, old.get(key), now, pool, pending, stats)
+                manifest[key] = entry
+                stats["posts"] += len(entry["posts"])
+                # bound the posts waiting in the pool
+                while len(pending) > 4 * jobs:
+                    stats["rendered"] += pending.pop(0).result()
+            for future in pending:
+                stats["rendered"] += future.result()
+        finally:
+            if pool is not None:
+                pool.shutdown()
+
+        for key in old.keys() - manifest.keys():
+            shutil.rmtree(os.path.join(self.output_path, key), ignore_errors=True)
+        site_index = os.path.join(self.output_path, "index.html")
+        if old.keys() != manifest.keys() or not os.path.exists(site_index) or \
+                any(old[key]["meta"] != manifest[key]["meta"] for key in manifest):
+            self._write_site_index(blogs)
+
+        self._save_manifest(manifest)
+        return stats
+
+    def _build_blog(self, blog, old, now, pool, pending, stats):
+        """Update the pages of one blog; returns its new manifest entry."""
+        meta = self._hash(blog["id"], blog["name"], blog["url"], blog["email"])
+        record_file = os.path.join(self.records_path, f"{blog['id']}{self.ext}")
+        record = self._record_stat(record_file, now)
+        if old is not None and record is not None and old["meta"] == meta and old["record"] == record:
+            stats["skipped_blogs"] += 1
+            return old
+
+        posts = []
+        if os.path.exists(record_file):
+            with open(record_file, "rb") as f:
+                posts = pickle.load(f)
+        posts = sorted((p for p in posts if isinstance(p, Post)), key=lambda p: p.code)
+
+        out_dir = os.path.join(self.output_path, str(blog["id"]))
+        os.makedirs(out_dir, exist_ok=True)
+        old_posts = {} if old is None or old["meta"] != meta else old["posts"]
+        entries = {}
+        changed = []
+        for p in posts:
+            update = p.update.isoformat()
+            entry = [update, self._hash(p.title, p.text, p.creation.isoformat(), update)]
+            entries[str(p.code)] = entry
+            if old_posts.get(str(p.code)) != entry:
+                changed.append((p.code, p.title, p.text, p.creation, p.update))
+
+        removed = [] if old is None else [code for code in old["posts"] if code not in entries]
+        for code in removed:
+            try:
+                os.remove(os.path.join(out_dir, f"{code}.html"))
+            except FileNotFoundError:
+                pass
+        stats["removed"] += len(removed)
+
+        for i in range(0, len(changed), self.CHUNK_SIZE):
+            job = (out_dir, blog["name"], changed[i:i + self.CHUNK_SIZE])
+            if pool is None:
+                stats["rendered"] += _render_chunk(job)
+            else:
+                pending.append(pool.submit(_render_chunk, job))
+
+        if changed or removed or old is None or old["meta"] != meta or \
+                not os.path.exists(os.path.join(out_dir, "index.html")):
+            self._write_blog_index(blog, posts, out_dir)
+            self._write_feeds(blog, posts, out_dir)
+        return {"meta": meta, "record": record, "posts": entries}
+
+    # ---------- index pages ----------
+
+    def _write_blog_index(self, blog, posts, out_dir):
+        items = "\n".join(f'<li><a href="{p.code}.html">{html.escape(p.title)}</a> '
+                          f'({p.creation:%Y-%m-%d})</li>' for p in reversed(posts))
+        body = (f'<p><a href="../index.html">All blogs</a></p>\n'
+                f'<h1>{html.escape(blog["name"])}</h1>\n'
+                f'<p>{html.escape(blog["url"])} &middot; {html.escape(blog["email"])}</p>\n'
+                f'<ul>\n{items}\n</ul>')
+        page = PAGE.format(title=html.escape(blog["name"]), body=body)
+        atomic_write(os.path.join(out_dir, "index.html"), lambda f: f.write(page), durability="none")
+
+    def _write_feeds(self, blog, posts, out_dir):
+        latest = posts[:-self.feed_size - 1:-1] if self.feed_size else []
+        bodies = [markdown.markdown(p.text) for p in latest]
+        atom = atom_feed(blog["id"], blog["name"], blog["email"], max((p.update for p in latest), default=None),
+                         [atom_entry(blog["id"], p, h) for p, h in zip(latest, bodies)])
+        rss = rss_feed(blog["id"], blog["name"], blog["url"], [rss_item(blog["id"], p, h) for p, h in zip(latest, bodies)])
+        atomic_write(os.path.join(out_dir, "atom.xml"), lambda f: f.write(atom), durability="none")
+        atomic_write(os.path.join(out_dir, "rss.xml"), lambda f: f.write(rss), durability="none")
+
+    def _write_site_index(self, blogs):
+        items = "\n".join(f'<li><a href="{b["id"]}/index.html">{html.escape(b["name"])}</a></li>' for b in blogs)
+        page = PAGE.format(title="Blogs", body=f"<h1>Blogs</h1>\n<ul>\n{items}\n</ul>")
+        atomic_write(os.path.join(self.output_path, "index.html"), lambda f: f.write(page), durability="none")
@@ -0,0 +1,71 @@
+class Transaction:
+    """
+    Groups several controller mutations so they are persisted together.
+
+    While a transaction is active the DAOs keep their changes in memory.
+    commit() writes every touched file once (post records first, then
+    blogs.json, each with an atomic replace); rollback() undoes the
+    in-memory changes so nothing from the transaction is ever written.
+
+    If a write in commit() fails, the record files already written are
+    written back as they were at begin() and everything else is undone in
+    memory, so memory and disk agree again. Each file is replaced
+    atomically, the commit as a whole is not: a crash in the middle can
+    leave record files newer than blogs.json (BlogDAOJSON recomputes
+    their summaries on load), and record files of blogs created in the
+    transaction stay behind as orphans for the RecordReclaimer.
+    """
+
+    def __init__(self, blog_dao):
+        self.blog_dao = blog_dao
+        self.active = False
+        self._post_daos = {}
+
+    def begin(self):
+        self.blog_dao.begin()
+        self._post_daos = {}
+        self.active = True
+
+    def track(self, post_dao):
+        """Buffer writes of post_dao until the transaction ends."""
+        if self.active and id(post_dao) not in self._post_daos:
+            post_dao.begin()
+            self._post_daos[id(post_dao)] = post_dao
+
+    def commit(self):
+        daos = list(self._post_daos.values())
+        done = 0
+        try:
+            for dao in daos:
+                dao.commit()
+                done += 1
+            self.blog_dao.commit()
+        except BaseException:
+            # record files written already are written back, whatever has
+            # not been written yet is undone in memory
+            for dao in daos[:done]:
+                try:
+                    dao.revert()
+                except OSError:
+                    # the posts are back in memory and the file is marked
+                    # unsaved; the commit's own error is the one to report
+                    pass
+            for dao in daos[done:]:
+                dao.rollback()
+            self.blog_dao.rollback()
+            raise
+        else:
+            for dao in daos:
+                dao.settle()
+        finally:
+            self._end()
+
+    def rollback(self):
+        for dao in self._post_daos.values():
+            dao.rollback()
+        self.blog_dao.rollback()
+        self._end()
+
+    def _end(self):
+        self._post_daos = {}
+        self.active = False
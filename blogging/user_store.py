@@ -0,0 +1,144 @@
+import mmap
+import os
+
+from blogging.dao.atomic_writer import atomic_write
+
+
+class UserStore:
+    """
+    Username -> sha256(password) lookups backed by users.txt.
+
+    - Creating a store reads nothing from disk.
+    - The first lookup builds a sorted index file next to users.txt
+      (or reuses it if it is still current) and memory-maps it; every
+      lookup is then a binary search over the index.
+    - users.txt is checked by mtime and size before each lookup, and the
+      index is rebuilt when it changed, so new accounts work without
+      restarting the application.
+    """
+
+    INDEX_VERSION = 1
+
+    def __init__(self, users_file, index_file=None):
+        self.users_file = users_file
+        self.index_file = index_file or users_file + ".idx"
+
+        # (mtime_ns, size) of the users.txt the current index was built from
+        self._stamp = None
+        # mmap of the index file (or plain bytes if it could not be written)
+        self._data = None
+        # offset of the first record, right after the header line
+        self._start = 0
+
+    # ---------- lookups ----------
+
+    def get(self, username):
+        """Return the stored hash for username, or None if unknown."""
+        self._refresh()
+        data = self._data
+        if data is None or "," in username or "\n" in username:
+            return None
+        return self._search(data, self._start, username.encode())
+
+    def __contains__(self, username):
+        return self.get(username) is not None
+
+    def __getitem__(self, username):
+        h = self.get(username)
+        if h is None:
+            raise KeyError(username)
+        return h
+
+    # ---------- internal helpers ----------
+
+    def _refresh(self):
+        """Reopen (and rebuild if needed) the index when users.txt changed."""
+        try:
+            st = os.stat(self.users_file)
+        except OSError:
+            # if file is missing we just end up with empty user set
+            self._data = None
+            self._stamp = None
+            return
+
+        stamp = (st.st_mtime_ns, st.st_size)
+        if stamp != self._stamp:
+            self._open(stamp)
+
+    def _open(self, stamp):
+        header = b"#users-index %d %d %d\n" % (self.INDEX_VERSION, stamp[0], stamp[1])
+        data = self._map_index(header)
+        if data is None:
+            data = header + self._build()
+            try:
+                atomic_write(self.index_file, lambda f: f.write(data), binary=True, durability="none")
+                data = self._map_index(header) or data
+            except OSError:
+                # read-only location: keep the index in memory instead
+                pass
+
+        # the previous mapping is not closed here; a lookup running on
+        # another thread may still be using it
+        self._data = data
+        self._start = len(header)
+        self._stamp = stamp
+
+    def _map_index(self, header):
+        """Return a read-only mmap of the index if it matches header."""
+        try:
+            with open(self.index_file, "rb") as f:
+                if f.read(len(header)) != header:
+                    return None
+                return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            return None
+
+    def _build(self):
+        """Parse users.txt once and return the sorted index records."""
+        users = {}
+        try:
+            with open(self.users_file, "r") as f:
+                for line in f:
+                    parts = line.strip().split(",")
+                    if len(parts) != 2:
+                        continue
+                    u, h = parts
+                    users[u.encode()] = h.encode()
+        except OSError:
+            pass
+        return b"".join(b"%s,%s\n" % (u, users[u]) for u in sorted(users))
+
+    @staticmethod
+    def _next_line(data, start, pos):
+        """Offset of the first record starting at or after pos."""
+        if pos <= start:
+            return start
+        nl = data.find(b"\n", pos - 1)
+        return len(data) if nl < 0 else nl + 1
+
+    @staticmethod
+    def _record_at(data, pos):
+        """(username, hash) of the record starting at pos, or None at the end."""
+        if pos >= len(data):
+            return None
+        end = data.find(b"\n", pos)
+        if end < 0:
+            end = len(data)
+        name, _, h = data[pos:end].partition(b",")
+        return name, h
+
+    def _search(self, data, start, key):
+        # binary search over byte offsets for the first record >= key
+        lo, hi = start, len(data)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            record = self._record_at(data, self._next_line(data, start, mid))
+            if record is None or record[0] >= key:
+                hi = mid
+            else:
+                lo = mid + 1
+
+        record = self._record_at(data, self._next_line(data, start, lo))
+        if record is not None and record[0] == key:
+            return record[1].decode()
+        return None
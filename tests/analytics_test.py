@@ -0,0 +1,82 @@
+from datetime import date, datetime
+from unittest import TestCase, skipIf
+from unittest import main
+from blogging import analytics
+from blogging.controller import Controller
+from blogging.configuration import Configuration
+
+
+@skipIf(analytics.np is None, "NumPy is not installed")
+class AnalyticsTest(TestCase):
+
+	def setUp(self):
+		# set autosave to False to ignore testing persistence
+		self.configuration = Configuration()
+		self.configuration.__class__.autosave = False
+		self.controller = Controller()
+		self.controller.login("user", "123456")
+		self.controller.create_blog(1111114444, "Short Journey", "short_journey", "short.journey@gmail.com")
+		self.controller.create_blog(1111115555, "Long Journey", "long_journey", "long.journey@gmail.com")
+		self.controller.set_current_blog(1111114444)
+		for i in range(1, 6):
+			post = self.controller.create_post(f"title {i}", " ".join(["word"] * i))
+			post.creation = post.update = datetime(2026, i % 2 + 1, i)
+		self.controller.set_current_blog(1111115555)
+		post = self.controller.create_post("long", " ".join(["word"] * 10))
+		post.creation = post.update = datetime(2026, 3, 1)
+		self.analytics = self.controller.analytics()
+
+	def test_aggregations(self):
+		self.assertEqual(6, len(self.analytics))
+		self.assertEqual([1, 2, 3, 4, 5], sorted(self.analytics.column("words", 1111114444).tolist()))
+		counts, edges = self.analytics.histogram("words", bins=2)
+		self.assertEqual([5, 1], counts.tolist())
+		self.assertEqual(3.0, self.analytics.percentiles("words", (50,), 1111114444)[50])
+		self.assertEqual(datetime(2026, 1, 2), self.analytics.percentiles("created", (0,))[0])
+		self.assertEqual([(date(2026, 1, 1), 2), (date(2026, 2, 1), 3), (date(2026, 3, 1), 1)],
+			self.analytics.counts_per_period("month"))
+		# weeks start on Mondays
+		self.assertEqual(date(2025, 12, 29), self.analytics.counts_per_period("week", blog_id=1111114444)[0][0])
+		blogs, posts, words = self.analytics.per_blog("words")
+		self.assertEqual(([1111114444, 1111115555], [5, 1], [15, 10]), (blogs.tolist(), posts.tolist(), words.tolist()))
+		with self.assertRaises(ValueError):
+			self.analytics.counts_per_period("decade")
+		with self.assertRaises(ValueError):
+			self.analytics.column("nothing")
+
+	def test_incremental_updates(self):
+		self.assertEqual(6, len(self.analytics))
+		for i in range(20):
+			self.controller.create_post(f"more {i}", "a b")
+		self.controller.update_post(1, "long", "shorter now")
+		self.controller.delete_post(2)
+		blogs, posts, words = self.analytics.per_blog("words")
+		self.assertEqual(([5, 20], [15, 2 + 38]), (posts.tolist(), words.tolist()))
+
+		self.controller.unset_current_blog()
+		self.controller.update_blog(1111115555, 1111116666, "Long Journey", "long_journey", "long.journey@gmail.com")
+		self.assertEqual(20, len(self.analytics.column("code", 1111116666)))
+		self.controller.delete_blog(1111114444)
+		self.assertEqual([1111116666], self.analytics.per_blog()[0].tolist())
+
+		# the same events again change nothing
+		with self.controller.transaction():
+			self.controller.set_current_blog(1111116666)
+			self.controller.create_post("in transaction", "x")
+			self.analytics.clear()
+			self.assertEqual(21, len(self.analytics))
+		self.assertEqual(21, len(self.analytics))
+
+	def test_rollback(self):
+		try:
+			with self.controller.transaction():
+				self.controller.create_post("rolled back", "x")
+				self.assertEqual(7, len(self.analytics))
+				raise RuntimeError()
+		except RuntimeError:
+			pass
+		self.assertEqual(6, len(self.analytics))
+
+
+if __name__ == '__main__':
+	main()
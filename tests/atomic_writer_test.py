@@ -0,0 +1,137 @@
+import os
+import shutil
+import tempfile
+from unittest import TestCase
+from unittest import main
+from blogging.configuration import Configuration
+from blogging.controller import Controller
+from blogging.dao import atomic_writer
+from blogging.dao.atomic_writer import atomic_write, GroupCommitter
+
+
+class AtomicWriterTest(TestCase):
+
+	def setUp(self):
+		self.tmp = tempfile.mkdtemp()
+		self.path = os.path.join(self.tmp, "data.txt")
+		self.saved = (Configuration.autosave, Configuration.blogs_file, Configuration.records_path, Configuration.durability)
+
+	def tearDown(self):
+		atomic_writer.sync()
+		(Configuration.autosave, Configuration.blogs_file, Configuration.records_path,
+			Configuration.durability) = self.saved
+		shutil.rmtree(self.tmp)
+
+	def read(self):
+		with open(self.path, encoding="utf-8") as f:
+			return f.read()
+
+	def test_modes(self):
+		for mode in ("none", "flush", "fsync"):
+			self.assertEqual(len(mode), atomic_write(self.path, lambda f: f.write(mode), durability=mode))
+			self.assertEqual(mode, self.read())
+		with self.assertRaises(ValueError):
+			atomic_write(self.path, lambda f: f.write("x"), durability="sometimes")
+		# no temporary file is left behind
+		self.assertEqual(["data.txt"], os.listdir(self.tmp))
+
+	def test_failed_dump_keeps_old_contents(self):
+		atomic_write(self.path, lambda f: f.write("old"))
+
+		def dump(f):
+			f.write("half")
+			raise IOError("disk full")
+
+		with self.assertRaises(IOError):
+			atomic_write(self.path, dump)
+		self.assertEqual("old", self.read())
+		self.assertEqual(["data.txt"], os.listdir(self.tmp))
+
+	def test_group_commit_batches_writes(self):
+		committer = GroupCommitter(window=3600)
+		other = os.path.join(self.tmp, "other.txt")
+		for i in range(5):
+			fd, tmp = tempfile.mkstemp(dir=self.tmp)
+			os.write(fd, str(i).encode())
+			os.close(fd)
+			committer.submit(self.path, tmp)
+		fd, tmp = tempfile.mkstemp(dir=self.tmp)
+		os.close(fd)
+		committer.submit(other, tmp)
+
+		# nothing is visible before the batch is committed
+		self.assertFalse(os.path.exists(self.path))
+		self.assertTrue(committer.pending(self.path))
+		committer.sync(self.path)
+		self.assertEqual("4", self.read())
+		self.assertTrue(os.path.exists(other))
+		# superseded temporary files were dropped, both files in one batch
+		self.assertEqual(["data.txt", "other.txt"], sorted(os.listdir(self.tmp)))
+		self.assertEqual((1, 2), (committer.batches, committer.files))
+
+	def test_other_modes_drop_queued_group_write(self):
+		# a committer that never commits on its own
+		saved, atomic_writer._committer = atomic_writer._committer, GroupCommitter(window=3600)
+		try:
+			atomic_write(self.path, lambda f: f.write("queued"), durability="group")
+			self.assertTrue(atomic_writer.committer().pending(self.path))
+			atomic_write(self.path, lambda f: f.write("newer"), durability="fsync")
+			self.assertFalse(atomic_writer.committer().pending(self.path))
+			atomic_writer.sync()
+		finally:
+			atomic_writer._committer = saved
+		self.assertEqual("newer", self.read())
+		self.assertEqual(["data.txt"], os.listdir(self.tmp))
+
+	def test_failed_group_commit_is_reported(self):
+		committer = GroupCommitter(window=3600)
+		target = os.path.join(self.tmp, "dir")
+		os.mkdir(target)
+		fd, tmp = tempfile.mkstemp(dir=self.tmp)
+		os.close(fd)
+		committer.submit(target, tmp)
+		# a directory cannot be replaced by a file
+		with self.assertRaises(OSError):
+			committer.sync(target)
+		self.assertEqual(["dir"], os.listdir(self.tmp))
+		# reported once
+		committer.sync(target)
+
+		# the next write of the path learns about it too
+		saved, atomic_writer._committer = atomic_writer._committer, GroupCommitter(window=3600)
+		try:
+			sub = os.path.join(self.tmp, "sub")
+			os.mkdir(sub)
+			path = os.path.join(sub, "data.txt")
+			atomic_write(path, lambda f: f.write("lost"), durability="group")
+			shutil.rmtree(sub)
+			atomic_writer.committer()._commit()
+			os.mkdir(sub)
+			with self.assertRaises(OSError):
+				atomic_write(path, lambda f: f.write("newer"))
+			atomic_write(path, lambda f: f.write("newer"))
+		finally:
+			atomic_writer._committer = saved
+		with open(path, encoding="utf-8") as f:
+			self.assertEqual("newer", f.read())
+
+	def test_group_mode_reads_own_writes(self):
+		Configuration.autosave = True
+		Configuration.blogs_file = os.path.join(self.tmp, "blogs.json")
+		Configuration.records_path = os.path.join(self.tmp, "records")
+		Configuration.durability = "group"
+		controller = Controller()
+		controller.login("user", "123456")
+		controller.create_blog(1111114444, "Short Journey", "short_journey", "short.journey@gmail.com")
+		controller.set_current_blog(1111114444)
+		for i in range(10):
+			controller.create_post(f"title {i}", "text")
+
+		other = Controller()
+		other.login("user", "123456")
+		other.set_current_blog(1111114444)
+		self.assertEqual(10, other.count_posts())
+
+
+if __name__ == '__main__':
+	main()
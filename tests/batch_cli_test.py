@@ -0,0 +1,90 @@
+import io
+import json
+import os
+import shutil
+import tempfile
+from unittest import TestCase
+from unittest import main
+from blogging.cli.batch_cli import BatchCLI
+from blogging.controller import Controller
+from blogging.configuration import Configuration
+
+
+COMMANDS = """
+# comments and blank lines are skipped
+login user 123456
+create_blog 1111114444 "Short Journey" short_journey short.journey@gmail.com
+{"op": "set_current_blog", "id": 1111114444}
+{"op": "create_post", "args": ["Starting my journey", "Today I started"]}
+create_post "Second post" "Still going"
+""".splitlines()
+
+
+class BatchCLITest(TestCase):
+
+	def setUp(self):
+		# persist into a scratch directory so the real store is untouched
+		self.configuration = Configuration()
+		self.saved = (Configuration.autosave, Configuration.blogs_file, Configuration.records_path)
+		self.tmp = tempfile.mkdtemp()
+		self.configuration.__class__.autosave = True
+		self.configuration.__class__.blogs_file = os.path.join(self.tmp, "blogs.json")
+		self.configuration.__class__.records_path = os.path.join(self.tmp, "records")
+		self.out = io.StringIO()
+
+	def tearDown(self):
+		Configuration.autosave, Configuration.blogs_file, Configuration.records_path = self.saved
+		shutil.rmtree(self.tmp)
+
+	def test_parse(self):
+		batch = BatchCLI(Controller(), out=self.out)
+		self.assertIsNone(batch.parse("   "))
+		self.assertIsNone(batch.parse("# note"))
+		self.assertEqual(("update_post", [3, "A title", "a text"]), batch.parse('update_post 3 "A title" "a text"'))
+		self.assertEqual(("update_post", [3, "t", "x"]),
+			batch.parse('{"op": "update_post", "code": "3", "new_title": "t", "new_text": "x"}'))
+		with self.assertRaises(ValueError):
+			batch.parse("drop_everything")
+		with self.assertRaises(ValueError):
+			batch.parse("delete_post 1 2")
+		with self.assertRaises(ValueError):
+			batch.parse('{"op": "create_post", "title": "no text"}')
+
+	def test_run_reports_and_persists(self):
+		batch = BatchCLI(Controller(), out=self.out, json_output=True)
+		lines = COMMANDS + ["create_blog 1111114444 dup dup dup", "retrieve_posts journey"]
+		self.assertEqual((7, 1), batch.run(lines))
+
+		records = [json.loads(line) for line in self.out.getvalue().splitlines()]
+		self.assertEqual([True, True, True, True, True, False, True], [r["ok"] for r in records])
+		self.assertEqual(1, records[3]["result"]["code"])
+		self.assertIn("duplicate id", records[5]["error"])
+		self.assertEqual(["Starting my journey"], [p["title"] for p in records[6]["result"]])
+
+		# everything was saved: a new controller sees it
+		controller = Controller()
+		controller.login("user", "123456")
+		controller.set_current_blog(1111114444)
+		self.assertEqual([2, 1], [p.code for p in controller.list_posts()])
+
+	def test_atomic_rolls_back_on_failure(self):
+		batch = BatchCLI(Controller(), out=self.out)
+		self.assertEqual((6, 1), batch.run(COMMANDS + ["delete_blog 99"], atomic=True))
+		self.assertIn("8 ERROR delete_blog", self.out.getvalue().splitlines()[-1])
+
+		controller = Controller()
+		controller.login("user", "123456")
+		self.assertEqual([], controller.list_blogs())
+
+	def test_commit_every(self):
+		batch = BatchCLI(Controller(), out=self.out, quiet=True)
+		self.assertEqual((5, 0), batch.run(COMMANDS, commit_every=2))
+		self.assertEqual("", self.out.getvalue())
+		controller = Controller()
+		controller.login("user", "123456")
+		controller.set_current_blog(1111114444)
+		self.assertEqual(2, controller.count_posts())
+
+
+if __name__ == '__main__':
+	main()
@@ -0,0 +1,155 @@
+import json
+import os
+import shutil
+import tempfile
+import time
+from unittest import TestCase
+from unittest import main
+from blogging.controller import Controller
+from blogging.configuration import Configuration
+
+
+class BlogSummaryTest(TestCase):
+
+	def setUp(self):
+		# persist into a scratch directory so the real store is untouched
+		self.configuration = Configuration()
+		self.saved = (Configuration.autosave, Configuration.blogs_file, Configuration.records_path,
+			Configuration.render_cache_path)
+		self.tmp = tempfile.mkdtemp()
+		self.configuration.__class__.autosave = True
+		self.configuration.__class__.blogs_file = os.path.join(self.tmp, "blogs.json")
+		self.configuration.__class__.records_path = os.path.join(self.tmp, "records")
+		self.configuration.__class__.render_cache_path = os.path.join(self.tmp, "cache")
+		self.controller = Controller()
+		self.controller.login("user", "123456")
+		self.controller.create_blog(1111114444, "Short Journey", "short_journey", "short.journey@gmail.com")
+		self.controller.create_blog(1111115555, "Long Journey", "long_journey", "long.journey@gmail.com")
+		self.controller.set_current_blog(1111114444)
+		self.first = self.controller.create_post("first", "one two three")
+		self.second = self.controller.create_post("second", "four five")
+
+	def tearDown(self):
+		(Configuration.autosave, Configuration.blogs_file, Configuration.records_path,
+			Configuration.render_cache_path) = self.saved
+		shutil.rmtree(self.tmp)
+
+	def flushed(self):
+		# summaries written, and the record files well older than blogs.json
+		self.controller.blog_dao.flush()
+		past = time.time_ns() - 60 * 10**9
+		records = self.configuration.__class__.records_path
+		for name in os.listdir(records):
+			os.utime(os.path.join(records, name), ns=(past, past))
+
+	def stored_summary(self, blog_id):
+		with open(self.configuration.__class__.blogs_file, "r", encoding="utf-8") as f:
+			return next(b.get("summary") for b in json.load(f) if b["id"] == blog_id)
+
+	def reloaded(self, blog_id):
+		controller = Controller()
+		controller.login("user", "123456")
+		return controller.search_blog(blog_id)
+
+	def test_incremental_summary(self):
+		summary = self.controller.get_current_blog().summary
+		self.assertEqual((2, 5), (summary.posts, summary.words))
+		self.assertEqual(self.second.creation, summary.last_created)
+		self.assertEqual(self.second.update, summary.last_updated)
+
+		self.controller.update_post(1, "first", "one")
+		self.assertEqual((2, 3), (summary.posts, summary.words))
+		self.assertEqual(self.first.update, summary.last_updated)
+
+		# deleting the newest post falls back to the remaining ones
+		self.controller.delete_post(2)
+		self.assertEqual((1, 1), (summary.posts, summary.words))
+		self.assertEqual(self.first.creation, summary.last_created)
+		self.assertEqual(self.first.update, summary.last_updated)
+
+		self.controller.delete_post(1)
+		self.assertEqual((0, 0, None, None),
+			(summary.posts, summary.words, summary.last_created, summary.last_updated))
+
+	def test_persisted_without_reading_records(self):
+		self.flushed()
+		blog = self.reloaded(1111114444)
+		self.assertEqual(self.controller.get_current_blog().summary, blog.summary)
+		self.assertEqual(0, self.reloaded(1111115555).summary.posts)
+		# the record file is only read once the posts are needed
+		self.assertFalse(blog.post_dao._loaded)
+		self.assertEqual(2, blog.post_dao.count_posts())
+		self.assertTrue(blog.post_dao._loaded)
+
+	def test_timeline_reads_only_needed_blogs(self):
+		for blog_id in range(1, 11):
+			self.controller.create_blog(blog_id, f"blog {blog_id}", f"url {blog_id}", "email")
+			self.controller.set_current_blog(blog_id)
+			self.controller.create_post(f"title {blog_id}", "text")
+		self.flushed()
+		controller = Controller()
+		controller.login("user", "123456")
+		page, cursor = controller.timeline(2)
+		self.assertEqual([10, 9], [blog_id for blog_id, _ in page])
+		page, cursor = controller.timeline(2, cursor)
+		self.assertEqual([8, 7], [blog_id for blog_id, _ in page])
+		# only blogs whose newest post could be on those pages were read
+		self.assertEqual(list(range(6, 11)),
+			sorted(b.id for b in controller.list_blogs() if b.post_dao._loaded))
+
+	# post changes do not rewrite blogs.json every time
+	def test_summaries_written_in_batches(self):
+		self.flushed()
+		self.controller.create_post("third", "six")
+		self.assertEqual(2, self.stored_summary(1111114444)["posts"])
+		self.controller.blog_dao.flush()
+		self.assertEqual(3, self.stored_summary(1111114444)["posts"])
+
+		interval = Configuration.summary_flush_interval
+		self.configuration.__class__.summary_flush_interval = 0
+		try:
+			self.controller.delete_post(3)
+			self.assertEqual(2, self.stored_summary(1111114444)["posts"])
+		finally:
+			self.configuration.__class__.summary_flush_interval = interval
+
+		with self.controller.transaction():
+			self.controller.create_post("third", "six")
+		self.assertEqual(3, self.stored_summary(1111114444)["posts"])
+
+	# a summary lost with the process is recomputed from the newer record file
+	def test_unwritten_summary(self):
+		self.flushed()
+		self.controller.delete_post(1)
+		self.assertEqual(2, self.stored_summary(1111114444)["posts"])
+		blog = self.reloaded(1111114444)
+		self.assertEqual((1, 2), (blog.summary.posts, blog.summary.words))
+		self.assertTrue(blog.post_dao._loaded)
+		self.assertFalse(self.reloaded(1111115555).post_dao._loaded)
+
+	def test_legacy_blogs_file(self):
+		# blogs.json written before summaries existed
+		with open(self.configuration.__class__.blogs_file, "r", encoding="utf-8") as f:
+			blogs = json.load(f)
+		for b in blogs:
+			del b["summary"]
+		with open(self.configuration.__class__.blogs_file, "w", encoding="utf-8") as f:
+			json.dump(blogs, f)
+		blog = self.reloaded(1111114444)
+		self.assertEqual((2, 5), (blog.summary.posts, blog.summary.words))
+
+	def test_rollback(self):
+		try:
+			with self.controller.transaction():
+				self.controller.create_post("third", "six seven")
+				self.controller.delete_post(1)
+				raise RuntimeError()
+		except RuntimeError:
+			pass
+		summary = self.controller.get_current_blog().summary
+		self.assertEqual((2, 5), (summary.posts, summary.words))
+		self.assertEqual(summary, self.reloaded(1111114444).summary)
+
+
+if __name__ == '__main__':
+	main()
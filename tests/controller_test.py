@@ -1,5 +1,6 @@
 from unittest import TestCase
 from unittest import main
+from datetime import datetime
 from blogging.controller import Controller
 from blogging.blog import Blog
 from blogging.post import Post
@@ -613,6 +614,153 @@ class ControllerTest(TestCase):
 		self.assertEqual(expected_post_4, posts_list[0], "post 4 is the first in the list of posts")
 		self.assertEqual(expected_post_2, posts_list[1], "post 2 is the second in the list of posts")
 
+	def test_list_posts_page(self):
+		self.controller.login("user", "123456")
+		self.controller.create_blog(1111114444, "Short Journey", "short_journey", "short.journey@gmail.com")
+		self.controller.set_current_blog(1111114444)
+		for i in range(1, 8):
+			self.controller.create_post(f"Post {i}", f"Text {i}")
+		self.controller.delete_post(4)
+
+		# pages follow list_posts order (descending code)
+		self.assertEqual(6, self.controller.count_posts())
+		self.assertEqual([7, 6, 5], [p.code for p in self.controller.list_posts_page(0, 3)])
+		self.assertEqual([3, 2, 1], [p.code for p in self.controller.list_posts_page(3, 3)])
+		self.assertEqual([1], [p.code for p in self.controller.list_posts_page(5, 3)])
+		self.assertEqual([], self.controller.list_posts_page(6, 3))
+		self.assertEqual(self.controller.list_posts(), self.controller.list_posts_page(0, 100))
+
+	def test_iterators(self):
+		self.controller.login("user", "123456")
+		self.controller.create_blog(1111114444, "Short Journey", "short_journey", "short.journey@gmail.com")
+		self.controller.create_blog(1111115555, "Long Journey", "long_journey", "long.journey@gmail.com")
+		self.controller.set_current_blog(1111114444)
+		for i in range(1, 8):
+			self.controller.create_post(f"Post {i}", "journey" if i % 2 else "trip")
+
+		self.assertEqual(self.controller.list_blogs(), list(self.controller.iter_blogs()))
+		self.assertEqual(self.controller.retrieve_blogs("long"), list(self.controller.iter_retrieve_blogs("long")))
+		self.assertEqual(self.controller.list_posts(), list(self.controller.iter_posts()))
+		self.assertEqual([1, 3, 5, 7], [p.code for p in self.controller.iter_retrieve_posts("journey")])
+		self.assertEqual(self.controller.retrieve_posts(""), list(self.controller.iter_retrieve_posts("")))
+
+		self.controller.logout()
+		with self.assertRaises(IllegalAccessException):
+			self.controller.iter_posts()
+
+	def test_time_queries(self):
+		self.controller.login("user", "123456")
+		self.controller.create_blog(1111114444, "Short Journey", "short_journey", "short.journey@gmail.com")
+		self.controller.set_current_blog(1111114444)
+		blog = self.controller.get_current_blog()
+		for i in range(1, 7):
+			created = datetime(2024, i % 3 + 1, i)
+			blog.add_post(Post(None, f"Post {i}", "Text", created, created))
+
+		self.assertEqual([3, 6], [p.code for p in self.controller.posts_created_between(datetime(2024, 1, 1), datetime(2024, 2, 1))])
+		self.assertEqual([3, 6, 1, 4], [p.code for p in self.controller.posts_created_between(end=datetime(2024, 3, 1))])
+		self.assertEqual([((2024, 1), 2), ((2024, 2), 2), ((2024, 3), 2)], self.controller.post_archive())
+		self.assertEqual([5, 2], [p.code for p in self.controller.recently_updated_posts(2)])
+
+		# the indexes follow updates and deletes
+		self.controller.update_post(1, "Post 1b", "Text")
+		self.assertEqual([1, 5], [p.code for p in self.controller.recently_updated_posts(2)])
+		self.controller.delete_post(3)
+		self.assertEqual([6], [p.code for p in self.controller.posts_created_between(datetime(2024, 1, 1), datetime(2024, 2, 1))])
+		self.controller.delete_post(6)
+		self.assertEqual([((2024, 2), 2), ((2024, 3), 2)], self.controller.post_archive())
+
+		# and are rebuilt after a rollback
+		with self.assertRaises(ValueError):
+			with self.controller.transaction():
+				self.controller.delete_post(1)
+				raise ValueError()
+		self.assertEqual(1, self.controller.recently_updated_posts(1)[0].code)
+
+	def test_timeline(self):
+		self.controller.login("user", "123456")
+		expected = []
+		for blog_id in (1111114444, 1111115555, 1111116666):
+			self.controller.create_blog(blog_id, f"Blog {blog_id}", f"blog_{blog_id}", f"{blog_id}@gmail.com")
+			blog = self.controller.search_blog(blog_id)
+			for i in range(1, 6):
+				# some posts of different blogs share a creation time
+				created = datetime(2024, 1, (blog_id + i * 7) % 4 + 1)
+				post = Post(None, f"Post {i}", "Text", created, created)
+				blog.add_post(post)
+				expected.append((created, blog_id, post.code))
+		expected.sort(reverse=True)
+
+		pages, cursor = [], None
+		while True:
+			page, cursor = self.controller.timeline(4, cursor)
+			pages.append([(p.creation, blog_id, p.code) for blog_id, p in page])
+			if cursor is None:
+				break
+		self.assertEqual([4, 4, 4, 3], [len(page) for page in pages])
+		self.assertEqual(expected, [entry for page in pages for entry in page])
+		self.assertEqual(pages[0][-1], self.controller.timeline(4)[1])
+
+		# new posts show up without rebuilding anything
+		self.controller.set_current_blog(1111115555)
+		post = self.controller.create_post("Newest", "Text")
+		self.assertEqual([(1111115555, post)], self.controller.timeline(1)[0])
+		self.assertEqual(([], None), self.controller.timeline(5, (datetime(2000, 1, 1), 0, 0)))
+
+	def test_mutation_events(self):
+		events = []
+		self.controller.add_listener(events.append)
+		self.controller.login("user", "123456")
+		self.controller.create_blog(1111114444, "Short Journey", "short_journey", "short.journey@gmail.com")
+		self.controller.create_blog(1111115555, "Long Journey", "long_journey", "long.journey@gmail.com")
+		self.controller.update_blog(1111115555, 1111116666, "Longer Journey", "longer_journey", "longer.journey@gmail.com")
+		self.controller.delete_blog(1111116666)
+		self.controller.set_current_blog(1111114444)
+		post = self.controller.create_post("Post 1", "Text 1")
+		self.controller.update_post(1, "Post 1b", "Text 1b")
+		self.controller.delete_post(1)
+		self.assertFalse(self.controller.delete_post(1))
+
+		self.assertEqual(["blog_created", "blog_created", "blog_updated", "blog_deleted",
+			"post_created", "post_updated", "post_deleted"], [e.kind for e in events])
+		self.assertEqual(1111115555, events[2].old_id)
+		self.assertEqual(1111116666, events[2].blog_id)
+		self.assertEqual("Longer Journey", events[2].blog.name)
+		self.assertIs(post, events[4].post)
+		self.assertEqual(1111114444, events[4].blog_id)
+
+		# inside a transaction events wait for the commit
+		events.clear()
+		with self.controller.transaction():
+			self.controller.create_post("Post 2", "Text 2")
+			self.assertEqual([], events)
+		self.assertEqual(["post_created"], [e.kind for e in events])
+
+		# rolled back changes are never announced
+		events.clear()
+		with self.assertRaises(ValueError):
+			with self.controller.transaction():
+				self.controller.create_post("Post 3", "Text 3")
+				raise ValueError()
+		self.assertEqual([], events)
+
+		# big batches are announced as a single reset
+		with self.controller.transaction():
+			for i in range(Controller.EVENT_BATCH_LIMIT + 1):
+				self.controller.create_post(f"Post {i}", "Text")
+		self.assertEqual(["reset"], [e.kind for e in events])
+
+		# a post that could not be stored is not announced
+		events.clear()
+		self.controller.current_blog.post_dao.create_post = lambda post: None
+		self.assertIsNone(self.controller.create_post("Post y", "Text"))
+		self.assertEqual([], events)
+		del self.controller.current_blog.post_dao.create_post
+
+		self.controller.remove_listener(events.append)
+		self.controller.create_post("Post x", "Text")
+		self.assertEqual(0, len(events))
+
 
 if __name__ == '__main__':
 	unittest.main()
\ No newline at end of file
@@ -0,0 +1,60 @@
+import filecmp
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from benchmarks.corpus_generator import main as generate
+from blogging.configuration import Configuration
+from blogging.controller import Controller
+
+
+class CorpusGeneratorTest(unittest.TestCase):
+
+	def setUp(self):
+		self.tmp = tempfile.mkdtemp()
+		self.saved = (Configuration.autosave, Configuration.blogs_file, Configuration.records_path)
+
+	def tearDown(self):
+		Configuration.autosave, Configuration.blogs_file, Configuration.records_path = self.saved
+		shutil.rmtree(self.tmp)
+
+	def generate(self, name, *args):
+		out = os.path.join(self.tmp, name)
+		generate(["--out", out, "--blogs", "5", "--posts-per-blog", "3:12", "--seed", "7"] + list(args))
+		return out
+
+	#The same seed produces byte-identical files
+	def test_deterministic(self):
+		a = self.generate("a")
+		b = self.generate("b")
+		self.assertTrue(filecmp.cmp(os.path.join(a, "blogs.json"), os.path.join(b, "blogs.json"), shallow=False))
+		for name in os.listdir(os.path.join(a, "records")):
+			self.assertTrue(filecmp.cmp(os.path.join(a, "records", name), os.path.join(b, "records", name), shallow=False))
+
+	#The corpus loads through the normal Controller
+	def test_loadable(self):
+		out = self.generate("c", "--text-words", "fixed:10")
+		Configuration.autosave = True
+		Configuration.blogs_file = os.path.join(out, "blogs.json")
+		Configuration.records_path = os.path.join(out, "records")
+		# written with the blogs, so opening the corpus reads no record files
+		with open(Configuration.blogs_file, encoding="utf-8") as f:
+			summaries = {b["id"]: b["summary"] for b in json.load(f)}
+		controller = Controller()
+		controller.login("user", "123456")
+		blogs = controller.list_blogs()
+		self.assertEqual([1, 2, 3, 4, 5], [b.id for b in blogs])
+		for blog in blogs:
+			controller.set_current_blog(blog.id)
+			posts = controller.list_posts()
+			self.assertTrue(3 <= len(posts) <= 12)
+			self.assertEqual(len(posts), summaries[blog.id]["posts"])
+			self.assertEqual(list(range(len(posts), 0, -1)), [p.code for p in posts])
+			for p in posts:
+				self.assertEqual(10, len(p.text.split()))
+				self.assertLessEqual(p.creation, p.update)
+
+
+if __name__ == '__main__':
+	unittest.main()
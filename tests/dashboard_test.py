@@ -0,0 +1,82 @@
+import os
+from unittest import TestCase
+from unittest import main
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt6.QtWidgets import QApplication
+from blogging.configuration import Configuration
+from blogging.controller import Controller
+from blogging.gui.dashboard_gui import Dashboard
+
+
+class DashboardTest(TestCase):
+
+	def setUp(self):
+		self.app = QApplication.instance() or QApplication([])
+		# set autosave to False to ignore testing persistence
+		self.configuration = Configuration()
+		self.configuration.__class__.autosave = False
+		self.controller = Controller()
+		self.controller.login("user", "123456")
+		self.controller.create_blog(1111114444, "Short Journey", "short_journey", "short.journey@gmail.com")
+		self.controller.create_blog(1111115555, "Long Journey", "long_journey", "long.journey@gmail.com")
+		self.dashboard = Dashboard(self.controller)
+
+	def tearDown(self):
+		self.dashboard.pool.waitForDone()
+		self.controller.remove_listener(self.dashboard._listener)
+
+	def settle(self):
+		# background calls finish, then their results reach the models
+		for _ in range(5):
+			self.dashboard.pool.waitForDone()
+			self.app.processEvents()
+
+	def blog_ids(self):
+		model = self.dashboard.blogs_model
+		return [model.blog_at(row).id for row in range(model.rowCount())]
+
+	def post_codes(self):
+		model = self.dashboard.posts_model
+		return [model.post_at(row).code for row in range(model.rowCount())]
+
+	# updates move blogs in and out of the search results
+	def test_blog_updates_follow_search(self):
+		self.dashboard.blog_search_edit.setText("short")
+		self.dashboard._retrieve_blogs()
+		self.settle()
+		self.assertEqual([1111114444], self.blog_ids())
+
+		self.controller.update_blog(1111114444, 1111114444, "Long Trip", "long_trip", "long.trip@gmail.com")
+		self.assertEqual([], self.blog_ids())
+		self.controller.update_blog(1111115555, 1111115555, "Short Stay", "short_stay", "short.stay@gmail.com")
+		self.settle()
+		self.assertEqual([1111115555], self.blog_ids())
+
+	def test_post_updates_follow_search(self):
+		self.controller.set_current_blog(1111114444)
+		self.dashboard.current_blog_id = 1111114444
+		self.controller.create_post("apple pie", "sweet")
+		self.controller.create_post("banana bread", "sweet")
+		self.controller.create_post("apple cake", "sweet")
+		self.dashboard.post_search_edit.setText("apple")
+		self.dashboard._retrieve_posts()
+		self.settle()
+		self.dashboard.posts_model.fetchMore()
+		self.assertEqual([1, 3], self.post_codes())
+
+		self.controller.update_post(1, "cherry pie", "sweet")
+		self.assertEqual([3], self.post_codes())
+		self.controller.update_post(2, "apple bread", "sweet")
+		self.settle()
+		self.dashboard.posts_model.fetchMore()
+		self.assertEqual([2, 3], self.post_codes())
+
+		self.controller.delete_post(3)
+		self.assertEqual([2], self.post_codes())
+		self.assertEqual(1, self.dashboard.posts_model.total())
+
+
+if __name__ == '__main__':
+	main()
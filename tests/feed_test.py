@@ -0,0 +1,114 @@
+import os
+import shutil
+import tempfile
+import xml.etree.ElementTree as ET
+from unittest import TestCase
+from unittest import main
+from blogging.controller import Controller
+from blogging.configuration import Configuration
+
+ATOM = "{http://www.w3.org/2005/Atom}"
+
+
+class FeedTest(TestCase):
+
+	def setUp(self):
+		# persist into a scratch directory so the real store is untouched
+		self.configuration = Configuration()
+		self.saved = (Configuration.autosave, Configuration.blogs_file, Configuration.records_path,
+			Configuration.render_cache_path, Configuration.feed_size, Configuration.feed_path)
+		self.tmp = tempfile.mkdtemp()
+		self.configuration.__class__.autosave = True
+		self.configuration.__class__.blogs_file = os.path.join(self.tmp, "blogs.json")
+		self.configuration.__class__.records_path = os.path.join(self.tmp, "records")
+		self.configuration.__class__.render_cache_path = os.path.join(self.tmp, "cache")
+		self.configuration.__class__.feed_size = 3
+		self.configuration.__class__.feed_path = os.path.join(self.tmp, "feeds")
+		self.controller = Controller()
+		self.controller.login("user", "123456")
+		self.controller.create_blog(1111114444, "Short Journey", "short_journey", "short.journey@gmail.com")
+		self.controller.set_current_blog(1111114444)
+		with self.controller.transaction():
+			for i in range(1, 11):
+				self.controller.create_post(f"title {i}", f"text *{i}*")
+
+	def tearDown(self):
+		(Configuration.autosave, Configuration.blogs_file, Configuration.records_path,
+			Configuration.render_cache_path, Configuration.feed_size, Configuration.feed_path) = self.saved
+		shutil.rmtree(self.tmp)
+
+	def atom_titles(self):
+		root = ET.fromstring(self.controller.feed(1111114444))
+		return [e.find(ATOM + "title").text for e in root.findall(ATOM + "entry")]
+
+	def feed_file(self, format):
+		return os.path.join(self.tmp, "feeds", "1111114444", f"{format}.xml")
+
+	def test_latest_posts(self):
+		self.assertEqual(["title 10", "title 9", "title 8"], self.atom_titles())
+		root = ET.fromstring(self.controller.feed(1111114444, "rss"))
+		items = root.find("channel").findall("item")
+		self.assertEqual(["title 10", "title 9", "title 8"], [i.find("title").text for i in items])
+		self.assertEqual("<p>text <em>10</em></p>", items[0].find("description").text)
+		self.assertIsNone(self.controller.feed(1))
+		with self.assertRaises(ValueError):
+			self.controller.feed(1111114444, "json")
+
+	def test_incremental_updates(self):
+		self.atom_titles()
+		cache = self.controller.render_cache
+		renders = cache.misses + cache.hits
+
+		# an older post does not touch the feed
+		self.controller.update_post(2, "changed", "text")
+		self.assertEqual(["title 10", "title 9", "title 8"], self.atom_titles())
+		self.assertEqual(renders, cache.misses + cache.hits)
+
+		# a new post renders one entry; the others are reused
+		self.controller.create_post("title 11", "text")
+		self.assertEqual(["title 11", "title 10", "title 9"], self.atom_titles())
+		self.assertEqual(renders + 1, cache.misses + cache.hits)
+
+		self.controller.update_post(10, "title ten", "text")
+		self.assertEqual(["title 11", "title ten", "title 9"], self.atom_titles())
+
+		# a deleted post is replaced by the next older one
+		self.controller.delete_post(11)
+		self.assertEqual(["title ten", "title 9", "title 8"], self.atom_titles())
+
+	def test_static_files(self):
+		self.controller.create_post("title 11", "text")
+		with open(self.feed_file("atom"), encoding="utf-8") as f:
+			self.assertIn("title 11", f.read())
+		with open(self.feed_file("rss"), encoding="utf-8") as f:
+			self.assertIn("title 11", f.read())
+		self.controller.unset_current_blog()
+		self.controller.delete_blog(1111114444)
+		self.assertFalse(os.path.exists(self.feed_file("atom")))
+
+	# a blog named like another blog's id does not hide that blog's feed
+	def test_lookup_by_id(self):
+		self.controller.create_blog(1, "One", "one", "email")
+		self.controller.create_blog(2, "Two", "two", "email")
+		self.controller.set_current_blog(2)
+		self.controller.create_post("second blog", "text")
+		next(b for b in self.controller.blog_dao.iter_blogs() if b.id == 1).name = 2
+		self.controller.feeds.clear()
+		root = ET.fromstring(self.controller.feed(2))
+		self.assertEqual(["second blog"], [e.find(ATOM + "title").text for e in root.findall(ATOM + "entry")])
+
+	def test_rollback(self):
+		try:
+			with self.controller.transaction():
+				self.controller.create_post("title 11", "text")
+				# a feed first built inside the transaction sees its posts
+				self.controller.feeds.clear()
+				self.assertEqual("title 11", self.atom_titles()[0])
+				raise RuntimeError()
+		except RuntimeError:
+			pass
+		self.assertEqual(["title 10", "title 9", "title 8"], self.atom_titles())
+
+
+if __name__ == '__main__':
+	main()
@@ -0,0 +1,127 @@
+import random
+from unittest import TestCase
+from unittest import main
+from blogging.controller import Controller
+from blogging.configuration import Configuration
+from blogging.dao import fuzzy_index
+from blogging.dao.fuzzy_index import FuzzyIndex, edit_distance, normalize, trigrams
+
+
+class FuzzyIndexTest(TestCase):
+
+	def setUp(self):
+		# set autosave to False to ignore testing persistence
+		self.configuration = Configuration()
+		self.configuration.__class__.autosave = False
+		self.controller = Controller()
+		self.controller.login("user", "123456")
+		self.controller.create_blog(1111114444, "Short Journey", "short_journey", "short.journey@gmail.com")
+		self.controller.create_blog(1111115555, "Long Journey", "long_journey", "long.journey@gmail.com")
+		self.controller.create_blog(1111116666, "Short Story", "short_story", "short.story@gmail.com")
+		self.controller.create_blog(1111117777, "Cooking Notes", "cooking", "cooking@gmail.com")
+
+	def names(self, key, limit=10):
+		return [b.name for b in self.controller.fuzzy_retrieve_blogs(key, limit)]
+
+	def test_helpers(self):
+		self.assertEqual("short journey", normalize("Short_Journey"))
+		self.assertEqual({"  a", " ab", "ab "}, trigrams("ab"))
+		self.assertEqual(3, edit_distance("kitten", "sitting"))
+		self.assertEqual(0, edit_distance("", ""))
+
+	def test_typos(self):
+		# no substring matches, but fuzzy ones
+		self.assertEqual([], self.controller.retrieve_blogs("shrot jorney"))
+		self.assertEqual("Short Journey", self.names("shrot jorney")[0])
+		self.assertEqual({"Short Journey", "Long Journey"}, set(self.names("jurney", 2)))
+		self.assertEqual("Cooking Notes", self.names("cookin")[0])
+		self.assertEqual([], self.names("xyzzy"))
+		self.assertEqual([], self.names(""))
+
+	def test_ranking(self):
+		index = FuzzyIndex()
+		index.add(1, "a", ("abcdef",))
+		index.add(2, "b", ("abcdeg",))
+		index.add(3, "c", ("abcdef",))
+		index.add(4, "d", ("abcdefgh",))
+		# equal similarity: oldest first; a closer spelling ranks higher
+		self.assertEqual(["a", "c"], [v for v, _ in index.search("abcdef", 2)])
+		self.assertEqual(1.0, index.search("abcdef", 1)[0][1])
+		index.update(1, "a2", ("zzzz",))
+		self.assertEqual(["c", "d"], [v for v, _ in index.search("abcdef", 2)])
+		index.remove(3)
+		self.assertEqual(["d", "b"], [v for v, _ in index.search("abcdef", 2)])
+		self.assertEqual(3, len(index))
+
+	def test_changes_and_rebuild(self):
+		index = FuzzyIndex()
+		for i in range(100):
+			index.add(i, i, (f"name {i}",))
+		for i in range(90):
+			index.remove(i)
+		# the holes were dropped from the posting arrays
+		self.assertLess(len(index._by_id), 20)
+		self.assertEqual(95, index.search("name 95", 1)[0][0])
+
+		self.controller.update_blog(1111117777, 1111117777, "Baking Notes", "baking", "baking@gmail.com")
+		self.assertEqual("Baking Notes", self.names("bakin")[0])
+		self.assertEqual([], self.names("cookin"))
+		self.controller.delete_blog(1111114444)
+		self.assertEqual(["Short Story"], self.names("short stroy", 1))
+
+	def without_numpy(self, fn):
+		saved = fuzzy_index.np
+		fuzzy_index.np = None
+		try:
+			return fn()
+		finally:
+			fuzzy_index.np = saved
+
+	def test_same_results_without_numpy(self):
+		index = FuzzyIndex()
+		words = ["kalo", "mine", "ruza", "vone", "tisa", "bade"]
+		for i in range(300):
+			index.add(i, i, (f"{words[i % 6]} {words[i * 7 % 6]}{i % 5}", f"url_{i}"))
+		queries = ["kalo mine", "rza vone3", "url 12", "tsa"]
+		with_numpy = [index.search(q) for q in queries]
+		self.assertEqual(with_numpy, self.without_numpy(lambda: [index.search(q) for q in queries]))
+
+	# a blog's name and url both match: still limit blogs
+	def test_documents_with_several_matching_terms(self):
+		index = FuzzyIndex()
+		index.add(1, "notes", ("Cooking Notes", "cooking_note"))
+		index.add(2, "tips", ("Cooking Tips", "cooking_tips"))
+		self.assertEqual(["notes", "tips"], [v for v, _ in index.search("cooking notes", 2)])
+		self.assertEqual(index.search("cooking notes", 2), self.without_numpy(lambda: index.search("cooking notes", 2)))
+
+	def test_same_results_after_random_changes(self):
+		rng = random.Random(0)
+		words = ["kalo", "mine", "ruza", "vone", "tisa", "bade", "cook", "note"]
+
+		def fields():
+			name = " ".join(rng.choice(words) for _ in range(rng.randint(1, 3)))
+			return (name, name.replace(" ", "_") + rng.choice(["", "s", "_blog"]))
+
+		index = FuzzyIndex()
+		keys = []
+		for step in range(2000):
+			action = rng.random()
+			if action < 0.6 or not keys:
+				key = step
+				keys.append(key)
+				index.add(key, key, fields())
+			elif action < 0.8:
+				key = rng.choice(keys)
+				index.update(key, key, fields())
+			else:
+				index.remove(keys.pop(rng.randrange(len(keys))))
+			if step % 100 == 99:
+				for _ in range(5):
+					query = " ".join(rng.choice(words) for _ in range(rng.randint(1, 2)))
+					limit = rng.randint(1, 20)
+					self.assertEqual(index.search(query, limit),
+						self.without_numpy(lambda: index.search(query, limit)), query)
+
+
+if __name__ == '__main__':
+	main()
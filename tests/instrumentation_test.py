@@ -0,0 +1,72 @@
+import os
+import shutil
+import tempfile
+from unittest import TestCase
+from unittest import main
+from blogging.controller import Controller
+from blogging.configuration import Configuration
+from blogging.instrumentation import registry
+
+
+class InstrumentationTest(TestCase):
+
+	def setUp(self):
+		self.configuration = Configuration()
+		self.saved = (Configuration.autosave, Configuration.blogs_file, Configuration.records_path, Configuration.instrumentation)
+		self.tmp = tempfile.mkdtemp()
+		self.configuration.__class__.autosave = True
+		self.configuration.__class__.blogs_file = os.path.join(self.tmp, "blogs.json")
+		self.configuration.__class__.records_path = os.path.join(self.tmp, "records")
+
+	def tearDown(self):
+		registry.disable()
+		registry.reset()
+		Configuration.autosave, Configuration.blogs_file, Configuration.records_path, Configuration.instrumentation = self.saved
+		shutil.rmtree(self.tmp)
+
+	def test_disabled_by_default(self):
+		original = Controller.__dict__["create_post"]
+		controller = Controller()
+		controller.login("user", "123456")
+		self.assertEqual({}, controller.stats())
+		# nothing is wrapped while instrumentation is off
+		self.assertIs(original, Controller.__dict__["create_post"])
+
+	def test_counts_latency_and_bytes(self):
+		self.configuration.__class__.instrumentation = True
+		controller = Controller()
+		controller.login("user", "123456")
+		controller.create_blog(1111114444, "Short Journey", "short_journey", "short.journey@gmail.com")
+		controller.set_current_blog(1111114444)
+		for i in range(3):
+			controller.create_post(f"title {i}", "text")
+		controller.list_posts()
+
+		stats = controller.stats()
+		self.assertEqual(3, stats["controller.create_post"]["count"])
+		self.assertEqual(3, stats["post_dao.create_post"]["count"])
+		self.assertEqual(1, stats["controller.list_posts"]["count"])
+		self.assertEqual(3, sum(stats["controller.create_post"]["buckets"].values()))
+		self.assertGreater(stats["controller.create_post"]["bytes_written"], 0)
+		# post_dao.write also counts the empty record written for the new blog;
+		# the blog's summary goes to blogs.json later, with the next write
+		self.assertGreaterEqual(stats["post_dao.write"]["bytes_written"], stats["post_dao.create_post"]["bytes_written"])
+		self.assertEqual(stats["controller.create_post"]["bytes_written"], stats["post_dao.create_post"]["bytes_written"])
+		self.assertEqual(0, stats["controller.list_posts"]["bytes_written"])
+
+		# a new controller reads what the first one wrote
+		Controller()
+		self.assertGreater(controller.stats()["blog_dao.read_all"]["bytes_read"], 0)
+
+		text = controller.stats_prometheus()
+		self.assertIn('blogging_operation_seconds_count{op="controller.create_post"} 3', text)
+		self.assertIn('blogging_operation_seconds_bucket{op="controller.create_post",le="+Inf"} 3', text)
+		self.assertIn('blogging_operation_bytes_written_total{op="post_dao.write"}', text)
+
+		registry.disable()
+		controller.create_post("untimed", "text")
+		self.assertEqual(3, controller.stats()["controller.create_post"]["count"])
+
+
+if __name__ == '__main__':
+	main()
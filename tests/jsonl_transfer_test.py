@@ -0,0 +1,126 @@
+import io
+import json
+import os
+import shutil
+import tempfile
+from unittest import TestCase
+from unittest import main
+from blogging.controller import Controller
+from blogging.configuration import Configuration
+from blogging.dao.jsonl_transfer import export_jsonl, import_jsonl, open_stream
+
+
+class JSONLTransferTest(TestCase):
+
+	def setUp(self):
+		# persist into a scratch directory so the real store is untouched
+		self.configuration = Configuration()
+		self.saved = (Configuration.autosave, Configuration.blogs_file, Configuration.records_path)
+		self.tmp = tempfile.mkdtemp()
+		self.use_store("source")
+		controller = Controller()
+		controller.login("user", "123456")
+		with controller.transaction():
+			controller.create_blog(1111114444, "Short Journey", "short_journey", "short.journey@gmail.com")
+			controller.create_blog(1111115555, "Long Journey", "long_journey", "long.journey@gmail.com")
+			controller.create_blog(1111116666, "Empty", "empty", "empty@gmail.com")
+			controller.set_current_blog(1111114444)
+			controller.create_post("first", "one")
+			controller.create_post("second", "two\nlines")
+			controller.delete_post(1)
+			controller.create_post("third", "three")
+			controller.set_current_blog(1111115555)
+			for i in range(20):
+				controller.create_post(f"title {i}", f"text {i}")
+
+	def tearDown(self):
+		(Configuration.autosave, Configuration.blogs_file, Configuration.records_path) = self.saved
+		shutil.rmtree(self.tmp)
+
+	def use_store(self, name):
+		self.configuration.__class__.autosave = True
+		self.configuration.__class__.blogs_file = os.path.join(self.tmp, name, "blogs.json")
+		self.configuration.__class__.records_path = os.path.join(self.tmp, name, "records")
+
+	def snapshot(self):
+		controller = Controller()
+		controller.login("user", "123456")
+		result = []
+		for blog in controller.list_blogs():
+			controller.set_current_blog(blog.id)
+			result.append((blog, controller.list_posts()))
+		return result
+
+	def round_trip(self, path, jobs=1):
+		expected = self.snapshot()
+		with open_stream(path, "w") as out:
+			stats = export_jsonl(out, jobs=jobs)
+		self.assertEqual({"blogs": 3, "posts": 22}, {k: stats[k] for k in ("blogs", "posts")})
+		self.use_store("target")
+		with open_stream(path, "r") as stream:
+			stats = import_jsonl(stream, jobs=jobs)
+		self.assertEqual({"blogs": 3, "posts": 22}, stats)
+		# blogs.json carries the summaries, so listing needs no record files
+		with open(Configuration.blogs_file, encoding="utf-8") as f:
+			summaries = [b["summary"] for b in json.load(f)]
+		self.assertEqual([blog.summary.to_dict() for blog, _ in expected], summaries)
+		self.assertEqual(expected, self.snapshot())
+
+	def test_round_trip(self):
+		path = os.path.join(self.tmp, "store.jsonl")
+		self.round_trip(path)
+		with open(path, encoding="utf-8") as f:
+			lines = [json.loads(line) for line in f]
+		self.assertEqual(25, len(lines))
+		self.assertEqual(("blog", 1111114444), (lines[0]["type"], lines[0]["id"]))
+		self.assertEqual([2, 3], [line["code"] for line in lines[1:3]])
+		self.assertEqual("two\nlines", lines[1]["text"])
+
+		# new posts continue after the highest imported code
+		controller = Controller()
+		controller.login("user", "123456")
+		controller.set_current_blog(1111114444)
+		self.assertEqual(4, controller.create_post("fourth", "four").code)
+
+	def test_round_trip_gzip_in_parallel(self):
+		path = os.path.join(self.tmp, "store.jsonl.gz")
+		self.round_trip(path, jobs=2)
+		with open(path, "rb") as f:
+			self.assertEqual(b"\x1f\x8b", f.read(2))
+
+	def test_import_refuses_non_empty_store(self):
+		out = io.BytesIO()
+		export_jsonl(out)
+		with self.assertRaises(ValueError):
+			import_jsonl(io.BytesIO(out.getvalue()))
+		stats = import_jsonl(io.BytesIO(out.getvalue()), force=True)
+		self.assertEqual(3, stats["blogs"])
+
+	def test_import_rejects_bad_streams(self):
+		self.use_store("target")
+		blog = b'{"type": "blog", "id": 1, "name": "a", "url": "a", "email": "a@a.com"}\n'
+		post = b'{"type": "post", "blog": 2, "code": 1, "title": "t", "text": "x", ' \
+			b'"creation": "2024-01-01T10:00:00", "update": "2024-01-01T10:00:00"}\n'
+		for data in (post, blog + post, blog + blog, blog + b'{"type": "comment"}\n', blog + b"{oops\n"):
+			with self.assertRaises(ValueError):
+				import_jsonl(io.BytesIO(data))
+		# nothing was committed by the failed imports
+		self.assertFalse(os.path.exists(Configuration.blogs_file))
+
+	def test_failed_forced_import_keeps_records(self):
+		expected = self.snapshot()
+		records = sorted(os.listdir(Configuration.records_path))
+		out = io.BytesIO()
+		export_jsonl(out)
+		lines = out.getvalue().splitlines(keepends=True)
+		# the first blog and its posts are fine, then the stream breaks
+		data = b"".join(line.replace(b"three", b"changed") for line in lines[:5]) + b"{oops\n"
+		with self.assertRaises(ValueError):
+			import_jsonl(io.BytesIO(data), force=True)
+		self.assertEqual(expected, self.snapshot())
+		# no staging directory is left behind
+		self.assertEqual(records, sorted(os.listdir(Configuration.records_path)))
+
+
+if __name__ == '__main__':
+	main()
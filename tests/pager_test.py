@@ -0,0 +1,52 @@
+from unittest import TestCase
+from unittest import main
+from blogging.cli.pager import Pager
+
+
+class PagerTest(TestCase):
+
+	def setUp(self):
+		self.lines = []
+		self.prompts = []
+		self.answers = []
+		self.pager = Pager(3, prompt=self.prompt, out=self.lines.append)
+
+	def prompt(self, text):
+		self.prompts.append(text)
+		return self.answers.pop(0) if self.answers else ""
+
+	def test_pages(self):
+		self.assertEqual(7, self.pager.show(range(7), str, header="items:"))
+		self.assertEqual(["items:", "0", "1", "2", "3", "4", "5", "6"], self.lines)
+		self.assertEqual(2, len(self.prompts))
+
+	def test_no_prompt_after_last_full_page(self):
+		self.assertEqual(6, self.pager.show(range(6), str))
+		self.assertEqual(1, len(self.prompts))
+
+	def test_empty(self):
+		self.assertEqual(0, self.pager.show(iter([]), str, header="items:"))
+		self.assertEqual([], self.lines)
+
+	def test_lazy_and_stop(self):
+		pulled = []
+		rendered = []
+
+		def items():
+			for i in range(1000000):
+				pulled.append(i)
+				yield i
+
+		def render(i):
+			rendered.append(i)
+			return str(i)
+
+		self.answers = ["", "q"]
+		self.assertEqual(6, self.pager.show(items(), render))
+		# one item is read ahead to know whether another page follows
+		self.assertEqual(7, len(pulled))
+		self.assertEqual(list(range(6)), rendered)
+
+
+if __name__ == '__main__':
+	main()
@@ -0,0 +1,102 @@
+import os
+import shutil
+import tempfile
+import time
+from unittest import TestCase
+from unittest import main
+from blogging.controller import Controller
+from blogging.configuration import Configuration
+from blogging.dao.record_loader import ParallelRecordLoader
+
+
+class RecordLoaderTest(TestCase):
+
+	def setUp(self):
+		# persist into a scratch directory so the real store is untouched
+		self.configuration = Configuration()
+		self.saved = (Configuration.autosave, Configuration.blogs_file, Configuration.records_path,
+			Configuration.render_cache_path)
+		self.tmp = tempfile.mkdtemp()
+		self.configuration.__class__.autosave = True
+		self.configuration.__class__.blogs_file = os.path.join(self.tmp, "blogs.json")
+		self.configuration.__class__.records_path = os.path.join(self.tmp, "records")
+		self.configuration.__class__.render_cache_path = os.path.join(self.tmp, "cache")
+		controller = Controller()
+		controller.login("user", "123456")
+		with controller.transaction():
+			for b in range(1, 21):
+				controller.create_blog(b, f"blog {b}", f"url {b}", "email")
+				controller.set_current_blog(b)
+				for i in range(b):
+					controller.create_post(f"title {b}.{i}", "text")
+			controller.unset_current_blog()
+		self.age_records()
+
+	def tearDown(self):
+		(Configuration.autosave, Configuration.blogs_file, Configuration.records_path,
+			Configuration.render_cache_path) = self.saved
+		shutil.rmtree(self.tmp)
+
+	def age_records(self):
+		# record files older than blogs.json, as after an earlier session
+		past = time.time_ns() - 60 * 10**9
+		for name in os.listdir(Configuration.records_path):
+			os.utime(os.path.join(Configuration.records_path, name), ns=(past, past))
+
+	def reloaded(self):
+		controller = Controller()
+		controller.login("user", "123456")
+		return controller.list_blogs()
+
+	def test_parallel_load(self):
+		blogs = self.reloaded()
+		self.assertFalse(any(b.post_dao._loaded for b in blogs))
+		calls = []
+		self.assertEqual(20, ParallelRecordLoader(4).load(blogs, lambda done, total: calls.append((done, total))))
+		self.assertEqual([(i, 20) for i in range(1, 21)], calls)
+		self.assertEqual(list(range(1, 21)), [b.post_dao.count_posts() for b in blogs])
+		# new posts continue the codes read from disk
+		self.assertEqual(21, blogs[19].post_dao._next_code)
+
+		# the same result as loading one blog at a time
+		sequential = self.reloaded()
+		ParallelRecordLoader(1).load(sequential)
+		self.assertEqual([[p.title for p in b.list_posts()] for b in sequential],
+			[[p.title for p in b.list_posts()] for b in blogs])
+		# loaded blogs are skipped
+		self.assertEqual(0, ParallelRecordLoader(4).load(blogs))
+
+	def test_cancel_and_unreadable_files(self):
+		with open(os.path.join(self.tmp, "records", "3.dat"), "wb") as f:
+			f.write(b"not a pickle")
+		self.age_records()
+		blogs = self.reloaded()
+
+		def cancel(done, total):
+			if done == 5:
+				raise KeyboardInterrupt()
+		with self.assertRaises(KeyboardInterrupt):
+			ParallelRecordLoader(2).load(blogs, cancel)
+		# the unreadable blog stays unloaded and says so when used
+		self.assertEqual([True, True, False, True, True], [b.post_dao._loaded for b in blogs[:5]])
+		self.assertFalse(blogs[-1].post_dao._loaded)
+		with self.assertRaises(IOError):
+			blogs[2].post_dao.count_posts()
+		self.assertFalse(blogs[2].post_dao._loaded)
+
+		controller = Controller()
+		controller.login("user", "123456")
+		self.assertEqual(20, controller.load_all_posts())
+		self.assertEqual(20, controller.timeline(limit=10)[0][0][1].code)
+		with self.assertRaises(IOError):
+			controller.timeline(limit=300)
+		# and is never overwritten with what could not be read
+		controller.set_current_blog(3)
+		with self.assertRaises(IOError):
+			controller.create_post("new", "text")
+		with open(os.path.join(self.tmp, "records", "3.dat"), "rb") as f:
+			self.assertEqual(b"not a pickle", f.read())
+
+
+if __name__ == '__main__':
+	main()
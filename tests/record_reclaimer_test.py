@@ -0,0 +1,120 @@
+import json
+import os
+import shutil
+import tempfile
+import time
+from unittest import TestCase
+from unittest import main
+from blogging.controller import Controller
+from blogging.configuration import Configuration
+from blogging.dao.record_reclaimer import RecordReclaimer
+
+
+class RecordReclaimerTest(TestCase):
+
+	def setUp(self):
+		# persist into a scratch directory so the real store is untouched
+		self.configuration = Configuration()
+		self.saved = (Configuration.autosave, Configuration.blogs_file, Configuration.records_path,
+			Configuration.reclaim_grace_period, Configuration.reclaim_archive_path)
+		self.tmp = tempfile.mkdtemp()
+		self.configuration.__class__.autosave = True
+		self.configuration.__class__.blogs_file = os.path.join(self.tmp, "blogs.json")
+		self.configuration.__class__.records_path = os.path.join(self.tmp, "records")
+		self.configuration.__class__.reclaim_grace_period = 0.0
+		self.controller = Controller()
+		self.controller.login("user", "123456")
+		self.controller.create_blog(1111114444, "Short Journey", "short_journey", "short.journey@gmail.com")
+		self.controller.create_blog(1111115555, "Long Journey", "long_journey", "long.journey@gmail.com")
+		self.controller.set_current_blog(1111115555)
+		self.controller.create_post("title", "text")
+		self.controller.unset_current_blog()
+
+	def tearDown(self):
+		self.controller.reclaimer.stop()
+		(Configuration.autosave, Configuration.blogs_file, Configuration.records_path,
+			Configuration.reclaim_grace_period, Configuration.reclaim_archive_path) = self.saved
+		shutil.rmtree(self.tmp)
+
+	def record_file(self, id):
+		return os.path.join(Configuration.records_path, f"{id}{Configuration.records_extension}")
+
+	def test_reclaims_deleted_and_renamed(self):
+		size = os.path.getsize(self.record_file(1111115555))
+		self.controller.delete_blog(1111115555)
+		# a renamed blog's file moves with it and stays live
+		self.controller.update_blog(1111114444, 1111116666, "Renamed", "renamed", "renamed@gmail.com")
+		stale_tmp = os.path.join(Configuration.records_path, ".1111116666.dat.abcd.tmp")
+		open(stale_tmp, "wb").close()
+
+		report = self.controller.reclaim_records()
+		self.assertEqual(2, report["files"])
+		self.assertEqual(size, report["bytes"])
+		self.assertFalse(os.path.exists(self.record_file(1111115555)))
+		self.assertFalse(os.path.exists(stale_tmp))
+		self.assertTrue(os.path.exists(self.record_file(1111116666)))
+		self.assertEqual(0, self.controller.reclaim_records()["files"])
+		self.assertEqual(2, self.controller.reclaimer.total_files)
+
+	def test_grace_period_and_transactions(self):
+		self.controller.delete_blog(1111115555)
+		reclaimer = RecordReclaimer(self.controller.blog_dao, grace_period=3600)
+		self.assertEqual([], reclaimer.orphans())
+		self.assertEqual([os.path.abspath(self.record_file(1111115555))], reclaimer.orphans(time.time() + 7200))
+
+		# nothing is reclaimed while a transaction is open
+		with self.controller.transaction():
+			self.assertTrue(self.controller.reclaim_records().get("skipped"))
+		self.assertTrue(os.path.exists(self.record_file(1111115555)))
+
+	def test_renamed_file_is_not_old(self):
+		self.controller.delete_blog(1111115555)
+		# a rename keeps the mtime, but sets the ctime
+		os.utime(self.record_file(1111115555), (0, 0))
+		reclaimer = RecordReclaimer(self.controller.blog_dao, grace_period=3600)
+		self.assertEqual([], reclaimer.orphans())
+		self.assertEqual(0, reclaimer.run_once()["files"])
+
+	def test_keeps_files_named_on_disk(self):
+		self.controller.delete_blog(1111115555)
+		# e.g. left by a crash: blogs.json on disk names a blog the memory does not have
+		with open(Configuration.blogs_file, "r", encoding="utf-8") as f:
+			blogs = json.load(f)
+		blogs.append({"id": 1111117777, "name": "Crash", "url": "crash", "email": "crash@gmail.com"})
+		with open(Configuration.blogs_file, "w", encoding="utf-8") as f:
+			json.dump(blogs, f)
+		open(self.record_file(1111117777), "wb").close()
+
+		report = self.controller.reclaim_records()
+		self.assertEqual([os.path.abspath(self.record_file(1111115555))], report["paths"])
+		self.assertTrue(os.path.exists(self.record_file(1111117777)))
+
+		# nothing is reclaimed without a readable blogs.json
+		os.remove(Configuration.blogs_file)
+		self.assertEqual(0, self.controller.reclaim_records()["files"])
+		# once blogs.json no longer names it, the file goes
+		self.controller.create_blog(1111118888, "New", "new", "new@gmail.com")
+		self.assertEqual([os.path.abspath(self.record_file(1111117777))], self.controller.reclaim_records()["paths"])
+
+	def test_archive(self):
+		archive = os.path.join(self.tmp, "archive")
+		self.controller.reclaimer.archive_path = archive
+		self.controller.delete_blog(1111115555)
+		report = self.controller.reclaim_records()
+		self.assertEqual(1, report["files"])
+		self.assertTrue(report["archived"])
+		self.assertEqual(1, len(os.listdir(archive)))
+		self.assertTrue(os.listdir(archive)[0].startswith("1111115555.dat."))
+
+	def test_background_thread(self):
+		self.controller.delete_blog(1111115555)
+		self.controller.reclaimer.start(0.01)
+		deadline = time.time() + 5
+		while os.path.exists(self.record_file(1111115555)) and time.time() < deadline:
+			time.sleep(0.01)
+		self.controller.reclaimer.stop()
+		self.assertFalse(os.path.exists(self.record_file(1111115555)))
+
+
+if __name__ == '__main__':
+	main()
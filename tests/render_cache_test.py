@@ -0,0 +1,103 @@
+import os
+import shutil
+import tempfile
+from datetime import datetime
+from unittest import TestCase
+from unittest import main
+from blogging.controller import Controller
+from blogging.configuration import Configuration
+from blogging.post import Post
+from blogging.render_cache import RenderCache
+
+
+class RenderCacheTest(TestCase):
+
+	def setUp(self):
+		self.tmp = tempfile.mkdtemp()
+		self.path = os.path.join(self.tmp, "cache")
+
+	def tearDown(self):
+		shutil.rmtree(self.tmp)
+
+	def post(self, code, text, minute=0):
+		return Post(code, "title", text, datetime(2024, 1, 1, 10, 0), datetime(2024, 1, 1, 10, minute))
+
+	def test_memory_tier(self):
+		cache = RenderCache()
+		post = self.post(1, "some *text*")
+		self.assertEqual("<p>some <em>text</em></p>", cache.render(1, post))
+		self.assertEqual("<p>some <em>text</em></p>", cache.render(1, post))
+		self.assertEqual((1, 1), (cache.hits, cache.misses))
+
+		# a newer update time is never served from the old entry
+		self.assertEqual("<p>changed</p>", cache.render(1, self.post(1, "changed", minute=1)))
+		self.assertEqual(2, cache.misses)
+
+	def test_memory_eviction(self):
+		cache = RenderCache(memory_limit=40)
+		a, b, c = self.post(1, "aaaaaaaaaa"), self.post(2, "bbbbbbbbbb"), self.post(3, "cccccccccc")
+		cache.render(1, a)
+		cache.render(1, b)
+		cache.render(1, a)
+		cache.render(1, c)
+		# b was the least recently used entry
+		self.assertEqual([(1, 1), (1, 3)], list(cache._memory))
+		self.assertLessEqual(cache._memory_size, 40)
+
+	def test_disk_tier(self):
+		post = self.post(7, "# Title")
+		RenderCache(path=self.path).render(5, post)
+		self.assertTrue(os.path.exists(os.path.join(self.path, "5", "7.html")))
+
+		cache = RenderCache(path=self.path)
+		self.assertEqual("<h1>Title</h1>", cache.render(5, post))
+		self.assertEqual((1, 0), (cache.disk_hits, cache.misses))
+		cache.render(5, self.post(7, "# Other", minute=5))
+		self.assertEqual(1, cache.misses)
+
+	def test_disk_eviction(self):
+		cache = RenderCache(path=self.path, disk_limit=150)
+		for code in range(1, 6):
+			cache.render(1, self.post(code, "x" * 40))
+		self.assertLessEqual(cache._disk_size, 150)
+		self.assertEqual(sorted(os.listdir(os.path.join(self.path, "1"))),
+			sorted(os.path.basename(name) for name in cache._disk))
+		self.assertIn(os.path.join("1", "5.html"), cache._disk)
+
+	def test_controller_invalidation(self):
+		saved = (Configuration.autosave, Configuration.blogs_file, Configuration.records_path,
+			Configuration.render_cache_path)
+		Configuration.autosave = True
+		Configuration.blogs_file = os.path.join(self.tmp, "blogs.json")
+		Configuration.records_path = os.path.join(self.tmp, "records")
+		Configuration.render_cache_path = self.path
+		try:
+			controller = Controller()
+			controller.login("user", "123456")
+			controller.create_blog(1111114444, "Short Journey", "short_journey", "short.journey@gmail.com")
+			controller.set_current_blog(1111114444)
+			controller.create_post("title", "first **text**")
+			controller.create_post("title", "second")
+			cache = controller.render_cache
+			self.assertEqual("<p>first <strong>text</strong></p>", controller.render_post(1))
+			controller.render_post(2)
+			self.assertIsNone(controller.render_post(3))
+
+			controller.update_post(1, "title", "updated")
+			self.assertNotIn((1111114444, 1), cache._memory)
+			self.assertFalse(os.path.exists(os.path.join(self.path, "1111114444", "1.html")))
+			self.assertEqual("<p>updated</p>", controller.render_post(1))
+
+			controller.delete_post(2)
+			self.assertNotIn((1111114444, 2), cache._memory)
+			controller.unset_current_blog()
+			controller.delete_blog(1111114444)
+			self.assertEqual({}, dict(cache._memory))
+			self.assertEqual([], os.listdir(os.path.join(self.path, "1111114444")))
+		finally:
+			(Configuration.autosave, Configuration.blogs_file, Configuration.records_path,
+				Configuration.render_cache_path) = saved
+
+
+if __name__ == '__main__':
+	main()
@@ -0,0 +1,98 @@
+import os
+import shutil
+import tempfile
+import time
+from unittest import TestCase
+from unittest import main
+from blogging.controller import Controller
+from blogging.configuration import Configuration
+
+
+class ResidencyTest(TestCase):
+
+	def setUp(self):
+		# persist into a scratch directory so the real store is untouched
+		self.configuration = Configuration()
+		self.saved = (Configuration.autosave, Configuration.blogs_file, Configuration.records_path,
+			Configuration.render_cache_path, Configuration.resident_posts, Configuration.resident_bytes)
+		self.tmp = tempfile.mkdtemp()
+		self.configuration.__class__.autosave = True
+		self.configuration.__class__.blogs_file = os.path.join(self.tmp, "blogs.json")
+		self.configuration.__class__.records_path = os.path.join(self.tmp, "records")
+		self.configuration.__class__.render_cache_path = os.path.join(self.tmp, "cache")
+		controller = Controller()
+		controller.login("user", "123456")
+		with controller.transaction():
+			for b in range(1, 11):
+				controller.create_blog(b, f"blog {b}", f"url {b}", "email")
+				controller.set_current_blog(b)
+				for i in range(10):
+					controller.create_post(f"title {b}.{i}", "text")
+			controller.unset_current_blog()
+		# record files older than blogs.json, as after an earlier session
+		past = time.time_ns() - 60 * 10**9
+		for name in os.listdir(Configuration.records_path):
+			os.utime(os.path.join(Configuration.records_path, name), ns=(past, past))
+		self.configuration.__class__.resident_posts = 30
+		self.controller = Controller()
+		self.controller.login("user", "123456")
+
+	def tearDown(self):
+		(Configuration.autosave, Configuration.blogs_file, Configuration.records_path,
+			Configuration.render_cache_path, Configuration.resident_posts, Configuration.resident_bytes) = self.saved
+		shutil.rmtree(self.tmp)
+
+	def loaded(self):
+		return [b.id for b in self.controller.list_blogs() if b.post_dao._loaded]
+
+	def test_least_recently_used_are_unloaded(self):
+		residency = self.controller.residency
+		# only as many blogs are read as the budget holds
+		self.assertEqual(3, self.controller.load_all_posts())
+		self.assertEqual([1, 2, 3], self.loaded())
+		self.assertEqual(30, residency.resident_posts)
+		self.assertEqual(0, residency.evictions)
+
+		# reading another blog unloads the least recently used one
+		blog = self.controller.search_blog(5)
+		self.assertEqual([f"title 5.{i}" for i in range(10)], [p.title for p in blog.list_posts()])
+		self.assertEqual([2, 3, 5], self.loaded())
+		self.assertEqual(1, residency.evictions)
+
+		# the timeline still sees every post
+		posts, cursor = self.controller.timeline(limit=100)
+		self.assertEqual(100, len(posts))
+		self.assertLessEqual(residency.resident_posts, 30)
+
+	def test_current_blog_and_transactions_are_pinned(self):
+		self.controller.set_current_blog(1)
+		self.controller.load_all_posts()
+		self.assertEqual([1, 2, 3], self.loaded())
+		self.controller.create_post("new", "text")
+		self.assertEqual(11, self.controller.count_posts())
+
+		# nothing touched by an open transaction is unloaded
+		with self.controller.transaction():
+			for b in range(2, 6):
+				self.controller.set_current_blog(b)
+				self.controller.create_post("in transaction", "text")
+			self.assertEqual([2, 3, 4, 5], self.loaded()[:4])
+			self.controller.unset_current_blog()
+		for b in range(2, 6):
+			self.assertEqual(11, self.controller.search_blog(b).post_dao.count_posts())
+		self.assertLessEqual(self.controller.residency.resident_posts, 30)
+
+	def test_byte_budget(self):
+		self.configuration.__class__.resident_posts = None
+		self.configuration.__class__.resident_bytes = 1
+		controller = Controller()
+		controller.login("user", "123456")
+		self.assertEqual(0, controller.load_all_posts())
+		# only the collection in use stays
+		self.assertEqual(10, controller.search_blog(3).post_dao.count_posts())
+		self.assertEqual(10, controller.search_blog(4).post_dao.count_posts())
+		self.assertEqual(1, len(controller.residency))
+
+
+if __name__ == '__main__':
+	main()
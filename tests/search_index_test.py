@@ -0,0 +1,52 @@
+from unittest import TestCase
+from unittest import main
+from blogging.dao.search_index import SearchIndex
+
+
+class SearchIndexTest(TestCase):
+
+	def setUp(self):
+		self.index = SearchIndex()
+		self.index.add(1, "a", ("Short Journey", "A trip to the coast"))
+		self.index.add(2, "b", ("Long Road", "Walking across the country"))
+		self.index.add(3, "c", ("Another journey", "Up the hills"))
+
+	def test_search(self):
+		self.assertEqual(["a", "c"], self.index.search("JOURNEY"))
+		self.assertEqual(["b"], self.index.search("across"))
+		self.assertEqual([], self.index.search("nothing"))
+		self.assertEqual(["a", "b", "c"], self.index.search(""))
+
+	def test_match_does_not_span_fields_or_documents(self):
+		# "journeya" would only match across title and text of post 1
+		self.assertEqual([], self.index.search("journeya"))
+		self.assertEqual([], self.index.search("coastlong"))
+
+	def test_update_and_remove(self):
+		self.index.update(2, "b2", ("Journey home", "Walking"))
+		self.assertEqual(["a", "b2", "c"], self.index.search("journey"))
+		self.index.remove(1)
+		self.assertEqual(["b2", "c"], self.index.search("journey"))
+		self.assertNotIn(1, self.index)
+		self.assertEqual(2, len(self.index))
+
+	def test_refined_search_sees_changes(self):
+		self.assertEqual(["a", "c"], self.index.search("jour"))
+		self.index.add(4, "d", ("journey four", ""))
+		self.index.update(1, "a", ("Short trip", "A trip to the coast"))
+		self.assertEqual(["c", "d"], self.index.search("journey"))
+		self.assertEqual(["d"], self.index.search("journey f"))
+
+	def test_many_documents(self):
+		index = SearchIndex()
+		for i in range(3 * SearchIndex.CHUNK_SIZE):
+			index.add(i, i, (f"title {i}", "even" if i % 2 == 0 else "odd"))
+		for i in range(0, 3 * SearchIndex.CHUNK_SIZE, 3):
+			index.remove(i)
+		expected = [i for i in range(3 * SearchIndex.CHUNK_SIZE) if i % 2 == 0 and i % 3 != 0]
+		self.assertEqual(expected, index.search("even"))
+		self.assertEqual([1000], index.search("title 1000"))
+
+
+if __name__ == '__main__':
+	main()
@@ -0,0 +1,98 @@
+import os
+import shutil
+import tempfile
+import time
+from unittest import TestCase
+from unittest import main
+from blogging.controller import Controller
+from blogging.configuration import Configuration
+from blogging.site_builder import SiteBuilder
+
+
+class SiteBuilderTest(TestCase):
+
+	def setUp(self):
+		# persist into a scratch directory so the real store is untouched
+		self.configuration = Configuration()
+		self.saved = (Configuration.autosave, Configuration.blogs_file, Configuration.records_path)
+		self.tmp = tempfile.mkdtemp()
+		self.configuration.__class__.autosave = True
+		self.configuration.__class__.blogs_file = os.path.join(self.tmp, "blogs.json")
+		self.configuration.__class__.records_path = os.path.join(self.tmp, "records")
+		self.site = os.path.join(self.tmp, "site")
+		self.controller = Controller()
+		self.controller.login("user", "123456")
+		with self.controller.transaction():
+			self.controller.create_blog(1111114444, "Short Journey", "short_journey", "short.journey@gmail.com")
+			self.controller.create_blog(1111115555, "Long <Journey>", "long_journey", "long.journey@gmail.com")
+			self.controller.set_current_blog(1111114444)
+			self.controller.create_post("Hello", "Some *emphasis*")
+			self.controller.create_post("Second", "# Heading")
+			self.controller.set_current_blog(1111115555)
+			self.controller.create_post("Other", "text")
+
+	def tearDown(self):
+		(Configuration.autosave, Configuration.blogs_file, Configuration.records_path) = self.saved
+		shutil.rmtree(self.tmp)
+
+	def page(self, *parts):
+		with open(os.path.join(self.site, *parts), encoding="utf-8") as f:
+			return f.read()
+
+	def age_records(self):
+		# record files written a moment ago are never trusted by their stat
+		old = time.time() - 60
+		for name in os.listdir(Configuration.records_path):
+			os.utime(os.path.join(Configuration.records_path, name), (old, old))
+
+	def build(self, **kwargs):
+		return SiteBuilder(self.site).build(jobs=1, **kwargs)
+
+	def test_build(self):
+		stats = self.build()
+		self.assertEqual({"blogs": 2, "posts": 3, "rendered": 3, "removed": 0, "skipped_blogs": 0}, stats)
+		self.assertIn("<em>emphasis</em>", self.page("1111114444", "1.html"))
+		self.assertIn("<h1>Heading</h1>", self.page("1111114444", "2.html"))
+		blog_index = self.page("1111114444", "index.html")
+		self.assertLess(blog_index.index('href="2.html"'), blog_index.index('href="1.html"'))
+		self.assertIn("Long &lt;Journey&gt;", self.page("index.html"))
+		self.assertIn("<title>Second</title>", self.page("1111114444", "atom.xml"))
+		self.assertIn("<title>Hello</title>", self.page("1111114444", "rss.xml"))
+
+	def test_incremental_rebuild(self):
+		self.age_records()
+		self.build()
+		stats = self.build()
+		self.assertEqual((0, 2), (stats["rendered"], stats["skipped_blogs"]))
+
+		# only the changed post of the changed blog is rendered again
+		self.controller.set_current_blog(1111114444)
+		self.controller.update_post(1, "Hello again", "new text")
+		stats = self.build()
+		self.assertEqual((1, 0), (stats["rendered"], stats["removed"]))
+		self.assertIn("new text", self.page("1111114444", "1.html"))
+		self.assertIn("Hello again", self.page("1111114444", "index.html"))
+
+		self.controller.delete_post(2)
+		stats = self.build()
+		self.assertEqual((0, 1), (stats["rendered"], stats["removed"]))
+		self.assertFalse(os.path.exists(os.path.join(self.site, "1111114444", "2.html")))
+
+		# a renamed blog shows up in the site index, the old one is gone
+		self.controller.unset_current_blog()
+		self.controller.update_blog(1111115555, 1111116666, "Renamed", "renamed", "renamed@gmail.com")
+		stats = self.build()
+		self.assertEqual(1, stats["rendered"])
+		self.assertFalse(os.path.exists(os.path.join(self.site, "1111115555")))
+		self.assertIn("1111116666/index.html", self.page("index.html"))
+
+		self.assertEqual(2, self.build(force=True)["rendered"])
+
+	def test_parallel_build(self):
+		stats = SiteBuilder(self.site).build(jobs=2)
+		self.assertEqual(3, stats["rendered"])
+		self.assertIn("<p>text</p>", self.page("1111115555", "1.html"))
+
+
+if __name__ == '__main__':
+	main()
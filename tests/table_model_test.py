@@ -0,0 +1,177 @@
+import os
+from datetime import datetime
+from unittest import TestCase
+from unittest import main
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt6.QtWidgets import QApplication
+from blogging.blog import Blog
+from blogging.configuration import Configuration
+from blogging.gui.dashboard_gui import BlogTableModel, PostTableModel
+from blogging.post import Post
+
+
+def posts(codes):
+	return [Post(code, f"title {code}", f"text {code}", datetime(2026, 1, 1), datetime(2026, 1, 1)) for code in codes]
+
+
+class PostTableModelTest(TestCase):
+
+	def setUp(self):
+		self.app = QApplication.instance() or QApplication([])
+		self.model = PostTableModel()
+		self.removed = []
+		self.inserted = []
+		self.changed = []
+		self.model.rowsRemoved.connect(lambda parent, first, last: self.removed.append((first, last)))
+		self.model.rowsInserted.connect(lambda parent, first, last: self.inserted.append((first, last)))
+		self.model.dataChanged.connect(lambda first, last: self.changed.append((first.row(), last.row())))
+
+	def title(self, row):
+		return self.model.data(self.model.index(row, 1))
+
+	def codes(self):
+		return [self.model.post_at(row).code for row in range(self.model.rowCount())]
+
+	# rows are handed to the view a page at a time
+	def test_fetch_more(self):
+		self.model.set_posts(posts(range(1, 501)))
+		self.assertEqual(0, self.model.rowCount())
+		self.assertTrue(self.model.canFetchMore())
+		self.model.fetchMore()
+		self.assertEqual(200, self.model.rowCount())
+		self.model.fetchMore()
+		self.model.fetchMore()
+		self.assertEqual(500, self.model.rowCount())
+		self.assertFalse(self.model.canFetchMore())
+		self.assertEqual("title 500", self.title(499))
+		self.assertIsNone(self.model.post_at(500))
+
+	# a source is read one page at a time, only for the rows shown
+	def test_source(self):
+		data = posts(range(1000, 0, -1))
+		reads = []
+
+		def fetch(offset, limit):
+			reads.append(offset)
+			return data[offset:offset + limit]
+
+		self.model.set_source(len(data), fetch)
+		self.model.fetchMore()
+		self.model.fetchMore()
+		self.assertEqual("title 1000", self.title(0))
+		self.assertEqual("title 800", self.title(200))
+		self.assertEqual("title 799", self.title(201))
+		self.assertEqual([0, 200], reads)
+
+	# removing a row the view has not fetched yet leaves the fetched rows alone
+	def test_remove_unfetched_row(self):
+		self.model.set_posts(posts(range(1, 501)))
+		self.model.fetchMore()
+		self.assertTrue(self.model.remove_post(400))
+		self.assertEqual([], self.removed)
+		self.assertEqual(200, self.model.rowCount())
+		self.assertEqual(499, self.model.total())
+		self.assertEqual(list(range(1, 201)), self.codes())
+		self.model.fetchMore()
+		self.model.fetchMore()
+		self.assertEqual([c for c in range(1, 501) if c != 400], self.codes())
+
+	def test_remove_fetched_row(self):
+		self.model.set_posts(posts(range(1, 501)))
+		self.model.fetchMore()
+		self.assertTrue(self.model.remove_post(100))
+		self.assertEqual([(99, 99)], self.removed)
+		self.assertEqual(199, self.model.rowCount())
+		self.assertEqual("title 101", self.title(99))
+		self.assertFalse(self.model.remove_post(100))
+
+	def test_insert_and_refresh(self):
+		self.model.set_posts(posts(range(1, 501)))
+		self.model.fetchMore()
+		self.inserted.clear()
+		new = posts([1000])[0]
+		self.model.insert_post(0, new)
+		self.assertEqual([(0, 0)], self.inserted)
+		self.assertEqual((201, 501), (self.model.rowCount(), self.model.total()))
+		self.assertEqual("title 1000", self.title(0))
+
+		# appended after the fetched rows: shown once fetched
+		self.model.insert_post(self.model.total(), posts([1001])[0])
+		self.assertEqual(1, len(self.inserted))
+		self.assertEqual(502, self.model.total())
+
+		new.title = "changed"
+		self.assertTrue(self.model.refresh_post(1000))
+		self.assertEqual([(0, 0)], self.changed)
+		self.assertEqual("changed", self.title(0))
+		# rows not fetched yet need no redraw
+		self.assertTrue(self.model.refresh_post(1001))
+		self.assertEqual(1, len(self.changed))
+
+	# with run, pages are read elsewhere and the rows redrawn once they arrive
+	def test_run(self):
+		data = posts(range(1, 301))
+		calls = []
+		self.model = PostTableModel(lambda fn, args, on_result, on_finished: calls.append((fn, args, on_result, on_finished)))
+		self.model.dataChanged.connect(lambda first, last: self.changed.append((first.row(), last.row())))
+		self.model.set_source(len(data), lambda offset, limit: data[offset:offset + limit])
+		self.model.fetchMore()
+		self.assertIsNone(self.title(0))
+		self.assertIsNone(self.title(1))
+		self.assertEqual(1, len(calls))
+
+		fn, args, on_result, on_finished = calls.pop()
+		on_result(fn(*args))
+		on_finished()
+		self.assertEqual([(0, 199)], self.changed)
+		self.assertEqual("title 1", self.title(0))
+
+		# a page read before the rows shifted is dropped and asked again
+		self.model.fetchMore()
+		self.assertIsNone(self.title(250))
+		fn, args, on_result, on_finished = calls.pop()
+		self.model.insert_post(0, posts([1000])[0])
+		on_result(fn(*args))
+		on_finished()
+		self.assertIsNone(self.title(250))
+		self.assertEqual(1, len(calls))
+
+		# a failed read is asked again
+		fn, args, on_result, on_finished = calls.pop()
+		on_finished()
+		self.assertIsNone(self.title(250))
+		self.assertEqual(1, len(calls))
+
+
+class BlogTableModelTest(TestCase):
+
+	def setUp(self):
+		self.app = QApplication.instance() or QApplication([])
+		# blogs without record files
+		self.configuration = Configuration()
+		self.configuration.__class__.autosave = False
+		self.blogs = [Blog(i, f"blog {i}", f"url {i}", "email") for i in range(1, 4)]
+		self.model = BlogTableModel(list(self.blogs))
+
+	def test_changes(self):
+		self.assertEqual(3, self.model.rowCount())
+		self.assertEqual("blog 2", self.model.data(self.model.index(1, 1)))
+		self.assertEqual("0", self.model.data(self.model.index(1, 4)))
+
+		self.model.append_blog(Blog(4, "blog 4", "url 4", "email"))
+		self.assertEqual(4, self.model.rowCount())
+		self.assertTrue(self.model.replace_blog(2, Blog(20, "blog 20", "url 20", "email")))
+		self.assertEqual("20", self.model.data(self.model.index(1, 0)))
+		self.assertFalse(self.model.replace_blog(2, self.blogs[1]))
+
+		self.assertTrue(self.model.remove_blog(1))
+		self.assertFalse(self.model.remove_blog(1))
+		self.assertEqual(["20", "3", "4"], [self.model.data(self.model.index(r, 0)) for r in range(3)])
+		self.assertIs(self.blogs[2], self.model.blog_at(1))
+		self.assertIsNone(self.model.blog_at(3))
+
+
+if __name__ == '__main__':
+	main()
@@ -0,0 +1,174 @@
+import os
+import pickle
+import shutil
+import tempfile
+from unittest import TestCase
+from unittest import main
+from blogging.controller import Controller
+from blogging.configuration import Configuration
+
+
+class TransactionTest(TestCase):
+
+	def setUp(self):
+		# persist into a scratch directory so the real store is untouched
+		self.configuration = Configuration()
+		self.saved = (Configuration.autosave, Configuration.blogs_file, Configuration.records_path)
+		self.tmp = tempfile.mkdtemp()
+		self.configuration.__class__.autosave = True
+		self.configuration.__class__.blogs_file = os.path.join(self.tmp, "blogs.json")
+		self.configuration.__class__.records_path = os.path.join(self.tmp, "records")
+		self.controller = Controller()
+		self.controller.login("user", "123456")
+
+	def tearDown(self):
+		Configuration.autosave, Configuration.blogs_file, Configuration.records_path = self.saved
+		shutil.rmtree(self.tmp)
+
+	def record_file(self, id):
+		return os.path.join(Configuration.records_path, f"{id}{Configuration.records_extension}")
+
+	def test_commit_writes_once(self):
+		self.controller.create_blog(1111114444, "Short Journey", "short_journey", "short.journey@gmail.com")
+		self.controller.set_current_blog(1111114444)
+		before = os.stat(self.record_file(1111114444)).st_mtime_ns
+
+		with self.controller.transaction():
+			for i in range(10):
+				self.controller.create_post(f"title {i}", f"text {i}")
+			self.controller.update_post(3, "changed", "changed text")
+			self.controller.delete_post(5)
+			# nothing reaches the disk before the block ends
+			self.assertEqual(before, os.stat(self.record_file(1111114444)).st_mtime_ns)
+
+		with open(self.record_file(1111114444), "rb") as f:
+			stored = pickle.load(f)
+		self.assertEqual([1, 2, 3, 4, 6, 7, 8, 9, 10], [p.code for p in stored])
+		self.assertEqual("changed", stored[2].title)
+
+		# a fresh controller sees the committed state
+		self.controller = Controller()
+		self.controller.login("user", "123456")
+		self.controller.set_current_blog(1111114444)
+		self.assertEqual(9, len(self.controller.list_posts()))
+
+	def test_rollback_discards_changes(self):
+		self.controller.create_blog(1111114444, "Short Journey", "short_journey", "short.journey@gmail.com")
+		self.controller.set_current_blog(1111114444)
+		self.controller.create_post("first", "kept")
+
+		with self.assertRaises(RuntimeError):
+			with self.controller.transaction():
+				self.controller.create_post("second", "dropped")
+				self.controller.update_post(1, "changed", "changed")
+				self.controller.delete_post(1)
+				self.controller.unset_current_blog()
+				self.controller.create_blog(1111115555, "Long Journey", "long_journey", "long.journey@gmail.com")
+				self.controller.update_blog(1111114444, 1111112000, "Long Trip", "long_trip", "long.trip@gmail.com")
+				raise RuntimeError("abort")
+
+		blogs = self.controller.list_blogs()
+		self.assertEqual([1111114444], [b.id for b in blogs])
+		self.controller.set_current_blog(1111114444)
+		posts = self.controller.list_posts()
+		self.assertEqual(1, len(posts))
+		self.assertEqual("first", posts[0].title)
+		self.assertEqual("kept", posts[0].text)
+
+		# the next post reuses the code of the rolled back one
+		self.assertEqual(2, self.controller.create_post("second", "kept").code)
+
+		self.controller = Controller()
+		self.controller.login("user", "123456")
+		self.assertEqual([1111114444], [b.id for b in self.controller.list_blogs()])
+
+	def test_nested_transaction_joins_outer(self):
+		with self.controller.transaction():
+			self.controller.create_blog(1111114444, "Short Journey", "short_journey", "short.journey@gmail.com")
+			with self.controller.transaction():
+				self.controller.create_blog(1111115555, "Long Journey", "long_journey", "long.journey@gmail.com")
+			self.assertEqual("[]", open(Configuration.blogs_file).read())
+		self.assertEqual(2, len(Controller().blog_dao.list_blogs()))
+
+
+	def test_update_blog_id_moves_record_file(self):
+		self.controller.create_blog(1111114444, "Short Journey", "short_journey", "short.journey@gmail.com")
+		self.controller.set_current_blog(1111114444)
+		for i in range(5):
+			self.controller.create_post(f"title {i}", f"text {i}")
+		self.controller.unset_current_blog()
+		blog = self.controller.search_blog(1111114444)
+		posts = blog.post_dao._posts
+
+		self.controller.update_blog(1111114444, 1111115555, "Renamed", "renamed", "renamed@gmail.com")
+		# same objects, posts kept in memory, file moved
+		self.assertIs(blog, self.controller.search_blog(1111115555))
+		self.assertIs(posts, blog.post_dao._posts)
+		self.assertEqual("Renamed", blog.name)
+		self.assertFalse(os.path.exists(self.record_file(1111114444)))
+		self.assertTrue(os.path.exists(self.record_file(1111115555)))
+
+		# a new controller finds the posts under the new id
+		controller = Controller()
+		controller.login("user", "123456")
+		controller.set_current_blog(1111115555)
+		self.assertEqual(5, controller.count_posts())
+
+		# posts created after the rename go to the new file
+		self.controller.set_current_blog(1111115555)
+		self.controller.create_post("after", "rename")
+		with open(self.record_file(1111115555), "rb") as f:
+			self.assertEqual(6, len(pickle.load(f)))
+
+	def test_rename_waits_for_commit(self):
+		self.controller.create_blog(1111114444, "Short Journey", "short_journey", "short.journey@gmail.com")
+		with self.controller.transaction():
+			self.controller.update_blog(1111114444, 1111115555, "Renamed", "renamed", "renamed@gmail.com")
+			# blogs.json still names the old id, so the file keeps its name
+			self.assertTrue(os.path.exists(self.record_file(1111114444)))
+			self.assertFalse(os.path.exists(self.record_file(1111115555)))
+		self.assertFalse(os.path.exists(self.record_file(1111114444)))
+		self.assertTrue(os.path.exists(self.record_file(1111115555)))
+
+	def test_rollback_keeps_record_file(self):
+		self.controller.create_blog(1111114444, "Short Journey", "short_journey", "short.journey@gmail.com")
+		with self.assertRaises(ValueError):
+			with self.controller.transaction():
+				self.controller.update_blog(1111114444, 1111115555, "Renamed", "renamed", "renamed@gmail.com")
+				raise ValueError()
+		blog = self.controller.search_blog(1111114444)
+		self.assertEqual("Short Journey", blog.name)
+		self.assertIsNone(self.controller.search_blog(1111115555))
+		self.assertTrue(os.path.exists(self.record_file(1111114444)))
+		self.assertFalse(os.path.exists(self.record_file(1111115555)))
+
+		# blogs.json cannot be written on commit: the file keeps its old name only
+		with self.assertRaises(OSError):
+			with self.controller.transaction():
+				self.controller.update_blog(1111114444, 1111115555, "Renamed", "renamed", "renamed@gmail.com")
+				self.controller.blog_dao.file_path = os.path.join(self.tmp, "missing", "blogs.json")
+		self.assertIsNotNone(self.controller.search_blog(1111114444))
+		self.assertEqual([f"1111114444{Configuration.records_extension}"], os.listdir(Configuration.records_path))
+
+	def test_failed_commit_restores_record_files(self):
+		self.controller.create_blog(1111114444, "Short Journey", "short_journey", "short.journey@gmail.com")
+		self.controller.set_current_blog(1111114444)
+		self.controller.create_post("first", "kept")
+		file_path = self.controller.blog_dao.file_path
+
+		# the record file is written, then blogs.json fails
+		with self.assertRaises(OSError):
+			with self.controller.transaction():
+				self.controller.create_post("second", "dropped")
+				self.controller.delete_post(1)
+				self.controller.blog_dao.file_path = os.path.join(self.tmp, "missing", "blogs.json")
+		self.controller.blog_dao.file_path = file_path
+
+		with open(self.record_file(1111114444), "rb") as f:
+			self.assertEqual(["first"], [p.title for p in pickle.load(f)])
+		self.assertEqual(["first"], [p.title for p in self.controller.list_posts()])
+		self.assertEqual(1, self.controller.get_current_blog().summary.posts)
+		self.assertEqual(2, self.controller.create_post("second", "kept").code)
+
+if __name__ == '__main__':
+	main()
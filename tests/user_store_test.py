@@ -0,0 +1,60 @@
+import hashlib
+import os
+import shutil
+import tempfile
+import unittest
+from blogging.user_store import UserStore
+
+
+class UserStoreTest(unittest.TestCase):
+
+	def setUp(self):
+		self.tmp = tempfile.mkdtemp()
+		self.users_file = os.path.join(self.tmp, "users.txt")
+		with open(self.users_file, "w") as f:
+			for name in ["user", "ali", "kala", "zed", "bob"]:
+				f.write(f"{name},{self.hash(name)}\n")
+			f.write("malformed line\n")
+
+	def tearDown(self):
+		shutil.rmtree(self.tmp)
+
+	def hash(self, pw):
+		return hashlib.sha256(pw.encode()).hexdigest()
+
+	#Every account can be found and unknown names return None
+	def test_lookup(self):
+		store = UserStore(self.users_file)
+		for name in ["user", "ali", "kala", "zed", "bob"]:
+			self.assertEqual(self.hash(name), store.get(name))
+			self.assertIn(name, store)
+		for name in ["", "a", "alix", "zzz", "malformed line", "user,"]:
+			self.assertIsNone(store.get(name))
+		with self.assertRaises(KeyError):
+			store["nobody"]
+
+	#Nothing is read until the first lookup, after which the index exists
+	def test_lazy_index(self):
+		store = UserStore(self.users_file)
+		self.assertFalse(os.path.exists(store.index_file))
+		store.get("user")
+		self.assertTrue(os.path.exists(store.index_file))
+		# a second store reuses the index
+		self.assertEqual(self.hash("kala"), UserStore(self.users_file).get("kala"))
+
+	#Accounts added to users.txt are picked up without a new store
+	def test_reload(self):
+		store = UserStore(self.users_file)
+		self.assertIsNone(store.get("newuser"))
+		with open(self.users_file, "a") as f:
+			f.write(f"newuser,{self.hash('new')}\n")
+		self.assertEqual(self.hash("new"), store.get("newuser"))
+
+	#A missing users file means an empty store
+	def test_missing_file(self):
+		store = UserStore(os.path.join(self.tmp, "missing.txt"))
+		self.assertIsNone(store.get("user"))
+
+
+if __name__ == '__main__':
+	unittest.main()